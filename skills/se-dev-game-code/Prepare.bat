@@ -64,26 +64,12 @@ echo If Space Engineers is installed at custom location, then please update the
 goto failed
 :skip_bin64
 
-if exist Decompiled\VRage.XmlSerializers goto skip_decompile
-.\busybox sh Decompile.sh
+echo Decompiling, copying content and indexing decompiled code
+uv run python -OO -u prepare.py --sqlite
 if %ERRORLEVEL% NEQ 0 goto failed
-:skip_decompile
 
 rmdir /s /q Bin64
 
-if exist Content goto skip_content
-echo Copying indexable content
-uv run python -u copy_content.py
-if %ERRORLEVEL% NEQ 0 goto failed
-:skip_content
-
-if exist CodeIndex\variables.csv goto skip_index
-echo Indexing decompiled code
-mkdir CodeIndex 2>NUL
-uv run python -OO -u index_code.py Decompiled CodeIndex
-if %ERRORLEVEL% NEQ 0 goto failed
-:skip_index
-
 echo DONE
 del "\\?\%cd%\nul" 2>error.txt
 del error.txt
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Indexer and Search Benchmark
+
+Times the indexer and the search on a synthetic C# corpus written by generate_corpus.py,
+so changes to index_code.py and search_code.py can be compared on the same input:
+
+- Indexing: CSharpIndexer.index_directory with a fresh manifest, the phases of the run,
+  a second run finding no changed files, and write_indices with the SQLite database
+- Searching: every pattern mode on the CSV scan, the SQLite database and the in-memory
+  searcher of search_server.py, the first page and the exact total
+- Checking: every search must find the same first page and total on all backends, otherwise
+  the benchmark fails
+
+Each measurement is the median of the repeats. The results can be saved as a named
+baseline in the benchmark_baselines folder and later runs compared against it. The
+timings depend on the machine, so baselines are only comparable on the same machine.
+
+Usage:
+    python benchmark.py [--files N] [--seed SEED] [--workers N] [--repeat N] [--corpus DIR]
+                        [--output RESULTS_JSON] [--save-baseline NAME] [--compare NAME] [--tolerance RATIO]
+
+Examples:
+    # Benchmark on 1000 generated files and save the results as the 'main' baseline
+    python benchmark.py --files 1000 --save-baseline main
+
+    # After a change, compare against the baseline, exits with 1 on regressions over 20%
+    python benchmark.py --files 1000 --compare main --tolerance 0.2
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from multiprocessing import cpu_count
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from generate_corpus import write_corpus
+from index_code import CSharpIndexer, IndexProfile
+from search_code import CodeIndexSearcher, SearchPattern, SqliteIndexSearcher
+from search_server import MemoryIndexSearcher
+
+BASELINE_DIRECTORY = Path(__file__).resolve().parent / 'benchmark_baselines'
+
+# (index file, pattern) of the searches, one or more for each pattern mode
+SEARCHES = [
+    ('classes', 'thrust'),
+    ('classes', 're:^My.*Block$'),
+    ('classes', 'exact:MyEntity'),
+    ('classes', 'decl:MyEntity'),
+    ('methods', 'name:GetPosition'),
+    ('methods', 'fts:position entity'),
+    ('methods', 'fts:posit'),
+    ('methods', 'fts:entity.'),
+    ('classes', 'containing_type=MyEntity type=usage'),
+    ('methods', 'containing_type~re:^My.*Block$ type=declaration'),
+]
+
+# Results per page of the first page searches
+PAGE_SIZE = 20
+
+# Slowdowns smaller than this are timer noise, not regressions, however large the ratio
+MIN_REGRESSION_SECONDS = 0.005
+
+
+def median_time(function: Callable, repeat: int) -> float:
+    """Return the median wall time of calling the function repeat times"""
+    times = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start_time)
+    return statistics.median(times)
+
+
+def prepare_corpus(corpus_dir: Path, files: int, seed: int) -> Path:
+    """Generate the corpus unless it was already generated with the same settings"""
+    marker = corpus_dir / 'corpus.json'
+    settings = {'files': files, 'seed': seed}
+    if marker.exists() and json.loads(marker.read_text()) == settings:
+        return corpus_dir
+
+    if corpus_dir.exists():
+        shutil.rmtree(corpus_dir)
+    print(f"Generating {files} files into {corpus_dir}...")
+    write_corpus(corpus_dir, files, seed)
+    marker.write_text(json.dumps(settings))
+    return corpus_dir
+
+
+def benchmark_indexing(corpus_dir: Path, output_dir: Path, workers: int, repeat: int) -> Dict[str, float]:
+    """Time full indexing runs, the phases of them, an unchanged rerun and writing the indices"""
+    runs: Dict[str, List[float]] = {}
+
+    def add(name: str, seconds: float):
+        runs.setdefault(name, []).append(seconds)
+
+    for run in range(repeat):
+        print(f"Indexing run {run + 1}/{repeat}...")
+        if output_dir.exists():
+            shutil.rmtree(output_dir)
+        output_dir.mkdir(parents=True)
+        manifest_path = output_dir / 'manifest.sqlite'
+
+        # The indexer reports its progress on stdout, which would drown the results
+        with contextlib.redirect_stdout(io.StringIO()):
+            profile = IndexProfile()
+            indexer = CSharpIndexer(str(corpus_dir), num_workers=workers, profile=profile)
+            start_time = time.perf_counter()
+            indexer.index_directory(manifest_path)
+            add('index.full', time.perf_counter() - start_time)
+
+            start_time = time.perf_counter()
+            indexer.write_indices(output_dir, write_sqlite=True)
+            add('index.write_indices', time.perf_counter() - start_time)
+
+            for phase, seconds in profile.phases.items():
+                add(f'index.phase.{phase}', seconds)
+
+            indexer = CSharpIndexer(str(corpus_dir), num_workers=workers)
+            start_time = time.perf_counter()
+            indexer.index_directory(manifest_path)
+            add('index.unchanged', time.perf_counter() - start_time)
+
+    return {name: statistics.median(times) for name, times in runs.items()}
+
+
+def benchmark_searches(index_dir: Path, repeat: int) -> Dict[str, float]:
+    """Time the searches on each backend, the first page and the exact total"""
+    timings = {}
+    memory_searchers = {}
+    for category, pattern_str in SEARCHES:
+        index_file = index_dir / f'{category}.csv'
+        searchers = {
+            'csv': CodeIndexSearcher(str(index_file)),
+            'sqlite': SqliteIndexSearcher(index_dir / 'index.sqlite', category),
+        }
+
+        # Loading the file is the one-time cost of the server, not measured per search
+        start_time = time.perf_counter()
+        if category not in memory_searchers:
+            memory_searchers[category] = MemoryIndexSearcher(index_file)
+            timings[f'search.load.{category}'] = time.perf_counter() - start_time
+        searchers['memory'] = memory_searchers[category]
+
+        for backend, searcher in searchers.items():
+            pattern = SearchPattern(pattern_str)
+            name = f'search.{backend}.{category}.{pattern_str}'
+            timings[f'{name}.page'] = median_time(lambda: searcher.search(pattern, PAGE_SIZE, 0), repeat)
+            timings[f'{name}.exact_total'] = median_time(
+                lambda: searcher.search(pattern, PAGE_SIZE, 0, exact_total=True), repeat)
+
+    return timings
+
+
+def check_backends(index_dir: Path) -> List[str]:
+    """Return the searches whose first page or exact total differs between the backends"""
+    mismatches = []
+    for category, pattern_str in SEARCHES:
+        index_file = index_dir / f'{category}.csv'
+        searchers = {
+            'csv': CodeIndexSearcher(str(index_file)),
+            'sqlite': SqliteIndexSearcher(index_dir / 'index.sqlite', category),
+            'memory': MemoryIndexSearcher(index_file),
+        }
+        pages = {backend: searcher.search(SearchPattern(pattern_str), PAGE_SIZE, 0, exact_total=True)
+                 for backend, searcher in searchers.items()}
+        expected = pages['csv']
+        for backend, page in pages.items():
+            if (page.total_matches, page.results) != (expected.total_matches, expected.results):
+                mismatches.append(f"{category} '{pattern_str}': {backend} found {page.total_matches}, "
+                                  f"csv found {expected.total_matches}")
+    return mismatches
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> bool:
+    """Print the timings next to the baseline, return whether any is slower than the tolerance allows"""
+    for key in ('files', 'seed', 'workers'):
+        if results['metadata'][key] != baseline['metadata'][key]:
+            print(f"Warning: The baseline was measured with {key}={baseline['metadata'][key]}, "
+                  f"this run with {key}={results['metadata'][key]}", file=sys.stderr)
+
+    regressions = 0
+    print(f"\n{'Measurement':<84} {'Baseline':>10} {'Current':>10} {'Change':>8}")
+    for name, seconds in results['timings'].items():
+        baseline_seconds = baseline['timings'].get(name)
+        if baseline_seconds is None:
+            print(f"{name:<84} {'-':>10} {seconds:>10.4f}")
+            continue
+
+        ratio = seconds / baseline_seconds if baseline_seconds > 0 else 1.0
+        marker = ''
+        if ratio > 1.0 + tolerance and seconds - baseline_seconds > MIN_REGRESSION_SECONDS:
+            marker = '  REGRESSION'
+            regressions += 1
+        print(f"{name:<84} {baseline_seconds:>10.4f} {seconds:>10.4f} {ratio - 1.0:>+8.1%}{marker}")
+
+    if regressions:
+        print(f"\n{regressions} measurements are more than {tolerance:.0%} slower than the baseline")
+    else:
+        print(f"\nNo measurement is more than {tolerance:.0%} slower than the baseline")
+    return regressions > 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the indexer and the search on a synthetic C# corpus')
+    parser.add_argument('--files', type=int, default=1000, help='Number of files to generate (default: 1000)')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed of the corpus (default: 1)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Number of indexer worker processes (default: twice the number of CPUs, as index_code.py)')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Number of runs of each measurement, the median is reported (default: 3)')
+    parser.add_argument('--corpus', metavar='DIR',
+                        help='Directory of the generated corpus, kept for later runs (default: a temporary directory)')
+    parser.add_argument('--output', metavar='RESULTS_JSON', help='Also write the results into this file')
+    parser.add_argument('--save-baseline', metavar='NAME', help='Save the results as this baseline')
+    parser.add_argument('--compare', metavar='NAME', help='Compare the results with this baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Slowdown ratio reported as a regression by --compare (default: 0.2)')
+    args = parser.parse_args()
+
+    if args.repeat < 1:
+        print("Error: --repeat must be at least 1", file=sys.stderr)
+        sys.exit(1)
+
+    baseline = None
+    if args.compare:
+        baseline_path = BASELINE_DIRECTORY / f'{args.compare}.json'
+        if not baseline_path.exists():
+            print(f"Error: Baseline '{baseline_path}' not found", file=sys.stderr)
+            sys.exit(1)
+        baseline = json.loads(baseline_path.read_text(encoding='utf-8'))
+
+    with tempfile.TemporaryDirectory(prefix='benchmark_') as temp_dir:
+        corpus_dir = prepare_corpus(Path(args.corpus or Path(temp_dir) / 'corpus'), args.files, args.seed)
+        index_dir = Path(temp_dir) / 'CodeIndex'
+
+        timings = benchmark_indexing(corpus_dir, index_dir, args.workers, args.repeat)
+        print("Searching...")
+        timings.update(benchmark_searches(index_dir, args.repeat))
+        mismatches = check_backends(index_dir)
+
+        results = {
+            'metadata': {
+                'files': args.files,
+                'seed': args.seed,
+                'workers': args.workers or cpu_count() * 2,
+                'repeat': args.repeat,
+                'corpus_bytes': sum(path.stat().st_size for path in corpus_dir.rglob('*.cs')),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            },
+            'timings': timings,
+        }
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2), encoding='utf-8')
+
+    if args.save_baseline:
+        BASELINE_DIRECTORY.mkdir(exist_ok=True)
+        baseline_path = BASELINE_DIRECTORY / f'{args.save_baseline}.json'
+        baseline_path.write_text(json.dumps(results, indent=2), encoding='utf-8')
+        print(f"Baseline saved to {baseline_path}")
+
+    for mismatch in mismatches:
+        print(f"Error: The backends disagree on {mismatch}", file=sys.stderr)
+
+    if baseline is not None:
+        if compare(results, baseline, args.tolerance) or mismatches:
+            sys.exit(1)
+    else:
+        print(f"\n{'Measurement':<84} {'Seconds':>10}")
+        for name, seconds in timings.items():
+            print(f"{name:<84} {seconds:>10.4f}")
+        if mismatches:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
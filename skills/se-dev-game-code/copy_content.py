@@ -1,11 +1,11 @@
 import os
 import shutil
 from pathlib import Path
-from typing import Set
+from typing import Optional, Set
 
 
-def copy_content(subdir: str, allowed_extensions: Set[str], exclude: Set[str] = ()):
-    src_dir = Path(os.environ['SPACE_ENGINEERS_ROOT']) / 'Content' / subdir
+def copy_content(subdir: str, allowed_extensions: Set[str], exclude: Set[str] = (), game_root: Optional[Path] = None):
+    src_dir = (game_root or Path(os.environ['SPACE_ENGINEERS_ROOT'])) / 'Content' / subdir
     dst_dir = Path('Content') / subdir
     dst_dir.mkdir(parents=True, exist_ok=True)
     for src_path in src_dir.glob('**/*'):
@@ -21,15 +21,15 @@ def copy_content(subdir: str, allowed_extensions: Set[str], exclude: Set[str] =
         shutil.copyfile(src_path, dst_path)
 
 
-def main():
-    copy_content('CustomWorlds', {'scf'})
-    copy_content('Data', {'sbc', 'sbl', 'resx', 'vs', 'gsc', 'json'}, {'Prefabs'})
-    copy_content('DataPlatform', {'json'})
-    copy_content('Fonts', {'xml'})
-    copy_content('Particles', {'mwl'})
-    copy_content('Scenarios', {'scf', 'sbl', 'resx', 'vs'})
-    copy_content('Shaders', {'hlsi'})
-    copy_content('VisualScripts', {'vs', 'vsc', 'sbl', 'resx'})
+def main(game_root: Optional[Path] = None):
+    copy_content('CustomWorlds', {'scf'}, game_root=game_root)
+    copy_content('Data', {'sbc', 'sbl', 'resx', 'vs', 'gsc', 'json'}, {'Prefabs'}, game_root)
+    copy_content('DataPlatform', {'json'}, game_root=game_root)
+    copy_content('Fonts', {'xml'}, game_root=game_root)
+    copy_content('Particles', {'mwl'}, game_root=game_root)
+    copy_content('Scenarios', {'scf', 'sbl', 'resx', 'vs'}, game_root=game_root)
+    copy_content('Shaders', {'hlsi'}, game_root=game_root)
+    copy_content('VisualScripts', {'vs', 'vsc', 'sbl', 'resx'}, game_root=game_root)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Game Assembly Decompiler
+
+Decompiles the game assemblies with ilspycmd into one folder per assembly, running
+the ilspycmd jobs in parallel. Each assembly takes two jobs: the C# project export
+and the IL code with sequence points, both writing into the same folder.
+
+The SHA-256 hash of each decompiled assembly is recorded in a manifest, so running
+it again after a game update only decompiles the assemblies whose binary changed,
+after removing their stale output. The output of every ilspycmd job is written into
+its own log file, the manifest also records how long the jobs took.
+
+Files in the output folder:
+    <Assembly>/                 Decompiled project and IL code of each assembly
+    .decompile/manifest.json    Hash, size and job timings of each decompiled assembly
+    .decompile/<Assembly>.<job>.log  Command line, output and exit code of each job
+
+Usage:
+    python decompile.py [--bin-dir DIR] [--output-dir DIR] [--jobs N] [--ilspycmd PATH] [--rebuild]
+
+Options:
+    --bin-dir       Game folder containing the assemblies (default: Bin64)
+    --output-dir    Folder to decompile into (default: Decompiled)
+    --jobs          Number of ilspycmd processes run at the same time (default: number of CPUs)
+    --ilspycmd      The ilspycmd executable to run (default: ilspycmd)
+    --rebuild       Decompile all assemblies, even if they did not change
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from multiprocessing import cpu_count
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+# (output folder, assembly file in the game folder) of the decompiled assemblies
+ASSEMBLIES = [
+    ('Sandbox.Common', 'Sandbox.Common.dll'),
+    ('Sandbox.Game', 'Sandbox.Game.dll'),
+    ('Sandbox.Game.XmlSerializers', 'Sandbox.Game.XmlSerializers.dll'),
+    ('Sandbox.Graphics', 'Sandbox.Graphics.dll'),
+    ('Sandbox.RenderDirect', 'Sandbox.RenderDirect.dll'),
+    ('SpaceEngineers', 'SpaceEngineers.exe'),
+    ('SpaceEngineers.Game', 'SpaceEngineers.Game.dll'),
+    ('SpaceEngineers.ObjectBuilders', 'SpaceEngineers.ObjectBuilders.dll'),
+    ('SpaceEngineers.ObjectBuilders.XmlSerializers', 'SpaceEngineers.ObjectBuilders.XmlSerializers.dll'),
+    ('VRage.Ansel', 'VRage.Ansel.dll'),
+    ('VRage.Audio', 'VRage.Audio.dll'),
+    ('VRage', 'VRage.dll'),
+    ('VRage.EOS', 'VRage.EOS.dll'),
+    ('VRage.EOS.XmlSerializers', 'VRage.EOS.XmlSerializers.dll'),
+    ('VRage.Game', 'VRage.Game.dll'),
+    ('VRage.Game.XmlSerializers', 'VRage.Game.XmlSerializers.dll'),
+    ('VRage.Input', 'VRage.Input.dll'),
+    ('VRage.Library', 'VRage.Library.dll'),
+    ('VRage.Math', 'VRage.Math.dll'),
+    ('VRage.Math.XmlSerializers', 'VRage.Math.XmlSerializers.dll'),
+    ('VRage.Mod.Io', 'VRage.Mod.Io.dll'),
+    ('VRage.NativeAftermath', 'VRage.NativeAftermath.dll'),
+    ('VRage.NativeWrapper', 'VRage.NativeWrapper.dll'),
+    ('VRage.Network', 'VRage.Network.dll'),
+    ('VRage.Platform.Windows', 'VRage.Platform.Windows.dll'),
+    ('VRage.Render', 'VRage.Render.dll'),
+    ('VRage.Render11', 'VRage.Render11.dll'),
+    ('VRage.Scripting', 'VRage.Scripting.dll'),
+    ('VRage.Steam', 'VRage.Steam.dll'),
+    ('VRage.UserInterface', 'VRage.UserInterface.dll'),
+    ('VRage.XmlSerializers', 'VRage.XmlSerializers.dll'),
+]
+
+STATE_DIRECTORY_NAME = '.decompile'
+
+
+def file_hash(path: Path) -> str:
+    """Return the SHA-256 hash of the file content"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DecompileJob:
+    """One ilspycmd run of an assembly, logging its output into a file"""
+
+    def __init__(self, name: str, kind: str, arguments: List[str], log_path: Path):
+        self.name = name
+        self.kind = kind
+        self.arguments = arguments
+        self.log_path = log_path
+        self.seconds = 0.0
+        self.returncode: Optional[int] = None
+
+    def run(self) -> 'DecompileJob':
+        start_time = time.perf_counter()
+        with open(self.log_path, 'w', encoding='utf-8') as log:
+            log.write('$ ' + subprocess.list2cmdline(self.arguments) + '\n')
+            log.flush()
+            try:
+                self.returncode = subprocess.run(self.arguments, stdout=log, stderr=subprocess.STDOUT,
+                                                 stdin=subprocess.DEVNULL).returncode
+            except OSError as e:
+                log.write(f'Cannot run the command: {e}\n')
+                self.returncode = -1
+            self.seconds = time.perf_counter() - start_time
+            log.write(f'\nExit code {self.returncode} after {self.seconds:.1f} seconds\n')
+        return self
+
+
+class DecompileManifest:
+    """Hash, size and job timings of the decompiled assemblies, stored as JSON"""
+
+    VERSION = 1
+
+    def __init__(self, path: Path, rebuild: bool = False):
+        self.path = path
+        self.assemblies: Dict[str, Dict] = {}
+        if path.exists() and not rebuild:
+            try:
+                data = json.loads(path.read_text(encoding='utf-8'))
+            except ValueError:
+                print(f"Warning: Ignoring the unreadable manifest '{path}'", file=sys.stderr)
+            else:
+                if data.get('version') == self.VERSION:
+                    self.assemblies = data.get('assemblies', {})
+
+    def is_current(self, name: str, digest: str) -> bool:
+        entry = self.assemblies.get(name)
+        return entry is not None and entry['sha256'] == digest
+
+    def save(self):
+        """Write the manifest, replacing the previous one only once it is written completely"""
+        temp_path = self.path.with_suffix('.tmp')
+        temp_path.write_text(json.dumps({'version': self.VERSION, 'assemblies': self.assemblies}, indent=2),
+                             encoding='utf-8')
+        os.replace(temp_path, self.path)
+
+
+class Decompiler:
+    """Decompiles the changed assemblies with parallel ilspycmd jobs"""
+
+    def __init__(self, bin_dir: Path, output_dir: Path, ilspycmd: str = 'ilspycmd', num_jobs: Optional[int] = None):
+        self.bin_dir = bin_dir
+        self.output_dir = output_dir
+        self.state_dir = output_dir / STATE_DIRECTORY_NAME
+        self.ilspycmd = ilspycmd
+        self.num_jobs = num_jobs or cpu_count()
+
+    def _create_jobs(self, name: str, assembly_path: Path) -> List[DecompileJob]:
+        """Return the C# project export and the IL code jobs of an assembly"""
+        target_dir = str(self.output_dir / name)
+        return [
+            DecompileJob(name, 'project', [
+                self.ilspycmd, '--project', '--nested-directories', '--referencepath', str(self.bin_dir),
+                '--languageversion', 'CSharp11_0', '--disable-updatecheck', '-o', target_dir, str(assembly_path)
+            ], self.state_dir / f'{name}.project.log'),
+            DecompileJob(name, 'il', [
+                self.ilspycmd, '--ilcode', '--il-sequence-points', '-o', target_dir, str(assembly_path)
+            ], self.state_dir / f'{name}.il.log'),
+        ]
+
+    def decompile(self, assemblies: List[tuple], rebuild: bool = False,
+                  on_ready: Optional[Callable[[Path], None]] = None) -> bool:
+        """Decompile the assemblies which changed since the last run, returns whether all jobs succeeded
+
+        The on_ready function is called from this thread with the output folder of each assembly
+        once its C# files are complete: right away if unchanged, otherwise when its project
+        export succeeded, while the other jobs are still running.
+        """
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        manifest = DecompileManifest(self.state_dir / 'manifest.json', rebuild)
+
+        # Find the changed assemblies by their hash
+        changed = []
+        for name, file_name in assemblies:
+            assembly_path = self.bin_dir / file_name
+            if not assembly_path.exists():
+                print(f"Error: Assembly '{assembly_path}' not found", file=sys.stderr)
+                return False
+
+            digest = file_hash(assembly_path)
+            if not (manifest.is_current(name, digest) and (self.output_dir / name).is_dir()):
+                changed.append((name, assembly_path, digest))
+            elif on_ready is not None:
+                on_ready(self.output_dir / name)
+
+        print(f"Assemblies changed since the last run: {len(changed)} of {len(assemblies)}")
+        if not changed:
+            return True
+
+        # Remove the stale output and forget the assemblies until they are decompiled again
+        for name, assembly_path, digest in changed:
+            manifest.assemblies.pop(name, None)
+            shutil.rmtree(self.output_dir / name, ignore_errors=True)
+        manifest.save()
+
+        # Start the jobs of the largest assemblies first, they take the longest
+        changed.sort(key=lambda item: item[1].stat().st_size, reverse=True)
+        jobs = [job for name, assembly_path, digest in changed for job in self._create_jobs(name, assembly_path)]
+        hashes = {name: (assembly_path, digest) for name, assembly_path, digest in changed}
+        remaining = {name: 2 for name in hashes}
+        timings: Dict[str, Dict[str, float]] = {name: {} for name in hashes}
+        failed = set()
+
+        print(f"Running {len(jobs)} ilspycmd jobs, {self.num_jobs} at a time")
+        start_time = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.num_jobs) as executor:
+            for future in as_completed([executor.submit(job.run) for job in jobs]):
+                job = future.result()
+                timings[job.name][job.kind] = round(job.seconds, 3)
+                if job.returncode != 0:
+                    print(f"Failed to decompile {job.name} ({job.kind}), see {job.log_path}")
+                    failed.add(job.name)
+                else:
+                    print(f"Decompiled {job.name} ({job.kind}) in {job.seconds:.1f} seconds")
+                    if job.kind == 'project' and on_ready is not None:
+                        on_ready(self.output_dir / job.name)
+
+                # Record an assembly once both of its jobs succeeded, so an interrupted run keeps the progress
+                remaining[job.name] -= 1
+                if remaining[job.name] == 0 and job.name not in failed:
+                    assembly_path, digest = hashes[job.name]
+                    manifest.assemblies[job.name] = {
+                        'file': assembly_path.name,
+                        'size': assembly_path.stat().st_size,
+                        'sha256': digest,
+                        'seconds': timings[job.name],
+                    }
+                    manifest.save()
+
+        print(f"Decompiled {len(changed) - len(failed)} assemblies in {time.perf_counter() - start_time:.1f} seconds")
+        if failed:
+            print(f"Failed to decompile: {', '.join(sorted(failed))}")
+            return False
+        return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Decompile the game assemblies with parallel ilspycmd jobs')
+    parser.add_argument('--bin-dir', default='Bin64', help='Game folder containing the assemblies (default: Bin64)')
+    parser.add_argument('--output-dir', default='Decompiled', help='Folder to decompile into (default: Decompiled)')
+    parser.add_argument('--jobs', type=int, default=None,
+                        help='Number of ilspycmd processes run at the same time (default: number of CPUs)')
+    parser.add_argument('--ilspycmd', default='ilspycmd', help='The ilspycmd executable to run (default: ilspycmd)')
+    parser.add_argument('--rebuild', action='store_true', help='Decompile all assemblies, even if they did not change')
+    args = parser.parse_args()
+
+    if args.jobs is not None and args.jobs < 1:
+        print("Error: --jobs must be at least 1", file=sys.stderr)
+        sys.exit(1)
+
+    bin_dir = Path(args.bin_dir)
+    if not bin_dir.is_dir():
+        print(f"Error: Game folder '{bin_dir}' not found", file=sys.stderr)
+        sys.exit(1)
+
+    print("Decompiling game assemblies...")
+    decompiler = Decompiler(bin_dir, Path(args.output_dir), args.ilspycmd, args.jobs)
+    if not decompiler.decompile(ASSEMBLIES, args.rebuild):
+        sys.exit(1)
+    print("Successfully decompiled the game assemblies.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""
+Synthetic C# Corpus Generator
+
+Generates a C# source tree shaped like the ILSpy project output of decompile.py,
+for benchmarking the indexer and the search without the real decompiled game code:
+
+- One folder per assembly, nested folders per namespace (--nested-directories)
+- Block-scoped and file-scoped namespaces, nested namespace declarations
+- Classes, structs, interfaces, enums and records, partial classes split into files
+- Nested types, deeply nested statements and long methods
+- XML doc comments, attributes, fields, properties and constructors
+- A few huge files, like the large Sandbox.Game classes and the XmlSerializers
+
+A set of core types (MyEntity, MyCubeBlock, Vector3D...) is referenced from all other
+files, so the usages are distributed like in the game code. The output is determined
+by the number of files and the seed.
+
+Usage:
+    python generate_corpus.py [--files N] [--seed SEED] <output_directory>
+"""
+
+import argparse
+import random
+import sys
+from pathlib import Path
+from typing import List, Tuple
+
+ASSEMBLIES = [
+    ('Sandbox.Game', ['Sandbox.Game.Entities', 'Sandbox.Game.Entities.Blocks', 'Sandbox.Game.Entities.Cube',
+                      'Sandbox.Game.Weapons', 'Sandbox.Game.GameSystems', 'Sandbox.Game.Gui']),
+    ('Sandbox.Common', ['Sandbox.Common.ObjectBuilders', 'Sandbox.ModAPI']),
+    ('SpaceEngineers.Game', ['SpaceEngineers.Game.Entities.Blocks', 'SpaceEngineers.Game.World']),
+    ('VRage', ['VRage', 'VRage.Collections', 'VRage.Utils']),
+    ('VRage.Game', ['VRage.Game', 'VRage.Game.Components', 'VRage.Game.ObjectBuilders.Definitions']),
+    ('VRage.Library', ['VRage.Library', 'VRage.Library.Collections', 'VRage.Network']),
+    ('VRage.Math', ['VRageMath', 'VRageMath.PackedVector']),
+    ('VRage.Render11', ['VRage.Render11.Common', 'VRage.Render11.Resources']),
+]
+
+NOUNS = ['Thrust', 'Gyro', 'Reactor', 'Battery', 'Door', 'Light', 'Turret', 'Cockpit', 'Connector', 'Drill',
+         'Welder', 'Grinder', 'Projector', 'Sensor', 'Timer', 'Antenna', 'Beacon', 'Cargo', 'Conveyor', 'Piston',
+         'Rotor', 'Wheel', 'Parachute', 'Camera', 'Jump', 'Medical', 'Oxygen', 'Hydrogen', 'Refinery', 'Assembler',
+         'Grid', 'Character', 'Planet', 'Voxel', 'Inventory', 'Terminal', 'Toolbar', 'Session', 'Faction', 'Sound']
+
+SUFFIXES = ['Block', 'Component', 'System', 'Definition', 'Manager', 'Logic', 'Helper', 'Data', 'Info', 'Controller']
+
+VERBS = ['Update', 'Get', 'Set', 'Init', 'Close', 'Refresh', 'Apply', 'Compute', 'Find', 'Register', 'Remove',
+         'Add', 'Check', 'Validate', 'Serialize', 'Deserialize', 'Sync', 'Draw', 'Load', 'Save']
+
+WORDS = ['position', 'thrust', 'override', 'power', 'grid', 'block', 'entity', 'inventory', 'owner', 'player',
+         'velocity', 'damage', 'integrity', 'terminal', 'property', 'network', 'state', 'definition', 'returns',
+         'the', 'of', 'for', 'current', 'value', 'world', 'matrix']
+
+# Core types declared once and referenced from all generated files
+CORE_FILES = {
+    'VRage.Game/VRage/Game/Entity/MyEntity.cs': '''using System;
+using VRageMath;
+
+namespace VRage.Game.Entity
+{
+\t/// <summary>
+\t/// Base class of all entities in the world.
+\t/// </summary>
+\tpublic class MyEntity : IMyEntity
+\t{
+\t\tprivate MatrixD m_worldMatrix;
+
+\t\tpublic long EntityId { get; set; }
+
+\t\t/// <summary>
+\t\t/// Returns the position of the entity in the world.
+\t\t/// </summary>
+\t\tpublic Vector3D GetPosition()
+\t\t{
+\t\t\treturn m_worldMatrix.Translation;
+\t\t}
+
+\t\tpublic virtual void UpdateBeforeSimulation()
+\t\t{
+\t\t}
+\t}
+}
+''',
+    'VRage.Game/VRage/Game/Entity/IMyEntity.cs': '''namespace VRage.Game.Entity
+{
+\tpublic interface IMyEntity
+\t{
+\t\tlong EntityId { get; set; }
+\t}
+}
+''',
+    'VRage.Math/VRageMath/Vector3D.cs': '''using System;
+
+namespace VRageMath;
+
+/// <summary>
+/// Defines a vector with three components.
+/// </summary>
+public struct Vector3D
+{
+\tpublic double X;
+
+\tpublic double Y;
+
+\tpublic double Z;
+
+\tpublic static Vector3D Zero;
+
+\tpublic double Length()
+\t{
+\t\treturn Math.Sqrt(X * X + Y * Y + Z * Z);
+\t}
+}
+''',
+    'VRage.Math/VRageMath/MatrixD.cs': '''namespace VRageMath;
+
+public struct MatrixD
+{
+\tpublic Vector3D Translation;
+}
+''',
+    'Sandbox.Game/Sandbox/Game/Entities/MyCubeBlock.cs': '''using VRage.Game.Entity;
+
+namespace Sandbox.Game.Entities
+{
+\t/// <summary>
+\t/// Base class of the functional blocks on a grid.
+\t/// </summary>
+\tpublic class MyCubeBlock : MyEntity
+\t{
+\t\tpublic MyCubeGrid CubeGrid { get; private set; }
+
+\t\tpublic virtual void Init(MyObjectBuilder_CubeBlock builder, MyCubeGrid grid)
+\t\t{
+\t\t\tCubeGrid = grid;
+\t\t}
+\t}
+
+\tpublic class MyCubeGrid : MyEntity
+\t{
+\t\tpublic float GridSize;
+\t}
+
+\tpublic enum MyRelationsBetweenPlayerAndBlock
+\t{
+\t\tNoOwnership,
+\t\tOwner,
+\t\tFactionShare,
+\t\tNeutral,
+\t\tEnemies
+\t}
+}
+''',
+    'VRage.Game/VRage/Game/MyObjectBuilder_CubeBlock.cs': '''namespace VRage.Game
+{
+\tpublic class MyObjectBuilder_CubeBlock
+\t{
+\t\tpublic string SubtypeName;
+\t}
+}
+''',
+}
+
+CORE_TYPES = ['MyEntity', 'MyCubeBlock', 'MyCubeGrid', 'Vector3D', 'MatrixD', 'MyObjectBuilder_CubeBlock']
+CORE_METHODS = ['GetPosition', 'UpdateBeforeSimulation', 'Init', 'Length']
+CORE_FIELDS = ['EntityId', 'CubeGrid', 'GridSize', 'X', 'Y', 'Z', 'Translation']
+
+
+class CorpusGenerator:
+    """Generates the files of a synthetic C# source tree"""
+
+    # Share of the files generated as huge files, and their size in methods
+    HUGE_FILE_RATIO = 0.002
+    HUGE_FILE_METHODS = 600
+
+    def __init__(self, seed: int):
+        self.random = random.Random(seed)
+        self.type_names: List[str] = []
+
+    def _words(self, count: int) -> str:
+        return ' '.join(self.random.choice(WORDS) for _ in range(count))
+
+    def _type_name(self, index: int) -> str:
+        noun = NOUNS[index % len(NOUNS)]
+        suffix = SUFFIXES[(index // len(NOUNS)) % len(SUFFIXES)]
+        generation = index // (len(NOUNS) * len(SUFFIXES))
+        return f"My{noun}{suffix}{generation if generation else ''}"
+
+    def _referenced_type(self) -> str:
+        if self.type_names and self.random.random() < 0.5:
+            return self.random.choice(self.type_names)
+        return self.random.choice(CORE_TYPES)
+
+    def _doc_comment(self, indent: str, lines: List[str]):
+        lines.append(f'{indent}/// <summary>')
+        lines.append(f'{indent}/// {self._words(self.random.randint(4, 12)).capitalize()}.')
+        lines.append(f'{indent}/// </summary>')
+
+    def _statements(self, indent: str, depth: int, count: int, fields: List[str], lines: List[str]):
+        """Append statements, nesting blocks up to the depth"""
+        for i in range(count):
+            choice = self.random.random()
+            if depth > 0 and choice < 0.25:
+                lines.append(f'{indent}if ({self.random.choice(fields)} != null && entity.EntityId > {i})')
+                lines.append(f'{indent}{{')
+                self._statements(indent + '\t', depth - 1, self.random.randint(1, 4), fields, lines)
+                lines.append(f'{indent}}}')
+            elif depth > 0 and choice < 0.35:
+                lines.append(f'{indent}for (int i{depth} = 0; i{depth} < {self.random.randint(2, 64)}; i{depth}++)')
+                lines.append(f'{indent}{{')
+                self._statements(indent + '\t', depth - 1, self.random.randint(1, 4), fields, lines)
+                lines.append(f'{indent}}}')
+            elif choice < 0.6:
+                lines.append(f'{indent}{self.random.choice(fields)} = '
+                             f'{self.random.choice(VERBS)}{self.random.choice(NOUNS)}(entity, {i});')
+            elif choice < 0.8:
+                lines.append(f'{indent}Vector3D position{i} = entity.{self.random.choice(CORE_METHODS)}();')
+            else:
+                lines.append(f'{indent}{self._referenced_type()}.{self.random.choice(CORE_FIELDS)} = '
+                             f'{self.random.choice(CORE_FIELDS)};')
+
+    def _type_body(self, name: str, kind: str, indent: str, methods: int, nesting: int, lines: List[str]):
+        """Append the members of a class or struct"""
+        fields = [f'm_{self.random.choice(WORDS)}{i}' for i in range(self.random.randint(2, 8))]
+        for field_name in fields:
+            lines.append(f'{indent}private {self._referenced_type()} {field_name};')
+            lines.append('')
+
+        for i in range(self.random.randint(1, 4)):
+            noun = self.random.choice(NOUNS)
+            self._doc_comment(indent, lines)
+            lines.append(f'{indent}public {self._referenced_type()} {noun}{i} {{ get; set; }}')
+            lines.append('')
+
+        if kind == 'class':
+            lines.append(f'{indent}public {name}()')
+            lines.append(f'{indent}{{')
+            lines.append(f'{indent}\t{fields[0]} = null;')
+            lines.append(f'{indent}}}')
+            lines.append('')
+
+        for i in range(methods):
+            method_name = f'{self.random.choice(VERBS)}{self.random.choice(NOUNS)}{i}'
+            if self.random.random() < 0.5:
+                self._doc_comment(indent, lines)
+            return_type = self.random.choice(['void', 'bool', 'int', self._referenced_type()])
+            lines.append(f'{indent}public {return_type} {method_name}(MyEntity entity, {self._referenced_type()} value)')
+            lines.append(f'{indent}{{')
+
+            # Mostly short methods, some long ones
+            statements = self.random.randint(2, 12) if self.random.random() < 0.97 else self.random.randint(60, 200)
+            self._statements(indent + '\t', self.random.randint(1, 6), statements, fields, lines)
+            if return_type == 'void':
+                pass
+            elif return_type == 'bool':
+                lines.append(f'{indent}\treturn {fields[0]} != null;')
+            elif return_type == 'int':
+                lines.append(f'{indent}\treturn {i};')
+            else:
+                lines.append(f'{indent}\treturn default({return_type});')
+            lines.append(f'{indent}}}')
+            lines.append('')
+
+        # Nested types, sometimes deeply
+        if nesting > 0 and self.random.random() < 0.3:
+            nested_name = f'{self.random.choice(["Sync", "State", "Helper", "Data"])}{nesting}'
+            lines.append(f'{indent}private class {nested_name}')
+            lines.append(f'{indent}{{')
+            self._type_body(nested_name, 'class', indent + '\t', self.random.randint(1, 3), nesting - 1, lines)
+            lines.append(f'{indent}}}')
+
+    def _type_declaration(self, name: str, kind: str, indent: str, methods: int, partial: bool) -> List[str]:
+        lines = []
+        self._doc_comment(indent, lines)
+        if kind == 'enum':
+            lines.append(f'{indent}public enum {name}')
+            lines.append(f'{indent}{{')
+            lines.extend(f'{indent}\t{self.random.choice(NOUNS)}{i},' for i in range(self.random.randint(3, 20)))
+            lines.append(f'{indent}}}')
+            return lines
+
+        if kind == 'interface':
+            lines.append(f'{indent}public interface {name}')
+            lines.append(f'{indent}{{')
+            for i in range(self.random.randint(1, 6)):
+                lines.append(f'{indent}\t{self._referenced_type()} {self.random.choice(VERBS)}{i}(MyEntity entity);')
+                lines.append('')
+            lines.append(f'{indent}}}')
+            return lines
+
+        if kind == 'record':
+            lines.append(f'{indent}public record {name}({self._referenced_type()} Value, int Count);')
+            return lines
+
+        if kind == 'class':
+            base = self.random.choice(['MyEntity', 'MyCubeBlock', self._referenced_type()])
+            lines.append(f'{indent}[MyCubeBlockType(typeof(MyObjectBuilder_{name}))]')
+            lines.append(f"{indent}public {'partial ' if partial else ''}class {name} : {base}")
+        else:
+            lines.append(f'{indent}public struct {name}')
+        lines.append(f'{indent}{{')
+        self._type_body(name, kind, indent + '\t', methods, self.random.randint(0, 4), lines)
+        lines.append(f'{indent}}}')
+        return lines
+
+    def _file(self, namespace: str, body: List[str]) -> str:
+        usings = ['System', 'System.Collections.Generic', 'VRage.Game.Entity', 'VRageMath', 'Sandbox.Game.Entities']
+        lines = [f'using {using};' for using in usings] + ['']
+
+        if self.random.random() < 0.4:
+            # File-scoped namespace, the declarations are not indented
+            lines.append(f'namespace {namespace};')
+            lines.append('')
+            lines.extend(line[1:] if line.startswith('\t') else line for line in body)
+        elif self.random.random() < 0.2 and '.' in namespace:
+            # Nested namespace declarations
+            outer, inner = namespace.rsplit('.', 1)
+            lines.append(f'namespace {outer}')
+            lines.append('{')
+            lines.append(f'\tnamespace {inner}')
+            lines.append('\t{')
+            lines.extend(f'\t{line}' if line else line for line in body)
+            lines.append('\t}')
+            lines.append('}')
+        else:
+            lines.append(f'namespace {namespace}')
+            lines.append('{')
+            lines.extend(body)
+            lines.append('}')
+        return '\n'.join(lines) + '\n'
+
+    def generate(self, count: int) -> List[Tuple[str, str]]:
+        """Return (relative path, source code) of the files"""
+        files = list(CORE_FILES.items())
+
+        index = 0
+        while len(files) < count:
+            assembly, namespaces = self.random.choice(ASSEMBLIES)
+            namespace = self.random.choice(namespaces)
+            name = self._type_name(index)
+            index += 1
+
+            huge = self.random.random() < self.HUGE_FILE_RATIO
+            kind = 'class' if huge else self.random.choices(
+                ['class', 'struct', 'interface', 'enum', 'record'], [70, 10, 10, 7, 3])[0]
+            methods = self.HUGE_FILE_METHODS if huge else self.random.randint(1, 15)
+
+            # Partial classes are split into two files, like Name.cs and Name.Generated.cs
+            partial = kind == 'class' and not huge and self.random.random() < 0.05
+            folder = f"{assembly}/{namespace.replace('.', '/')}"
+            files.append((f'{folder}/{name}.cs',
+                          self._file(namespace, self._type_declaration(name, kind, '\t', methods, partial))))
+            if partial and len(files) < count:
+                files.append((f'{folder}/{name}.Generated.cs',
+                              self._file(namespace, self._type_declaration(name, kind, '\t', 3, partial))))
+
+            self.type_names.append(name)
+
+        return files[:count]
+
+
+def write_corpus(output_dir: Path, count: int, seed: int) -> int:
+    """Generate the files into the directory, returns the number of bytes written"""
+    total_bytes = 0
+    for relative_path, source_code in CorpusGenerator(seed).generate(count):
+        path = output_dir / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8', newline='\n') as f:
+            f.write(source_code)
+        total_bytes += len(source_code)
+    return total_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic C# source tree shaped like the ILSpy output')
+    parser.add_argument('output_dir', help='Directory to write the C# files into')
+    parser.add_argument('--files', type=int, default=1000, help='Number of files to generate (default: 1000)')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed (default: 1)')
+    args = parser.parse_args()
+
+    if args.files < len(CORE_FILES):
+        print(f"Error: At least {len(CORE_FILES)} files must be generated", file=sys.stderr)
+        sys.exit(1)
+
+    output_dir = Path(args.output_dir)
+    total_bytes = write_corpus(output_dir, args.files, args.seed)
+    print(f"Generated {args.files} files ({total_bytes // 1024} KB) in {output_dir}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Incremental File Indexer
+
+Base of index_il.py and index_content.py, which parse the files under a directory into an
+SQLite database. The files are parsed in parallel processes, the largest first. Unchanged
+files (same size and modification time) are not parsed again, unless rebuilding. The rows
+of the deleted files are removed.
+
+A subclass gives the schema, the files to index, the parse worker and how to store and
+delete the rows of a file.
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from multiprocessing import Pool, cpu_count
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+
+class IncrementalIndexer:
+    """Indexes the files under a directory into an SQLite database, parsing only the changed ones"""
+
+    DATABASE_NAME = ''
+    # Singular name of the indexed files and of the rows parsed from them, for the messages
+    FILE_KIND = ''
+    ROW_KIND = ''
+    # Table of the indexed files (id, path, size, mtime_ns) and the table counted for the summary
+    FILES_TABLE = ''
+    ROWS_TABLE = ''
+    # Creates the tables and indexes of the rows, run on every open
+    SCHEMA = ''
+    # Print a line for every parsed file
+    PRINT_FILES = False
+    # Module level function parsing a file, returns (path, rows, error), the error is None if the file parsed
+    parse_worker: Callable[[str], Tuple[str, List[tuple], Optional[str]]]
+
+    def __init__(self, root_path: str, database_path: Path, num_workers: Optional[int] = None):
+        self.root_path = Path(root_path).resolve()
+        self.database_path = database_path
+        self.num_workers = num_workers or cpu_count()
+
+    def find_files(self) -> List[Path]:
+        """Return the files to index under the root directory"""
+        raise NotImplementedError
+
+    def _delete_rows(self, connection: sqlite3.Connection, file_id: int):
+        """Delete the rows parsed from a file"""
+        raise NotImplementedError
+
+    def _insert_rows(self, connection: sqlite3.Connection, file_id: int, rows: List[tuple]):
+        """Insert the rows parsed from a file"""
+        raise NotImplementedError
+
+    def _open_database(self, rebuild: bool) -> sqlite3.Connection:
+        """Open the database, it is recreated if rebuilding or the root directory moved"""
+        # The file paths are relative to the root directory, which is relative to the database
+        root = os.path.relpath(self.root_path, self.database_path.resolve().parent)
+        if self.database_path.exists() and not rebuild:
+            connection = sqlite3.connect(str(self.database_path))
+            try:
+                row = connection.execute("SELECT value FROM meta WHERE key = 'root'").fetchone()
+            except sqlite3.Error:
+                row = None
+            connection.close()
+            rebuild = row is None or row[0] != root
+        if rebuild and self.database_path.exists():
+            self.database_path.unlink()
+
+        connection = sqlite3.connect(str(self.database_path))
+        connection.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+        connection.execute("INSERT OR REPLACE INTO meta VALUES ('root', ?)", (root,))
+        connection.execute(f'CREATE TABLE IF NOT EXISTS {self.FILES_TABLE} ('
+                           'id INTEGER PRIMARY KEY, path TEXT UNIQUE, size INTEGER, mtime_ns INTEGER)')
+        connection.executescript(self.SCHEMA)
+        return connection
+
+    def _find_stale_files(self, connection: sqlite3.Connection, files: List[Path]) -> List[Path]:
+        """Return the new and changed files, forget the deleted ones along with their rows"""
+        known = {path: (file_id, size, mtime_ns) for file_id, path, size, mtime_ns
+                 in connection.execute(f'SELECT id, path, size, mtime_ns FROM {self.FILES_TABLE}')}
+
+        stale_files = []
+        for path in files:
+            stat = path.stat()
+            previous = known.pop(path.relative_to(self.root_path).as_posix(), None)
+            if previous is None or previous[1:] != (stat.st_size, stat.st_mtime_ns):
+                stale_files.append(path)
+
+        for file_id, _, _ in known.values():
+            self._delete_file(connection, file_id)
+        return stale_files
+
+    def _delete_file(self, connection: sqlite3.Connection, file_id: int):
+        self._delete_rows(connection, file_id)
+        connection.execute(f'DELETE FROM {self.FILES_TABLE} WHERE id = ?', (file_id,))
+
+    def _store_file(self, connection: sqlite3.Connection, path: Path, rows: List[tuple]):
+        """Replace the rows of a file in the database"""
+        relative_path = path.relative_to(self.root_path).as_posix()
+        row = connection.execute(f'SELECT id FROM {self.FILES_TABLE} WHERE path = ?', (relative_path,)).fetchone()
+        if row is not None:
+            self._delete_file(connection, row[0])
+
+        stat = path.stat()
+        file_id = connection.execute(f'INSERT INTO {self.FILES_TABLE} (path, size, mtime_ns) VALUES (?, ?, ?)',
+                                     (relative_path, stat.st_size, stat.st_mtime_ns)).lastrowid
+        self._insert_rows(connection, file_id, rows)
+
+    def index(self, rebuild: bool = False) -> int:
+        """Index the changed files, returns the number of files parsed"""
+        files = self.find_files()
+        print(f"Found {len(files)} {self.FILE_KIND}s to index...")
+
+        connection = self._open_database(rebuild)
+        try:
+            stale_files = self._find_stale_files(connection, files)
+            print(f"{self.FILE_KIND[:1].upper()}{self.FILE_KIND[1:]}s changed since the last run: {len(stale_files)}")
+
+            # The largest files first, so the workers finish at about the same time
+            stale_files.sort(key=lambda path: path.stat().st_size, reverse=True)
+            row_count = 0
+            if stale_files:
+                with Pool(processes=min(self.num_workers, len(stale_files))) as pool:
+                    for path, rows, error in pool.imap_unordered(
+                            type(self).parse_worker, [str(path) for path in stale_files]):
+                        relative_path = Path(path).relative_to(self.root_path)
+                        if error is not None:
+                            print(f"Warning: Failed to parse {relative_path}, indexed only the {len(rows)} "
+                                  f"{self.ROW_KIND}s before the error: {error}", file=sys.stderr)
+                        self._store_file(connection, Path(path), rows)
+                        row_count += len(rows)
+                        if self.PRINT_FILES:
+                            print(f"Indexed {len(rows)} {self.ROW_KIND}s in {relative_path}")
+
+            connection.commit()
+            total = connection.execute(f'SELECT COUNT(*) FROM {self.ROWS_TABLE}').fetchone()[0]
+            print(f"Index written to {self.database_path}: {total} {self.ROW_KIND}s ({row_count} parsed now)")
+        finally:
+            connection.close()
+        return len(stale_files)
+
+
+def main(indexer_class: type, description: str, root_name: str, root_help: str):
+    """Command line of an indexer, root_name names the indexed directory in the errors (Content directory)"""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('root_dir', metavar=root_name.lower().replace(' ', '_'), help=root_help)
+    parser.add_argument('output_dir', help=f'Directory to write {indexer_class.DATABASE_NAME} into')
+    parser.add_argument('--rebuild', action='store_true',
+                        help=f'Index every {indexer_class.FILE_KIND} again, even if unchanged')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Number of worker processes (default: number of CPU cores)')
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.root_dir):
+        print(f"Error: {root_name} '{args.root_dir}' not found", file=sys.stderr)
+        sys.exit(1)
+
+    if args.workers is not None and args.workers < 1:
+        print("Error: The number of workers must be positive", file=sys.stderr)
+        sys.exit(1)
+
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    start_time = time.perf_counter()
+    indexer_class(args.root_dir, output_dir / indexer_class.DATABASE_NAME, args.workers).index(args.rebuild)
+    print(f"Completed in {time.perf_counter() - start_time:.1f} seconds")
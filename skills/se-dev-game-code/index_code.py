@@ -5,22 +5,73 @@ C# Codebase Indexer
 This script recursively indexes C# source files in a directory structure, creating CSV files
 with declarations and usages of namespaces, interfaces, classes, methods, and member variables.
 
+Unchanged files are not parsed again: a manifest of per-file content hashes and extracted
+entries is kept next to the CSV files, so re-indexing after a game update only parses the
+files which changed, and resolves usages again only in files referencing the affected names.
+
+Member accesses like entity.GetPosition() are indexed as usages of the member in the type declaring
+it, the type of the receiver being inferred from the declared types of locals, fields, properties
+and method return types, and from new expressions and casts.
+
+The method declarations have a signature column with the modifiers, return type, containing type path,
+type parameters and parameter types, so the overloads of a method can be told apart by searching.
+
+Each file is parsed only once by default: pass 1 records the identifier occurrences along with
+the declarations, then the workers resolve them in pass 2 against the merged declarations. The
+--two-pass option parses the files again in pass 2 instead of keeping the occurrences.
+
+The --sqlite option also writes all entries into a single index.sqlite database with B-tree indexes
+on the symbol columns and full text search on the descriptions, which search_code.py uses if present.
+
+Sorted key files are written into the keys folder next to the CSV files for the most queried columns,
+mapping each value to the byte offsets of its rows, so search_code.py can look up exact column values
+with a binary search instead of scanning the CSV file. Trigram files next to them narrow down the
+values to check for substring and regex searches in these columns.
+
+The method declarations and usages are also written as a caller to callee graph into callgraph.sqlite,
+which search_calls.py walks to list the callers and callees of a method or the call paths between two.
+The base types of the type declarations are written into hierarchy.sqlite along with their transitive
+closure, which search_hierarchy.py looks up to list all subtypes or supertypes of a type.
+
+The MyObjectBuilder_* class declarations, the types with attributes naming an object builder, like
+[MyCubeBlockType(typeof(MyObjectBuilder_Thrust))], and the element types of the definition containers
+of MyObjectBuilder_Definitions are written into objectbuilders.sqlite, which search_content.py joins
+with the content definitions to list the classes behind a TypeId.
+
 Usage:
-    python index_code.py <source_root_path> <output_directory>
+    python index_code.py [--rebuild] [--two-pass] [--sqlite] [--memory-budget MB] [--workers N] [--batch-bytes BYTES]
+                         [--profile REPORT_JSON] <source_root_path> <output_directory>
 """
 
+import argparse
 import csv
+import hashlib
+import heapq
+import json
 import os
-import random
+import pickle
+import shutil
+import sqlite3
 import sys
+import tempfile
+import time
+from array import array
+from collections import deque
+from contextlib import contextmanager
 from dataclasses import dataclass, field
 from multiprocessing import Pool, cpu_count
 from pathlib import Path
-from typing import Dict, List, Optional, Set, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
-from tree_sitter import Language, Parser, Node
+from tree_sitter import Language, Node, Parser, Query, QueryCursor, QueryError
 from tree_sitter_c_sharp import language
 
+# Peak memory usage for the --profile report, not available on Windows
+try:
+    import resource
+except ImportError:
+    resource = None
+
 
 @dataclass
 class IndexEntry:
@@ -34,6 +85,9 @@ class IndexEntry:
     start_line: int
     end_line: int
     description: str
+    # Method declarations only, see FileProcessor._get_method_signature(). The column is empty but kept in
+    # the other index files, so all of them, the 'all' search and the SQLite entries table share one layout
+    signature: str = ''
 
     def to_csv_row(self) -> List[str]:
         """Convert to CSV row format"""
@@ -46,7 +100,8 @@ class IndexEntry:
             self.file_path,
             str(self.start_line),
             str(self.end_line),
-            self.description
+            self.description,
+            self.signature
         ]
 
     @staticmethod
@@ -61,20 +116,154 @@ class IndexEntry:
             'file_path',
             'start_line',
             'end_line',
-            'description'
+            'description',
+            'signature'
         ]
 
 
+class StringTable:
+    """Dictionary encoding of strings, each distinct string is stored once and referenced by its id"""
+
+    def __init__(self, strings: Optional[List[str]] = None):
+        self.strings: List[str] = strings if strings is not None else []
+        self.ids: Dict[str, int] = {string: i for i, string in enumerate(self.strings)}
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+    def intern(self, string: str) -> int:
+        """Return the id of the string, adding it to the table if missing"""
+        string_id = self.ids.get(string)
+        if string_id is None:
+            string_id = self.ids[string] = len(self.strings)
+            self.strings.append(string)
+        return string_id
+
+    def translation_from(self, other: 'StringTable') -> List[int]:
+        """Return the ids in this table of all the strings in the other table, indexed by their id there"""
+        intern = self.intern
+        return [intern(string) for string in other.strings]
+
+    def sort_ranks(self) -> List[int]:
+        """Return the rank of each string in sorted order, indexed by the string id"""
+        ranks = [0] * len(self.strings)
+        for rank, string_id in enumerate(sorted(range(len(self.strings)), key=self.strings.__getitem__)):
+            ranks[string_id] = rank
+        return ranks
+
+    def __getstate__(self):
+        return self.strings
+
+    def __setstate__(self, strings: List[str]):
+        self.__init__(strings)
+
+
+class EntryColumns:
+    """Columnar batch of index entries
+
+    Each IndexEntry field is an array column. The string fields hold ids in a string table, which
+    is shared by all batches of a file (or of a whole index), so the memory use and the pickled size
+    depend on the number of distinct strings instead of being repeated in every row.
+    """
+
+    # Positions of the string columns in the IndexEntry field order
+    STRING_COLUMNS = (0, 1, 2, 3, 4, 5, 8, 9)
+
+    def __init__(self, strings: StringTable):
+        self.strings = strings
+        self.columns: List[array] = [array('I') for _ in range(10)]
+
+    def __len__(self) -> int:
+        return len(self.columns[0])
+
+    def add(self, namespace: str, containing_type: str, method: str, variable_name: str, entry_type: str,
+            file_path: str, start_line: int, end_line: int, description: str, signature: str = ''):
+        """Append an entry"""
+        intern = self.strings.intern
+        columns = self.columns
+        columns[0].append(intern(namespace))
+        columns[1].append(intern(containing_type))
+        columns[2].append(intern(method))
+        columns[3].append(intern(variable_name))
+        columns[4].append(intern(entry_type))
+        columns[5].append(intern(file_path))
+        columns[6].append(start_line)
+        columns[7].append(end_line)
+        columns[8].append(intern(description))
+        columns[9].append(intern(signature))
+
+    def extend(self, other: 'EntryColumns'):
+        """Append all entries of another batch, translating its string ids into this batch's table"""
+        if other.strings is self.strings:
+            for column, other_column in zip(self.columns, other.columns):
+                column.extend(other_column)
+            return
+
+        translate = self.strings.translation_from(other.strings).__getitem__
+        for i, (column, other_column) in enumerate(zip(self.columns, other.columns)):
+            if i in self.STRING_COLUMNS:
+                column.extend(map(translate, other_column))
+            else:
+                column.extend(other_column)
+
+    def sort(self):
+        """Sort the entries by all fields left to right
+
+        Implemented as stable sorts of a row permutation from the last field to the first,
+        comparing string ids by their rank, so no per-row key tuples are built.
+        """
+        ranks = self.strings.sort_ranks()
+        order = list(range(len(self)))
+        for i in reversed(range(10)):
+            column = self.columns[i]
+            if i in self.STRING_COLUMNS:
+                order.sort(key=lambda row: ranks[column[row]])
+            else:
+                order.sort(key=column.__getitem__)
+        self.columns = [array('I', map(column.__getitem__, order)) for column in self.columns]
+
+    def rows(self) -> Iterator[tuple]:
+        """Yield the entries as tuples in IndexEntry field order"""
+        strings = self.strings.strings
+        namespaces, containing_types, methods, variable_names, entry_types, file_paths, \
+            start_lines, end_lines, descriptions, signatures = self.columns
+        for i in range(len(self)):
+            yield (
+                strings[namespaces[i]],
+                strings[containing_types[i]],
+                strings[methods[i]],
+                strings[variable_names[i]],
+                strings[entry_types[i]],
+                strings[file_paths[i]],
+                start_lines[i],
+                end_lines[i],
+                strings[descriptions[i]],
+                strings[signatures[i]]
+            )
+
+    def __getstate__(self):
+        return self.strings, self.columns
+
+    def __setstate__(self, state):
+        self.strings, self.columns = state
+
+
 @dataclass
 class FileProcessingResult:
-    """Results from processing a single file"""
-    namespace_entries: List[IndexEntry] = field(default_factory=list)
-    interface_entries: List[IndexEntry] = field(default_factory=list)
-    class_entries: List[IndexEntry] = field(default_factory=list)
-    struct_entries: List[IndexEntry] = field(default_factory=list)
-    enum_entries: List[IndexEntry] = field(default_factory=list)
-    method_entries: List[IndexEntry] = field(default_factory=list)
-    variable_entries: List[IndexEntry] = field(default_factory=list)
+    """Results from processing a single file
+
+    The entries of all categories and the occurrences share a single string table,
+    so the file path and the context strings repeated in every row are stored once.
+    """
+    strings: StringTable = field(default_factory=StringTable)
+
+    namespace_entries: EntryColumns = field(init=False)
+    interface_entries: EntryColumns = field(init=False)
+    class_entries: EntryColumns = field(init=False)
+    struct_entries: EntryColumns = field(init=False)
+    enum_entries: EntryColumns = field(init=False)
+    method_entries: EntryColumns = field(init=False)
+    variable_entries: EntryColumns = field(init=False)
 
     # Declared names found in this file (for building shared state after pass 1)
     declared_namespaces: Set[str] = field(default_factory=set)
@@ -83,34 +272,461 @@ class FileProcessingResult:
     declared_structs: Dict[str, Set[tuple]] = field(default_factory=dict)
     declared_enums: Dict[str, Set[tuple]] = field(default_factory=dict)
     declared_methods: Dict[str, Set[tuple]] = field(default_factory=dict)
+    declared_variables: Dict[str, Set[tuple]] = field(default_factory=dict)
+
+    # (containing type, member) => type name of the fields, properties and method return types
+    declared_member_types: Dict[tuple, str] = field(default_factory=dict)
+
+    # (namespace, name, kind, file path, start line, bases) of the type declarations in this file, the
+    # bases are the (qualifier, name) pairs of the base list as written, for building the type hierarchy
+    type_bases: List[tuple] = field(default_factory=list)
+
+    # (object builder, attribute, namespace, name, kind, file path, start line) of the type declarations
+    # with attributes taking typeof(MyObjectBuilder_*) arguments, like [MyDefinitionType(...)]
+    type_attributes: List[tuple] = field(default_factory=list)
+
+    # (member, object builder) of the definition containers of MyObjectBuilder_Definitions,
+    # the member name being the element name of the container in the content files
+    definition_members: List[tuple] = field(default_factory=list)
+
+    # Identifier occurrences recorded in pass 1 in single parse mode, so pass 2 does not have to parse
+    # the file again. Flat array of (name, start_line, end_line, namespace, containing_type, method,
+    # start_byte, receiver) records, the strings are ids in the string table. The receiver of a member
+    # access is encoded by FileProcessor._get_receiver(), it is empty for a simple name.
+    occurrences: array = field(default_factory=lambda: array('I'))
+
+    # Locals, parameters and other names declared inside a member, as a flat array of
+    # (name, scope start byte, scope end byte, type name) records
+    local_names: array = field(default_factory=lambda: array('I'))
+
+    # Identifier names checked against the declarations in pass 2 (for incremental re-indexing)
+    referenced_names: Set[str] = field(default_factory=set)
+
+    def __post_init__(self):
+        self.namespace_entries = EntryColumns(self.strings)
+        self.interface_entries = EntryColumns(self.strings)
+        self.class_entries = EntryColumns(self.strings)
+        self.struct_entries = EntryColumns(self.strings)
+        self.enum_entries = EntryColumns(self.strings)
+        self.method_entries = EntryColumns(self.strings)
+        self.variable_entries = EntryColumns(self.strings)
+
+    def entry_lists(self) -> List[EntryColumns]:
+        """Return the entries of all categories in index file order"""
+        return [
+            self.namespace_entries,
+            self.interface_entries,
+            self.class_entries,
+            self.struct_entries,
+            self.enum_entries,
+            self.method_entries,
+            self.variable_entries
+        ]
+
+    def to_record(self) -> bytes:
+        """Serialize into a manifest record using only plain Python types"""
+        return pickle.dumps((
+            self.entry_lists(),
+            self.declared_namespaces,
+            self.declared_interfaces,
+            self.declared_classes,
+            self.declared_structs,
+            self.declared_enums,
+            self.declared_methods,
+            self.declared_variables,
+            self.declared_member_types,
+            self.type_bases,
+            self.type_attributes,
+            self.definition_members
+        ), pickle.HIGHEST_PROTOCOL)
+
+
+def _hash_file(file_path: Path) -> str:
+    """Hash the content of a source file"""
+    with open(file_path, 'rb') as f:
+        return hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+
+
+def _changed_declaration_names(old: Dict, new: Dict) -> Set[str]:
+    """Return the names whose set of declarations differs between two shared declaration tables"""
+    changed = set(old['namespaces'] ^ new['namespaces'])
+    for category in ('interfaces', 'classes', 'structs', 'enums', 'methods', 'variables', 'bases'):
+        old_table = old[category]
+        new_table = new[category]
+        for name in old_table.keys() | new_table.keys():
+            if old_table.get(name) != new_table.get(name):
+                changed.add(name)
+
+    # The usages of the members of a type are found through the type names visited while resolving
+    old_types = old['member_types']
+    new_types = new['member_types']
+    for key in old_types.keys() | new_types.keys():
+        if old_types.get(key) != new_types.get(key):
+            changed.update(key)
+    return changed
+
+
+class IndexManifest:
+    """Persistent per-file content hashes and extracted entries for incremental re-indexing
+
+    Stored as an SQLite database. Each indexed file has a row with its size, modification time,
+    content hash, the pass 1 result (declarations), the identifier occurrences recorded in single
+    parse mode and the pass 2 result (usages). The merged declaration table of the last run is kept
+    as well, so the names whose declarations changed can be determined. All modifications of a run
+    are committed at once by save().
+
+    The indexer settings affecting the stored results are kept in the manifest. If they differ
+    from the current ones, then the manifest is discarded and all files are indexed again.
+    """
+
+    VERSION = 8
+
+    def __init__(self, path: Optional[Path] = None, rebuild: bool = False, settings: Optional[Dict] = None):
+        self.path = path
+        self.connection = sqlite3.connect(':memory:' if path is None else str(path))
+        self.connection.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value BLOB)')
+
+        settings = settings or {}
+        if rebuild or self.get_meta('version') != self.VERSION or self.get_meta('settings') != settings:
+            self.connection.execute('DROP TABLE IF EXISTS files')
+            self.connection.execute('DELETE FROM meta')
+
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS files ('
+            'path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, content_hash TEXT, '
+            'declarations BLOB, occurrences BLOB, usages BLOB, referenced_names BLOB)'
+        )
+        self.set_meta('version', self.VERSION)
+        self.set_meta('settings', settings)
+
+    def get_meta(self, key: str):
+        """Return a pickled value from the meta table or None if it is missing"""
+        row = self.connection.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return None if row is None else pickle.loads(row[0])
+
+    def set_meta(self, key: str, value):
+        """Store a pickled value into the meta table"""
+        self.connection.execute(
+            'INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)',
+            (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+        )
+
+    def find_stale_files(self, files: List[Path], root_path: Path, forget_missing: bool = True) -> List[Path]:
+        """Return the files which are new or have changed content, forget the deleted files
+
+        If forget_missing is false, then the files are only a part of the source tree and
+        the known files missing from them are kept, see forget_files_except().
+        """
+        known = {
+            path: (size, mtime_ns, content_hash)
+            for path, size, mtime_ns, content_hash
+            in self.connection.execute('SELECT path, size, mtime_ns, content_hash FROM files')
+        }
+
+        stale_files = []
+        for file_path in files:
+            relative_path = str(file_path.relative_to(root_path))
+            stat = file_path.stat()
+            previous = known.pop(relative_path, None)
+
+            if previous is not None and previous[:2] == (stat.st_size, stat.st_mtime_ns):
+                continue
+
+            # Rewritten with the same content (like a re-decompiled assembly), only the stat changed
+            content_hash = _hash_file(file_path)
+            if previous is not None and previous[2] == content_hash:
+                self.connection.execute(
+                    'UPDATE files SET size = ?, mtime_ns = ? WHERE path = ?',
+                    (stat.st_size, stat.st_mtime_ns, relative_path)
+                )
+                continue
+
+            self.connection.execute(
+                'INSERT OR REPLACE INTO files (path, size, mtime_ns, content_hash) VALUES (?, ?, ?, ?)',
+                (relative_path, stat.st_size, stat.st_mtime_ns, content_hash)
+            )
+            stale_files.append(file_path)
+
+        if forget_missing:
+            self.connection.executemany('DELETE FROM files WHERE path = ?', [(path,) for path in known])
+        return stale_files
+
+    def forget_files_except(self, relative_paths: Set[str]):
+        """Forget the deleted files, which are all the known files except the given ones"""
+        deleted = [(path,) for (path,) in self.connection.execute('SELECT path FROM files') if path not in relative_paths]
+        self.connection.executemany('DELETE FROM files WHERE path = ?', deleted)
+
+    def store_declarations(self, relative_path: str, result: FileProcessingResult):
+        """Store the pass 1 result of a file, including the identifier occurrences if recorded"""
+        self.connection.execute(
+            'UPDATE files SET declarations = ?, occurrences = ? WHERE path = ?',
+            (result.to_record(),
+             pickle.dumps((result.strings, result.occurrences, result.local_names), pickle.HIGHEST_PROTOCOL),
+             relative_path)
+        )
+
+    def store_usages(self, relative_path: str, result: FileProcessingResult):
+        """Store the pass 2 result of a file"""
+        self.connection.execute(
+            'UPDATE files SET usages = ?, referenced_names = ? WHERE path = ?',
+            (result.to_record(), pickle.dumps(result.referenced_names, pickle.HIGHEST_PROTOCOL), relative_path)
+        )
+
+    def iter_declarations(self):
+        """Yield the declared names of all files as pass 1 results without their entries"""
+        for (record,) in self.connection.execute('SELECT declarations FROM files WHERE declarations IS NOT NULL'):
+            (_, namespaces, interfaces, classes, structs, enums, methods, variables, member_types,
+             type_bases, type_attributes, definition_members) = pickle.loads(record)
+            yield FileProcessingResult(
+                declared_namespaces=namespaces,
+                declared_interfaces=interfaces,
+                declared_classes=classes,
+                declared_structs=structs,
+                declared_enums=enums,
+                declared_methods=methods,
+                declared_variables=variables,
+                declared_member_types=member_types,
+                type_bases=type_bases,
+                type_attributes=type_attributes,
+                definition_members=definition_members
+            )
+
+    # Number of paths looked up by a single query, below the SQLite limit of host parameters
+    PATH_CHUNK_SIZE = 500
+
+    def _select_paths(self, columns: str, relative_paths: Iterable[str]) -> Iterator[tuple]:
+        """Yield the selected columns of the given files having occurrences, queried in chunks of paths"""
+        relative_paths = list(relative_paths)
+        for start in range(0, len(relative_paths), self.PATH_CHUNK_SIZE):
+            chunk = relative_paths[start:start + self.PATH_CHUNK_SIZE]
+            yield from self.connection.execute(
+                f"SELECT {columns} FROM files WHERE path IN ({', '.join('?' * len(chunk))}) "
+                f"AND occurrences IS NOT NULL", chunk
+            ).fetchall()
+
+    def occurrence_sizes(self, relative_paths: Iterable[str]) -> List[Tuple[int, str]]:
+        """Return the (record size, relative path) pairs of the occurrences of the given files"""
+        return [(size, relative_path)
+                for relative_path, size in self._select_paths('path, length(occurrences)', relative_paths)]
+
+    def iter_occurrences(self, relative_paths: Iterable[str]) -> Iterator[Tuple[str, bytes]]:
+        """Yield the (relative path, pickled (string table, occurrences, local names)) pairs of the given files"""
+        yield from self._select_paths('path, occurrences', relative_paths)
+
+    def iter_entry_columns(self, column: str):
+        """Yield the entries of all files by category from the 'declarations' or 'usages' records"""
+        for (record,) in self.connection.execute(f'SELECT {column} FROM files WHERE {column} IS NOT NULL'):
+            yield pickle.loads(record)[0]
+
+    def find_files_referencing(self, names: Set[str]) -> List[str]:
+        """Return the files whose pass 2 result has been resolved against any of the given names"""
+        relative_paths = []
+        for relative_path, record in self.connection.execute('SELECT path, referenced_names FROM files'):
+            if record is None or not names.isdisjoint(pickle.loads(record)):
+                relative_paths.append(relative_path)
+        return relative_paths
+
+    def save(self):
+        """Commit all changes made during this run"""
+        self.connection.commit()
+
+    def close(self):
+        """Close the database, discarding any changes not saved"""
+        self.connection.close()
+
+
+# File processor of the worker process, created once by the pool initializer
+_worker_processor: Optional['FileProcessor'] = None
+
+# Path of the shared declarations file the worker's resolver was loaded from
+_worker_declarations_path: Optional[str] = None
+
+
+def _init_worker(root_path: str):
+    """Pool initializer, creates the file processor once per worker process"""
+    global _worker_processor
+
+    _worker_processor = FileProcessor(root_path)
+
+
+def _load_worker_resolver(declarations_path: str):
+    """Load the shared declarations into the worker's resolver, only once per worker process"""
+    global _worker_declarations_path
+
+    if _worker_declarations_path == declarations_path:
+        return
+
+    with open(declarations_path, 'rb') as f:
+        _worker_processor.resolver = UsageResolver(pickle.load(f))
+    _worker_declarations_path = declarations_path
 
 
-def _process_batch_worker(args: Tuple) -> List[FileProcessingResult]:
-    """Worker function to process a batch of files in a subprocess"""
-    file_paths, root_path, collect_usages, shared_declarations = args
+def _resolve_batch_worker(args: Tuple) -> Tuple[List[Tuple[str, FileProcessingResult]], Optional[Dict]]:
+    """Worker function to resolve the occurrences recorded in pass 1 of a batch of files in a subprocess
 
-    # Increase recursion limit for deeply nested code (default is 1000)
-    sys.setrecursionlimit(10000)
+    Returns the (relative path, result) pairs and the batch statistics like _process_batch_worker.
+    """
+    records, declarations_path, profile = args
 
-    processor = FileProcessor(root_path)
+    start_time = time.perf_counter()
+    _load_worker_resolver(declarations_path)
+    resolver = _worker_processor.resolver
 
-    if collect_usages and shared_declarations:
+    results = []
+    file_timings = []
+    for relative_path, record in records:
+        file_start_time = time.perf_counter()
+        strings, occurrences, local_names = pickle.loads(record)
+        result = FileProcessingResult(strings)
+        try:
+            resolver.resolve(relative_path, occurrences, local_names, result)
+        except Exception as e:
+            print(f"Error resolving the usages of {relative_path}: {e}", file=sys.stderr)
+            result = FileProcessingResult()
+        results.append((relative_path, result))
+        file_timings.append((relative_path, 0.0, time.perf_counter() - file_start_time))
+
+    if not profile:
+        return results, None
+
+    return results, {
+        'pid': os.getpid(),
+        'busy_seconds': time.perf_counter() - start_time,
+        'files': file_timings,
+        'result_bytes': len(pickle.dumps(results, pickle.HIGHEST_PROTOCOL)),
+        'peak_rss_bytes': _peak_rss_bytes(),
+    }
+
+
+def _peak_rss_bytes() -> Optional[int]:
+    """Return the peak resident memory of the current process, None if not available"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _process_batch_worker(args: Tuple) -> Tuple[List[Tuple[str, FileProcessingResult]], Optional[Dict]]:
+    """Worker function to process a batch of files in a subprocess
+
+    Returns the (relative path, result) pairs, and the batch statistics for the profile
+    report if profiling, otherwise None.
+    """
+    file_paths, collect_usages, record_occurrences, declarations_path, profile = args
+
+    processor = _worker_processor
+    start_time = time.perf_counter()
+    processor.file_timings = [] if profile else None
+
+    if collect_usages and declarations_path:
         # Pass 2: use shared declarations
-        processor.declared_namespaces = shared_declarations['namespaces']
-        processor.declared_interfaces = shared_declarations['interfaces']
-        processor.declared_classes = shared_declarations['classes']
-        processor.declared_structs = shared_declarations['structs']
-        processor.declared_enums = shared_declarations['enums']
-        processor.declared_methods = shared_declarations['methods']
+        _load_worker_resolver(declarations_path)
 
     results = []
     for file_path in file_paths:
+        relative_path = str(file_path.relative_to(processor.root_path))
         try:
-            results.append(processor.process_file(file_path, collect_usages))
+            results.append((relative_path, processor.process_file(file_path, collect_usages, record_occurrences)))
         except Exception as e:
             print(f"Error processing {file_path}: {e}", file=sys.stderr)
-            results.append(FileProcessingResult())
-    return results
+            results.append((relative_path, FileProcessingResult()))
+
+    if not profile:
+        return results, None
+
+    stats = {
+        'pid': os.getpid(),
+        'busy_seconds': time.perf_counter() - start_time,
+        'files': processor.file_timings,
+        'result_bytes': len(pickle.dumps(results, pickle.HIGHEST_PROTOCOL)),
+        'peak_rss_bytes': _peak_rss_bytes(),
+    }
+    processor.file_timings = None
+    return results, stats
+
+
+TYPE_DECLARATION_TYPES = ('interface_declaration', 'class_declaration', 'struct_declaration',
+                          'record_declaration', 'enum_declaration')
+METHOD_DECLARATION_TYPES = ('method_declaration', 'constructor_declaration')
+
+# Prefix of the object builder classes, which the TypeIds of the content definitions are named after
+OBJECT_BUILDER_PREFIX = 'MyObjectBuilder_'
+
+# Root object builder of the content files, its members are the definition containers
+DEFINITIONS_OBJECT_BUILDER = 'MyObjectBuilder_Definitions'
+
+# Declarations producing entries or changing the namespace, type or method context
+DECLARATION_QUERY = '\n'.join(
+    f'({node_type}) @declaration'
+    for node_type in ('file_scoped_namespace_declaration', 'namespace_declaration') + TYPE_DECLARATION_TYPES +
+    METHOD_DECLARATION_TYPES + ('field_declaration', 'property_declaration')
+)
+
+# Identifiers which are a child or grandchild of these nodes are part of declarations, not usages
+NON_USAGE_PARENT_TYPES = (
+    'namespace_declaration',
+    'interface_declaration',
+    'class_declaration',
+    'struct_declaration',
+    'record_declaration',
+    'enum_declaration',
+    'method_declaration',
+    'constructor_declaration',
+    'field_declaration',
+    'property_declaration',
+    'variable_declaration',
+    'parameter',
+    'type_parameter',
+    'using_directive',
+    'qualified_name'
+)
+
+# Names declared inside a member, which hide the members of the same name within their scope
+LOCAL_DECLARATION_PATTERNS = [
+    '(variable_declarator name: (identifier) @local)',
+    '(parameter name: (identifier) @local)',
+    '(implicit_parameter) @local',
+    '(foreach_statement left: (identifier) @local)',
+    '(tuple_pattern name: (identifier) @local)',
+    '(catch_declaration name: (identifier) @local)',
+    '(declaration_pattern name: (identifier) @local)',
+    '(declaration_expression name: (identifier) @local)',
+    '(from_clause name: (identifier) @local)',
+    '(let_clause . (identifier) @local)',
+    '(local_function_statement name: (identifier) @local)',
+]
+
+# Nodes limiting the scope of the local names declared in them
+LOCAL_SCOPE_TYPES = frozenset((
+    'block', 'for_statement', 'foreach_statement', 'using_statement', 'fixed_statement', 'catch_clause',
+    'switch_section', 'lambda_expression', 'anonymous_method_expression', 'local_function_statement',
+    'query_expression', 'arrow_expression_clause', 'method_declaration', 'constructor_declaration',
+    'accessor_declaration', 'operator_declaration', 'conversion_operator_declaration', 'indexer_declaration',
+))
+
+# Declarations ending the search for the scope of a local name, which is then a member name
+NON_LOCAL_SCOPE_TYPES = frozenset(TYPE_DECLARATION_TYPES + ('field_declaration', 'event_field_declaration'))
+
+# All identifiers, the ones which are not usages as excluded and the local declarations
+IDENTIFIER_PATTERNS = (
+    ['(identifier) @identifier'] +
+    [f'({node_type} (identifier) @excluded)' for node_type in NON_USAGE_PARENT_TYPES] +
+    [f'({node_type} (_ (identifier) @excluded))' for node_type in NON_USAGE_PARENT_TYPES] +
+    ['(variable_declarator name: (identifier) @excluded)'] +
+    LOCAL_DECLARATION_PATTERNS
+)
+
+
+def _compile_query(tree_sitter_language: Language, patterns: List[str]) -> Query:
+    """Compile the patterns into a query, leaving out the ones the grammar can never match"""
+    possible_patterns = []
+    for pattern in patterns:
+        try:
+            Query(tree_sitter_language, pattern)
+        except QueryError:
+            continue
+        possible_patterns.append(pattern)
+    return Query(tree_sitter_language, '\n'.join(possible_patterns))
 
 
 class FileProcessor:
@@ -121,16 +737,35 @@ class FileProcessor:
         self.parser = Parser()
         self.parser.language = Language(language())
 
-        # Track declared names for each category to detect usages
-        self.declared_namespaces: Set[str] = set()
-        self.declared_interfaces: Dict[str, Set[tuple]] = {}
-        self.declared_classes: Dict[str, Set[tuple]] = {}
-        self.declared_structs: Dict[str, Set[tuple]] = {}
-        self.declared_enums: Dict[str, Set[tuple]] = {}
-        self.declared_methods: Dict[str, Set[tuple]] = {}
+        # Resolves the identifier occurrences against the declared names in pass 2
+        self.resolver: Optional[UsageResolver] = None
+
+        # (relative path, parse seconds, extraction seconds) of the processed files, if profiling
+        self.file_timings: Optional[List[Tuple[str, float, float]]] = None
+
+        self.declaration_query = Query(self.parser.language, DECLARATION_QUERY)
+        self.identifier_query = _compile_query(self.parser.language, IDENTIFIER_PATTERNS)
+        self.processors = {
+            'file_scoped_namespace_declaration': self._process_file_scoped_namespace,
+            'namespace_declaration': self._process_namespace,
+            'interface_declaration': self._process_interface,
+            'class_declaration': self._process_class,
+            'struct_declaration': self._process_struct,
+            'enum_declaration': self._process_enum,
+            'record_declaration': self._process_class,
+            'method_declaration': self._process_method,
+            'constructor_declaration': self._process_method,
+            'field_declaration': self._process_field,
+            'property_declaration': self._process_property,
+        }
 
-    def process_file(self, file_path: Path, collect_usages: bool) -> FileProcessingResult:
-        """Process a single C# file and return results"""
+    def process_file(self, file_path: Path, collect_usages: bool, record_occurrences: bool = False) -> FileProcessingResult:
+        """Process a single C# file and return results
+
+        Pass 1 (collect_usages=False) extracts the declarations. If record_occurrences is set, then it
+        also records the identifier occurrences, so the usages can be resolved later without parsing
+        the file again. Pass 2 (collect_usages=True) resolves the usages using the resolver.
+        """
         result = FileProcessingResult()
 
         try:
@@ -140,7 +775,9 @@ class FileProcessor:
             with open(file_path, 'r', encoding='latin-1') as f:
                 source_code = f.read()
 
+        parse_start = time.perf_counter()
         tree = self.parser.parse(bytes(source_code, 'utf-8'))
+        extract_start = time.perf_counter()
         relative_path = str(file_path.relative_to(self.root_path))
 
         source_lines = source_code.split('\n')
@@ -152,81 +789,307 @@ class FileProcessor:
             'file_path': relative_path,
             'source_lines': source_lines,
             'collect_usages': collect_usages,
+            'record_occurrences': record_occurrences,
             'result': result
         }
 
         self._traverse_tree(tree.root_node, context)
+
+        if collect_usages:
+            self.resolver.resolve(relative_path, result.occurrences, result.local_names, result)
+            result.occurrences = array('I')
+            result.local_names = array('I')
+
+        if self.file_timings is not None:
+            end_time = time.perf_counter()
+            self.file_timings.append((relative_path, extract_start - parse_start, end_time - extract_start))
+
         return result
 
-    def _traverse_tree(self, node: Node, context: Dict):
-        """Recursively traverse the syntax tree"""
-        prev_namespace = context['namespace']
-        prev_containing_type = context['containing_type']
-        prev_method = context['method']
-        is_file_scoped_namespace = False
-        result = context['result']
+    def _traverse_tree(self, root: Node, context: Dict):
+        """Process the declarations and identifiers of the syntax tree in source order
 
-        if context['collect_usages']:
-            if node.type == 'file_scoped_namespace_declaration':
-                name = self._get_identifier_name(node)
-                if name:
-                    context['namespace'] = name
-                    is_file_scoped_namespace = True
-            elif node.type == 'namespace_declaration':
-                name = self._get_identifier_name(node)
-                if name:
-                    context['namespace'] = self._build_namespace(context['namespace'], name)
-            elif node.type in ('interface_declaration', 'class_declaration', 'struct_declaration',
-                             'record_declaration', 'enum_declaration'):
-                name = self._get_identifier_name(node)
-                if name:
-                    context['containing_type'] = name
-            elif node.type in ('method_declaration', 'constructor_declaration'):
-                name = self._get_identifier_name(node)
-                if name:
-                    context['method'] = name
-            elif node.type == 'identifier':
-                self._process_identifier_usage(node, context, result)
-        else:
-            if node.type == 'file_scoped_namespace_declaration':
-                self._process_file_scoped_namespace(node, context, result)
-                is_file_scoped_namespace = True
-            elif node.type == 'namespace_declaration':
-                self._process_namespace(node, context, result)
-            elif node.type == 'interface_declaration':
-                self._process_interface(node, context, result)
-            elif node.type == 'class_declaration':
-                self._process_class(node, context, result)
-            elif node.type == 'struct_declaration':
-                self._process_struct(node, context, result)
-            elif node.type == 'enum_declaration':
-                self._process_enum(node, context, result)
-            elif node.type == 'record_declaration':
-                self._process_class(node, context, result)
-            elif node.type in ('method_declaration', 'constructor_declaration'):
-                self._process_method(node, context, result)
-            elif node.type == 'field_declaration':
-                self._process_field(node, context, result)
-            elif node.type == 'property_declaration':
-                self._process_property(node, context, result)
+        The queries find the nodes in C, then a stack of the enclosing declarations tracks the
+        namespace, type and method context, restoring it when passing the end of a declaration.
+        The names declared inside a member are recorded with their scope as local names, not as usages.
+        """
+        result = context['result']
+        collect_usages = context['collect_usages']
+
+        # The captures are not in source order
+        declarations = QueryCursor(self.declaration_query).captures(root).get('declaration', [])
+        declarations.sort(key=lambda node: (node.start_byte, -node.end_byte))
+
+        identifiers = []
+        excluded = set()
+        local_starts = set()
+        if collect_usages or context['record_occurrences']:
+            captures = QueryCursor(self.identifier_query).captures(root)
+            local_nodes = captures.get('local', [])
+            local_starts = {node.start_byte for node in local_nodes}
+
+            # Implicit lambda parameters are not identifier nodes
+            identifiers = captures.get('identifier', []) + [node for node in local_nodes if node.type != 'identifier']
+            identifiers.sort(key=lambda node: node.start_byte)
+            excluded = {node.start_byte for node in captures.get('excluded', [])}
+
+        # Declarations come before the identifiers starting at the same position, which are inside them
+        scopes = []
+        for node in heapq.merge(declarations, identifiers, key=lambda node: node.start_byte):
+            while scopes and scopes[-1][0] <= node.start_byte:
+                _, context['namespace'], context['containing_type'], context['method'] = scopes.pop()
+
+            node_type = node.type
+            if node_type == 'identifier' or node_type == 'implicit_parameter':
+                if node.start_byte in local_starts:
+                    self._record_local_name(node, result)
+                elif node.start_byte not in excluded:
+                    self._record_identifier_occurrence(node, context, result)
+                continue
+
+            # The file-scoped namespace applies to the rest of the file, not only to its node
+            if node_type != 'file_scoped_namespace_declaration':
+                scopes.append((node.end_byte, context['namespace'], context['containing_type'], context['method']))
+
+            if collect_usages:
+                self._enter_declaration(node, context)
+            else:
+                self.processors[node_type](node, context, result)
 
-        for child in node.children:
-            self._traverse_tree(child, context)
+    def _enter_declaration(self, node: Node, context: Dict):
+        """Update the context for a declaration in pass 2, where the declarations are not processed"""
+        name = self._get_identifier_name(node)
+        if not name:
+            return
 
-        if not is_file_scoped_namespace:
-            context['namespace'] = prev_namespace
-        context['containing_type'] = prev_containing_type
-        context['method'] = prev_method
+        node_type = node.type
+        if node_type == 'file_scoped_namespace_declaration':
+            context['namespace'] = name
+        elif node_type == 'namespace_declaration':
+            context['namespace'] = self._build_namespace(context['namespace'], name)
+        elif node_type in TYPE_DECLARATION_TYPES:
+            context['containing_type'] = name
+        elif node_type in METHOD_DECLARATION_TYPES:
+            context['method'] = name
 
     def _get_identifier_name(self, node: Node) -> Optional[str]:
-        """Extract identifier name from a node"""
-        for child in node.children:
-            if child.type == 'identifier':
-                return child.text.decode('utf-8')
-            elif child.type == 'qualified_name':
-                return child.text.decode('utf-8')
+        """Extract the declared name from the name field of a node, not the first identifier (e.g., a return type)"""
+        name = node.child_by_field_name('name')
+        if name is not None and name.type in ('identifier', 'qualified_name'):
+            return name.text.decode('utf-8')
         return None
 
+    def _get_base_types(self, node: Node) -> Tuple[Tuple[str, str], ...]:
+        """Extract the (qualifier, name) pairs of the base list, without generic arguments"""
+        base_list = next((child for child in node.children if child.type == 'base_list'), None)
+        if base_list is None:
+            return ()
+
+        bases = []
+        for base in base_list.named_children:
+            if base.type == 'primary_constructor_base_type':
+                base = base.child_by_field_name('type')
+            qualifier = ''
+            if base is not None and base.type == 'qualified_name':
+                qualifier = base.child_by_field_name('qualifier').text.decode('utf-8')
+                qualifier = qualifier.split('::', 1)[-1]
+                base = base.child_by_field_name('name')
+            if base is not None and base.type == 'generic_name':
+                base = base.named_children[0]
+            if base is not None and base.type == 'identifier':
+                bases.append((qualifier, base.text.decode('utf-8')))
+        return tuple(bases)
+
+    def _get_object_builder_attributes(self, node: Node) -> List[Tuple[str, str]]:
+        """Extract the (attribute, object builder) pairs of the attributes with typeof(MyObjectBuilder_*) arguments"""
+        pairs = []
+        for attribute_list in node.children:
+            if attribute_list.type != 'attribute_list':
+                continue
+            for attribute in attribute_list.named_children:
+                arguments = next((child for child in attribute.children if child.type == 'attribute_argument_list'),
+                                 None)
+                if attribute.type != 'attribute' or arguments is None:
+                    continue
+                name = self._get_type_name(attribute.child_by_field_name('name'))
+                name = name[:-len('Attribute')] if name.endswith('Attribute') else name
+                for argument in arguments.named_children:
+                    expression = argument.named_children[-1] if argument.named_children else None
+                    if expression is not None and expression.type == 'typeof_expression':
+                        object_builder = self._get_type_name(expression.child_by_field_name('type'))
+                        if object_builder.startswith(OBJECT_BUILDER_PREFIX):
+                            pairs.append((name, object_builder))
+        return pairs
+
+    def _record_definition_member(self, type_node: Optional[Node], name: str, context: Dict,
+                                  result: FileProcessingResult):
+        """Record the element type of a definition container member of MyObjectBuilder_Definitions"""
+        if context['containing_type'] != DEFINITIONS_OBJECT_BUILDER or type_node is None:
+            return
+        if type_node.type == 'array_type':
+            type_node = type_node.child_by_field_name('type')
+        object_builder = self._get_type_name(type_node)
+        if object_builder.startswith(OBJECT_BUILDER_PREFIX):
+            result.definition_members.append((name, object_builder))
+
+    def _get_type_name(self, node: Optional[Node]) -> str:
+        """Return the name of a named type without namespace and generic arguments, empty for other types"""
+        while node is not None:
+            if node.type == 'identifier':
+                return node.text.decode('utf-8')
+            if node.type == 'generic_name':
+                node = node.named_children[0]
+            elif node.type == 'qualified_name':
+                node = node.child_by_field_name('name')
+            elif node.type == 'nullable_type':
+                node = node.child_by_field_name('type')
+            else:
+                break
+        return ''
+
+    @staticmethod
+    def _get_type_text(node: Node) -> str:
+        """Return a type as written, with the whitespace normalized"""
+        return ' '.join(node.text.decode('utf-8').split())
+
+    def _get_method_signature(self, node: Node, name: str) -> str:
+        """Return the signature of a method or constructor declaration
+
+        It is written like the declaration without the parameter names and default values: the
+        modifiers, the return type, the name qualified by the containing types and the explicitly
+        implemented interface, the type parameters and the parameter types with their modifiers,
+        for example 'public static bool MyCubeBlock.Sync.TryGet<T>(ref int, out T)'.
+        """
+        parts = [child.text.decode('utf-8') for child in node.children if child.type == 'modifier']
+        returns = node.child_by_field_name('returns')
+        if returns is not None:
+            parts.append(self._get_type_text(returns))
+
+        path = []
+        parent = node.parent
+        while parent is not None:
+            if parent.type in TYPE_DECLARATION_TYPES:
+                path.append(self._get_identifier_name(parent) or '')
+            parent = parent.parent
+        path.reverse()
+        for child in node.children:
+            if child.type == 'explicit_interface_specifier':
+                path.append(self._get_type_text(child).rstrip('.'))
+        qualified_name = '.'.join(path + [name])
+
+        type_parameters = node.child_by_field_name('type_parameters')
+        if type_parameters is not None:
+            qualified_name += '<' + ', '.join(
+                self._get_identifier_name(child) or '' for child in type_parameters.named_children
+                if child.type == 'type_parameter'
+            ) + '>'
+
+        parameters = []
+        parameter_list = node.child_by_field_name('parameters')
+        is_params_array = False
+        for child in parameter_list.children if parameter_list is not None else ():
+            if child.type == 'parameter':
+                words = [modifier.text.decode('utf-8') for modifier in child.children if modifier.type == 'modifier']
+                type_node = child.child_by_field_name('type')
+                if type_node is not None:
+                    words.append(self._get_type_text(type_node))
+                parameters.append(' '.join(words))
+            elif child.type == 'params':
+                is_params_array = True
+            elif is_params_array and child.is_named:
+                # A params array is not parsed into a parameter node, its type is followed by its name
+                parameters.append('params ' + self._get_type_text(child))
+                is_params_array = False
+
+        parts.append(f"{qualified_name}({', '.join(parameters)})")
+        return ' '.join(parts)
+
+    def _get_expression_type(self, node: Optional[Node]) -> str:
+        """Return the type name of an expression creating or converting to a type, like new T() or (T)x"""
+        while node is not None and node.type == 'parenthesized_expression':
+            node = node.named_children[0]
+        if node is None:
+            return ''
+        if node.type in ('object_creation_expression', 'cast_expression'):
+            return self._get_type_name(node.child_by_field_name('type'))
+        if node.type == 'as_expression':
+            return self._get_type_name(node.child_by_field_name('right'))
+        return ''
+
+    def _get_receiver_steps(self, node: Node) -> Optional[List[str]]:
+        """Encode the receiver expression of a member access as steps, None if its type cannot be inferred
+
+        A step is a name (a local, member, type or namespace), a name followed by () for the result
+        of a method call, this or base, or a type name after a colon for a value of that type.
+        """
+        node_type = node.type
+        if node_type == 'identifier':
+            return [node.text.decode('utf-8')]
+        if node_type == 'generic_name':
+            return [node.named_children[0].text.decode('utf-8')]
+        if node_type in ('this', 'base', 'this_expression', 'base_expression'):
+            return [node_type.split('_')[0]]
+        if node_type == 'member_access_expression':
+            expression = node.child_by_field_name('expression')
+            steps = None if expression is None else self._get_receiver_steps(expression)
+            name = node.child_by_field_name('name')
+            if steps is None or name is None:
+                return None
+            return steps + self._get_receiver_steps(name)
+        if node_type == 'invocation_expression':
+            function = node.child_by_field_name('function')
+            steps = None if function is None else self._get_receiver_steps(function)
+            if not steps or steps[-1].startswith(':') or steps[-1] in ('this', 'base'):
+                return None
+            steps[-1] += '()'
+            return steps
+        if node_type == 'parenthesized_expression' and node.named_child_count == 1:
+            return self._get_receiver_steps(node.named_children[0])
+        type_name = self._get_expression_type(node)
+        return [':' + type_name] if type_name else None
+
+    def _get_receiver(self, node: Node) -> str:
+        """Return the encoded receiver if the identifier is the member name of a member access, else empty
+
+        The steps of the receiver are joined with dots, ? stands for a receiver of unknown type.
+        """
+        parent = node.parent
+        member = node
+        if parent is not None and parent.type == 'generic_name':
+            member = parent
+            parent = parent.parent
+        if parent is None:
+            return ''
+
+        if parent.type == 'member_access_expression' and parent.child_by_field_name('name') == member:
+            expression = parent.child_by_field_name('expression')
+        elif parent.type == 'member_binding_expression' and parent.parent.type == 'conditional_access_expression':
+            expression = parent.parent.child_by_field_name('condition')
+        else:
+            return ''
+
+        steps = None if expression is None else self._get_receiver_steps(expression)
+        return '.'.join(steps) if steps else '?'
+
+    def _get_local_type(self, node: Node) -> str:
+        """Return the type of a local name encoded like a receiver, empty if unknown
+
+        A declared type is encoded as a value of the type. The type of a local declared with var
+        is the type of its initializer, which is encoded as the receiver steps of the expression.
+        """
+        parent = node.parent
+        type_node = None
+        if parent.type == 'variable_declarator':
+            type_node = parent.parent.child_by_field_name('type')
+            if type_node is not None and type_node.type == 'implicit_type' and parent.named_child_count > 1:
+                steps = self._get_receiver_steps(parent.named_children[-1])
+                return '.'.join(steps) if steps else ''
+        elif parent.type in ('parameter', 'foreach_statement', 'catch_declaration', 'declaration_pattern',
+                             'declaration_expression'):
+            type_node = parent.child_by_field_name('type')
+        type_name = self._get_type_name(type_node)
+        return ':' + type_name if type_name else ''
+
     def _build_namespace(self, current: str, new: str) -> str:
         """Build namespace by concatenating"""
         if current:
@@ -279,7 +1142,7 @@ class FileProcessor:
 
         description = self._get_preceding_comment(node, context['source_lines'])
 
-        entry = IndexEntry(
+        result.namespace_entries.add(
             namespace=name,
             containing_type='',
             method='',
@@ -290,7 +1153,6 @@ class FileProcessor:
             end_line=node.end_point[0] + 1,
             description=description
         )
-        result.namespace_entries.append(entry)
 
     def _process_namespace(self, node: Node, context: Dict, result: FileProcessingResult):
         """Process namespace declaration"""
@@ -304,7 +1166,7 @@ class FileProcessor:
 
         description = self._get_preceding_comment(node, context['source_lines'])
 
-        entry = IndexEntry(
+        result.namespace_entries.add(
             namespace=full_namespace,
             containing_type='',
             method='',
@@ -315,7 +1177,6 @@ class FileProcessor:
             end_line=node.end_point[0] + 1,
             description=description
         )
-        result.namespace_entries.append(entry)
 
     def _process_interface(self, node: Node, context: Dict, result: FileProcessingResult):
         """Process interface declaration"""
@@ -328,10 +1189,12 @@ class FileProcessor:
         if name not in result.declared_interfaces:
             result.declared_interfaces[name] = set()
         result.declared_interfaces[name].add((context['namespace'], ''))
+        result.type_bases.append((context['namespace'], name, 'interface', context['file_path'],
+                                  node.start_point[0] + 1, self._get_base_types(node)))
 
         description = self._get_preceding_comment(node, context['source_lines'])
 
-        entry = IndexEntry(
+        result.interface_entries.add(
             namespace=context['namespace'],
             containing_type=name,
             method='',
@@ -342,7 +1205,6 @@ class FileProcessor:
             end_line=node.end_point[0] + 1,
             description=description
         )
-        result.interface_entries.append(entry)
 
     def _process_class(self, node: Node, context: Dict, result: FileProcessingResult):
         """Process class/record declaration"""
@@ -355,10 +1217,16 @@ class FileProcessor:
         if name not in result.declared_classes:
             result.declared_classes[name] = set()
         result.declared_classes[name].add((context['namespace'], ''))
+        kind = 'record' if node.type == 'record_declaration' else 'class'
+        result.type_bases.append((context['namespace'], name, kind, context['file_path'],
+                                  node.start_point[0] + 1, self._get_base_types(node)))
+        for attribute, object_builder in self._get_object_builder_attributes(node):
+            result.type_attributes.append((object_builder, attribute, context['namespace'], name, kind,
+                                           context['file_path'], node.start_point[0] + 1))
 
         description = self._get_preceding_comment(node, context['source_lines'])
 
-        entry = IndexEntry(
+        result.class_entries.add(
             namespace=context['namespace'],
             containing_type=name,
             method='',
@@ -369,7 +1237,6 @@ class FileProcessor:
             end_line=node.end_point[0] + 1,
             description=description
         )
-        result.class_entries.append(entry)
 
     def _process_struct(self, node: Node, context: Dict, result: FileProcessingResult):
         """Process struct declaration"""
@@ -382,10 +1249,12 @@ class FileProcessor:
         if name not in result.declared_structs:
             result.declared_structs[name] = set()
         result.declared_structs[name].add((context['namespace'], ''))
+        result.type_bases.append((context['namespace'], name, 'struct', context['file_path'],
+                                  node.start_point[0] + 1, self._get_base_types(node)))
 
         description = self._get_preceding_comment(node, context['source_lines'])
 
-        entry = IndexEntry(
+        result.struct_entries.add(
             namespace=context['namespace'],
             containing_type=name,
             method='',
@@ -396,7 +1265,6 @@ class FileProcessor:
             end_line=node.end_point[0] + 1,
             description=description
         )
-        result.struct_entries.append(entry)
 
     def _process_enum(self, node: Node, context: Dict, result: FileProcessingResult):
         """Process enum declaration"""
@@ -412,7 +1280,7 @@ class FileProcessor:
 
         description = self._get_preceding_comment(node, context['source_lines'])
 
-        entry = IndexEntry(
+        result.enum_entries.add(
             namespace=context['namespace'],
             containing_type=name,
             method='',
@@ -423,7 +1291,6 @@ class FileProcessor:
             end_line=node.end_point[0] + 1,
             description=description
         )
-        result.enum_entries.append(entry)
 
     def _process_method(self, node: Node, context: Dict, result: FileProcessingResult):
         """Process method or constructor declaration"""
@@ -437,9 +1304,13 @@ class FileProcessor:
             result.declared_methods[name] = set()
         result.declared_methods[name].add((context['namespace'], context['containing_type']))
 
+        return_type = self._get_type_name(node.child_by_field_name('returns'))
+        if return_type:
+            result.declared_member_types[(context['containing_type'], name)] = return_type
+
         description = self._get_preceding_comment(node, context['source_lines'])
 
-        entry = IndexEntry(
+        result.method_entries.add(
             namespace=context['namespace'],
             containing_type=context['containing_type'],
             method=name,
@@ -448,21 +1319,28 @@ class FileProcessor:
             file_path=context['file_path'],
             start_line=node.start_point[0] + 1,
             end_line=node.end_point[0] + 1,
-            description=description
+            description=description,
+            signature=self._get_method_signature(node, name)
         )
-        result.method_entries.append(entry)
 
     def _process_field(self, node: Node, context: Dict, result: FileProcessingResult):
         """Process field (member variable) declaration"""
         for child in node.children:
             if child.type == 'variable_declaration':
+                variable_type = self._get_type_name(child.child_by_field_name('type'))
                 for declarator in child.children:
                     if declarator.type == 'variable_declarator':
                         name = self._get_identifier_name(declarator)
                         if name:
+                            self._record_definition_member(child.child_by_field_name('type'), name, context, result)
+                            if name not in result.declared_variables:
+                                result.declared_variables[name] = set()
+                            result.declared_variables[name].add((context['namespace'], context['containing_type']))
+                            if variable_type:
+                                result.declared_member_types[(context['containing_type'], name)] = variable_type
                             description = self._get_preceding_comment(node, context['source_lines'])
 
-                            entry = IndexEntry(
+                            result.variable_entries.add(
                                 namespace=context['namespace'],
                                 containing_type=context['containing_type'],
                                 method='',
@@ -473,7 +1351,6 @@ class FileProcessor:
                                 end_line=node.end_point[0] + 1,
                                 description=description
                             )
-                            result.variable_entries.append(entry)
 
     def _process_property(self, node: Node, context: Dict, result: FileProcessingResult):
         """Process property declaration"""
@@ -481,9 +1358,18 @@ class FileProcessor:
         if not name:
             return
 
+        if name not in result.declared_variables:
+            result.declared_variables[name] = set()
+        result.declared_variables[name].add((context['namespace'], context['containing_type']))
+
+        property_type = self._get_type_name(node.child_by_field_name('type'))
+        if property_type:
+            result.declared_member_types[(context['containing_type'], name)] = property_type
+        self._record_definition_member(node.child_by_field_name('type'), name, context, result)
+
         description = self._get_preceding_comment(node, context['source_lines'])
 
-        entry = IndexEntry(
+        result.variable_entries.add(
             namespace=context['namespace'],
             containing_type=context['containing_type'],
             method='',
@@ -494,163 +1380,1071 @@ class FileProcessor:
             end_line=node.end_point[0] + 1,
             description=description
         )
-        result.variable_entries.append(entry)
 
-    def _process_identifier_usage(self, node: Node, context: Dict, result: FileProcessingResult):
-        """Process identifier usage (not a declaration)"""
-        parent = node.parent
-        if not parent:
+    def _record_identifier_occurrence(self, node: Node, context: Dict, result: FileProcessingResult):
+        """Record an identifier occurrence (not a declaration) to be resolved as a usage"""
+        intern = result.strings.intern
+        result.occurrences.extend((
+            intern(node.text.decode('utf-8')),
+            node.start_point[0] + 1,
+            node.end_point[0] + 1,
+            intern(context['namespace']),
+            intern(context['containing_type']),
+            intern(context['method']),
+            node.start_byte,
+            intern(self._get_receiver(node))
+        ))
+
+    def _record_local_name(self, node: Node, result: FileProcessingResult):
+        """Record a local name with the byte range of its scope, the innermost block, lambda or member around it"""
+        scope = node.parent
+        while scope is not None and scope.type not in LOCAL_SCOPE_TYPES:
+            if scope.type in NON_LOCAL_SCOPE_TYPES:
+                return
+            scope = scope.parent
+        if scope is None:
             return
 
-        declaration_types = {
-            'namespace_declaration',
-            'interface_declaration',
-            'class_declaration',
-            'struct_declaration',
-            'record_declaration',
-            'enum_declaration',
-            'method_declaration',
-            'constructor_declaration',
-            'field_declaration',
-            'property_declaration',
-            'variable_declaration',
-            'variable_declarator',
-            'parameter',
-            'type_parameter',
-            'using_directive',
-            'qualified_name',
-            'member_access_expression'
-        }
+        # A local function is visible in the block declaring it, not only in its own body
+        if scope.type == 'local_function_statement' and node.parent == scope:
+            scope = scope.parent
+
+        intern = result.strings.intern
+        result.local_names.extend((intern(node.text.decode('utf-8')), scope.start_byte, scope.end_byte,
+                                   intern(self._get_local_type(node))))
+
+
+class UsageResolver:
+    """Resolves identifier occurrences as usages of the declared names
+
+    This is a pure in-memory join of the occurrences recorded while parsing a file
+    against the shared declarations merged from all files after pass 1.
+
+    A local name (local variable, parameter, pattern variable...) hides the methods and member
+    variables of the same name in the member declaring it, so its occurrences there are not usages.
+    The other names are usages of a member variable only if a field or property of that name is
+    declared somewhere, names declared nowhere in the code (locals used in a nested scope, members
+    of external types, contextual keywords like value or var) are dropped.
+
+    The method and member variable usages are attributed to the type declaring the member. For a
+    member access that is found from the static type of the receiver, inferred from the declared
+    types of the locals, fields, properties and method return types, then searching the base types.
+    If the receiver type is unknown, then the only type declaring a member of that name is taken,
+    or none if there are several. The types searched are added to the referenced names, so the
+    usages are resolved again if the declarations or base types of any of them change.
+    """
+
+    def __init__(self, shared_declarations: Dict):
+        self.declared_namespaces: Set[str] = shared_declarations['namespaces']
+        self.declared_interfaces: Dict[str, Set[tuple]] = shared_declarations['interfaces']
+        self.declared_classes: Dict[str, Set[tuple]] = shared_declarations['classes']
+        self.declared_structs: Dict[str, Set[tuple]] = shared_declarations['structs']
+        self.declared_enums: Dict[str, Set[tuple]] = shared_declarations['enums']
+        self.declared_methods: Dict[str, Set[tuple]] = shared_declarations['methods']
+        self.declared_variables: Dict[str, Set[tuple]] = shared_declarations['variables']
+        self.member_types: Dict[tuple, str] = shared_declarations['member_types']
+        self.bases: Dict[str, List[str]] = shared_declarations['bases']
+
+    def _ancestors(self, type_name: str, visited_types: Set[str]) -> Iterator[str]:
+        """Yield the type and then its base types breadth first, adding them to the visited types"""
+        queue = [type_name]
+        seen = {type_name}
+        for current in queue:
+            visited_types.add(current)
+            yield current
+            for base in self.bases.get(current, ()):
+                if base not in seen:
+                    seen.add(base)
+                    queue.append(base)
+
+    def _member_type(self, type_name: str, member: str, visited_types: Set[str]) -> str:
+        """Return the type name of a field, property or method return value of a type, empty if unknown"""
+        for current in self._ancestors(type_name, visited_types):
+            member_type = self.member_types.get((current, member))
+            if member_type:
+                return member_type
+        return ''
 
-        if parent.type in declaration_types:
-            return
+    @staticmethod
+    def _local_type(local_scopes: Dict[str, List[tuple]], name: str, position: int) -> Optional[str]:
+        """Return the type name of the innermost local of the name in scope, None if there is no such local"""
+        best = None
+        for start, end, type_name in local_scopes.get(name, ()):
+            if start <= position < end and (best is None or start > best[0]):
+                best = (start, type_name)
+        return None if best is None else best[1]
+
+    def _is_type_name(self, name: str) -> bool:
+        """Return whether a class, struct, interface or enum of the name is declared"""
+        return (name in self.declared_classes or name in self.declared_structs or
+                name in self.declared_interfaces or name in self.declared_enums)
+
+    # Maximum number of locals declared with var followed to infer the type of a receiver
+    MAX_LOCAL_DEPTH = 4
+
+    def _receiver_type(self, receiver: str, containing_type: str, position: int,
+                       local_scopes: Dict[str, List[tuple]], visited_types: Set[str], depth: int = 0) -> str:
+        """Return the type name of an encoded receiver expression, empty if it cannot be inferred"""
+        steps = receiver.split('.')
+        first = steps[0]
+        rest = steps[1:]
+        if first == 'this':
+            current = containing_type
+        elif first == 'base':
+            current = self.bases.get(containing_type, [''])[0]
+        elif first.startswith(':'):
+            current = first[1:]
+        elif first.endswith('()'):
+            current = self._member_type(containing_type, first[:-2], visited_types)
+        else:
+            local_type = self._local_type(local_scopes, first, position)
+            if local_type is None:
+                current = self._member_type(containing_type, first, visited_types)
+            elif local_type and depth < self.MAX_LOCAL_DEPTH:
+                current = self._receiver_type(local_type, containing_type, position, local_scopes, visited_types,
+                                              depth + 1)
+            else:
+                current = ''
+            if not current and self._is_type_name(first):
+                current = first
+            elif not current:
+                # Namespace qualified type name, like Sandbox.Game.World.MySession
+                for i in range(len(steps) - 1, 0, -1):
+                    if '.'.join(steps[:i]) in self.declared_namespaces and self._is_type_name(steps[i]):
+                        current = steps[i]
+                        rest = steps[i + 1:]
+                        break
+
+        for step in rest:
+            if not current:
+                break
+            current = self._member_type(current, step.removesuffix('()'), visited_types)
+        return current or ''
 
-        grandparent = parent.parent
-        if grandparent and grandparent.type in declaration_types:
+    @staticmethod
+    def _closest_namespace(namespaces: List[str], namespace: str) -> str:
+        """Choose the namespace of a type declared in several, preferring the current or an enclosing one"""
+        scope = namespace
+        while scope:
+            if scope in namespaces:
+                return scope
+            scope = scope.rpartition('.')[0]
+        return min(namespaces)
+
+    def _member_location(self, name: str, table: Dict[str, Set[tuple]], receiver: str, namespace: str,
+                         containing_type: str, position: int, local_scopes: Dict[str, List[tuple]],
+                         visited_types: Set[str]) -> tuple:
+        """Return the (namespace, containing type) declaring the used member"""
+        if not receiver:
+            owner = containing_type
+        elif receiver == '?':
+            owner = ''
+        else:
+            owner = self._receiver_type(receiver, containing_type, position, local_scopes, visited_types)
+
+        locations = table[name]
+        if owner:
+            for current in self._ancestors(owner, visited_types):
+                namespaces = [location[0] for location in locations if location[1] == current]
+                if namespaces:
+                    return self._closest_namespace(namespaces, namespace), current
+            if not receiver:
+                # Member of an enclosing type or of an external base type
+                return namespace, containing_type
+            return '', owner
+
+        if len(locations) == 1:
+            return next(iter(locations))
+        return '', ''
+
+    def resolve(self, file_path: str, occurrences: array, local_names: array, result: FileProcessingResult):
+        """Add the usage entries of the occurrences found in a file to the result
+
+        The string ids in the occurrences and local names must refer to the string table of the result.
+        """
+        strings = result.strings.strings
+        local_scopes: Dict[str, List[tuple]] = {}
+        for i in range(0, len(local_names), 4):
+            local_name = strings[local_names[i]]
+            if local_name not in local_scopes:
+                local_scopes[local_name] = []
+            local_scopes[local_name].append((local_names[i + 1], local_names[i + 2], strings[local_names[i + 3]]))
+
+        referenced_names = result.referenced_names
+        for i in range(0, len(occurrences), 8):
+            name = strings[occurrences[i]]
+            start_line = occurrences[i + 1]
+            end_line = occurrences[i + 2]
+            namespace = strings[occurrences[i + 3]]
+            containing_type = strings[occurrences[i + 4]]
+            method = strings[occurrences[i + 5]]
+            position = occurrences[i + 6]
+            receiver = strings[occurrences[i + 7]]
+            referenced_names.add(name)
+            if receiver:
+                # The member name of a member access is never a local
+                is_local = False
+                referenced_names.update(step.lstrip(':').removesuffix('()') for step in receiver.split('.'))
+            else:
+                is_local = self._local_type(local_scopes, name, position) is not None
+            added = False
+
+            if name in self.declared_namespaces:
+                result.namespace_entries.add(
+                    namespace=name,
+                    containing_type='',
+                    method='',
+                    variable_name='',
+                    entry_type='usage',
+                    file_path=file_path,
+                    start_line=start_line,
+                    end_line=end_line,
+                    description=''
+                )
+                added = True
+
+            if name in self.declared_interfaces:
+                result.interface_entries.add(
+                    namespace=namespace,
+                    containing_type=name,
+                    method=method,
+                    variable_name='',
+                    entry_type='usage',
+                    file_path=file_path,
+                    start_line=start_line,
+                    end_line=end_line,
+                    description=''
+                )
+                added = True
+
+            if name in self.declared_classes:
+                result.class_entries.add(
+                    namespace=namespace,
+                    containing_type=name,
+                    method=method,
+                    variable_name='',
+                    entry_type='usage',
+                    file_path=file_path,
+                    start_line=start_line,
+                    end_line=end_line,
+                    description=''
+                )
+                added = True
+
+            if name in self.declared_structs:
+                result.struct_entries.add(
+                    namespace=namespace,
+                    containing_type=name,
+                    method=method,
+                    variable_name='',
+                    entry_type='usage',
+                    file_path=file_path,
+                    start_line=start_line,
+                    end_line=end_line,
+                    description=''
+                )
+                added = True
+
+            if name in self.declared_enums:
+                result.enum_entries.add(
+                    namespace=namespace,
+                    containing_type=name,
+                    method=method,
+                    variable_name='',
+                    entry_type='usage',
+                    file_path=file_path,
+                    start_line=start_line,
+                    end_line=end_line,
+                    description=''
+                )
+                added = True
+
+            if name in self.declared_methods and not is_local:
+                member_namespace, member_type = self._member_location(
+                    name, self.declared_methods, receiver, namespace, containing_type, position, local_scopes,
+                    referenced_names)
+                result.method_entries.add(
+                    namespace=member_namespace,
+                    containing_type=member_type,
+                    method=name,
+                    variable_name='',
+                    entry_type='usage',
+                    file_path=file_path,
+                    start_line=start_line,
+                    end_line=end_line,
+                    description=''
+                )
+                added = True
+
+            # Attributes are written without their Attribute suffix
+            if not added and name + 'Attribute' in self.declared_classes:
+                result.class_entries.add(
+                    namespace=namespace,
+                    containing_type=name + 'Attribute',
+                    method=method,
+                    variable_name='',
+                    entry_type='usage',
+                    file_path=file_path,
+                    start_line=start_line,
+                    end_line=end_line,
+                    description=''
+                )
+                result.referenced_names.add(name + 'Attribute')
+                added = True
+
+            if not added and not is_local and name in self.declared_variables:
+                member_namespace, member_type = self._member_location(
+                    name, self.declared_variables, receiver, namespace, containing_type, position, local_scopes,
+                    referenced_names)
+                result.variable_entries.add(
+                    namespace=member_namespace,
+                    containing_type=member_type,
+                    method=method,
+                    variable_name=name,
+                    entry_type='usage',
+                    file_path=file_path,
+                    start_line=start_line,
+                    end_line=end_line,
+                    description=''
+                )
+
+
+class SpillBudget:
+    """Memory budget shared by the external sorters of all index categories"""
+
+    # Rough memory use of a buffered row: the array columns, the temporary lists used while
+    # sorting and a share of the distinct strings, whose table is dropped with the buffer on a spill
+    ESTIMATED_ROW_SIZE = 100
+
+    def __init__(self, memory_budget_mb: int):
+        self.max_buffered_rows = max(1000, memory_budget_mb * 1024 * 1024 // self.ESTIMATED_ROW_SIZE)
+        self.sorters: List['ExternalSorter'] = []
+        self.spill_dir: Optional[str] = None
+
+    def get_spill_dir(self) -> str:
+        """Return the temporary directory for the sorted runs, it is created on first use"""
+        if self.spill_dir is None:
+            self.spill_dir = tempfile.mkdtemp(prefix='index_code_')
+        return self.spill_dir
+
+    def enforce(self):
+        """Spill the largest buffers to disk while the buffered rows exceed the budget"""
+        buffered = sum(len(sorter.rows) for sorter in self.sorters)
+        while buffered > self.max_buffered_rows:
+            sorter = max(self.sorters, key=lambda sorter: len(sorter.rows))
+            buffered -= len(sorter.rows)
+            sorter.spill()
+
+    def cleanup(self):
+        """Delete the sorted runs"""
+        if self.spill_dir is not None:
+            shutil.rmtree(self.spill_dir, ignore_errors=True)
+            self.spill_dir = None
+
+
+class ExternalSorter:
+    """Sorts index entries under a memory budget
+
+    The entries are buffered in memory in columnar form until the shared budget is exceeded,
+    then the buffer is sorted and written to disk as a run of row tuples in IndexEntry field
+    order. Each buffer has a string table of its own, replaced along with it after a spill, so
+    the distinct strings do not accumulate over the runs. The sorted output is the k-way merge of the runs and the buffer, ordered by all
+    columns left to right.
+    """
+
+    # Number of rows pickled together in a run file
+    CHUNK_SIZE = 10000
+
+    def __init__(self, budget: SpillBudget):
+        self.budget = budget
+        self.rows = EntryColumns(StringTable())
+        self.run_paths: List[str] = []
+        self.count = 0
+        budget.sorters.append(self)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def extend(self, entries: EntryColumns):
+        """Add entries, spilling to disk if the memory budget is exceeded"""
+        self.rows.extend(entries)
+        self.count += len(entries)
+        if len(self.rows) > self.budget.max_buffered_rows // len(self.budget.sorters):
+            self.budget.enforce()
+
+    def spill(self):
+        """Sort the buffered entries and write them into a new run file"""
+        if not len(self.rows):
             return
 
-        name = node.text.decode('utf-8')
-        added = False
-
-        if name in self.declared_namespaces:
-            entry = IndexEntry(
-                namespace=name,
-                containing_type='',
-                method='',
-                variable_name='',
-                entry_type='usage',
-                file_path=context['file_path'],
-                start_line=node.start_point[0] + 1,
-                end_line=node.end_point[0] + 1,
-                description=''
-            )
-            result.namespace_entries.append(entry)
-            added = True
-
-        if name in self.declared_interfaces:
-            entry = IndexEntry(
-                namespace=context['namespace'],
-                containing_type=name,
-                method=context['method'],
-                variable_name='',
-                entry_type='usage',
-                file_path=context['file_path'],
-                start_line=node.start_point[0] + 1,
-                end_line=node.end_point[0] + 1,
-                description=''
-            )
-            result.interface_entries.append(entry)
-            added = True
-
-        if name in self.declared_classes:
-            entry = IndexEntry(
-                namespace=context['namespace'],
-                containing_type=name,
-                method=context['method'],
-                variable_name='',
-                entry_type='usage',
-                file_path=context['file_path'],
-                start_line=node.start_point[0] + 1,
-                end_line=node.end_point[0] + 1,
-                description=''
-            )
-            result.class_entries.append(entry)
-            added = True
-
-        if name in self.declared_structs:
-            entry = IndexEntry(
-                namespace=context['namespace'],
-                containing_type=name,
-                method=context['method'],
-                variable_name='',
-                entry_type='usage',
-                file_path=context['file_path'],
-                start_line=node.start_point[0] + 1,
-                end_line=node.end_point[0] + 1,
-                description=''
-            )
-            result.struct_entries.append(entry)
-            added = True
-
-        if name in self.declared_enums:
-            entry = IndexEntry(
-                namespace=context['namespace'],
-                containing_type=name,
-                method=context['method'],
-                variable_name='',
-                entry_type='usage',
-                file_path=context['file_path'],
-                start_line=node.start_point[0] + 1,
-                end_line=node.end_point[0] + 1,
-                description=''
+        self.rows.sort()
+        fd, run_path = tempfile.mkstemp(suffix='.run', dir=self.budget.get_spill_dir())
+        with os.fdopen(fd, 'wb') as f:
+            chunk = []
+            for row in self.rows.rows():
+                chunk.append(row)
+                if len(chunk) == self.CHUNK_SIZE:
+                    pickle.dump(chunk, f, pickle.HIGHEST_PROTOCOL)
+                    chunk = []
+            if chunk:
+                pickle.dump(chunk, f, pickle.HIGHEST_PROTOCOL)
+        self.run_paths.append(run_path)
+        self.rows = EntryColumns(StringTable())
+
+    @staticmethod
+    def _read_run(run_path: str) -> Iterator[tuple]:
+        """Yield the rows of a run file in order"""
+        with open(run_path, 'rb') as f:
+            while True:
+                try:
+                    chunk = pickle.load(f)
+                except EOFError:
+                    return
+                yield from chunk
+
+    def __iter__(self) -> Iterator[tuple]:
+        """Yield all entries in sorted order as row tuples"""
+        self.rows.sort()
+        if not self.run_paths:
+            return self.rows.rows()
+        return heapq.merge(*[self._read_run(run_path) for run_path in self.run_paths], self.rows.rows())
+
+
+# Columns of each index file with a key file, see KeyFileWriter
+KEY_COLUMNS = {
+    'namespaces': ('namespace',),
+    'interfaces': ('containing_type',),
+    'classes': ('containing_type',),
+    'structs': ('containing_type',),
+    'enums': ('containing_type',),
+    'methods': ('method', 'containing_type', 'signature'),
+    'variables': ('variable_name', 'containing_type'),
+}
+
+
+class SqliteIndexWriter:
+    """Writes the entries of all index categories into a single SQLite database
+
+    The entries table has a category column (the index file name without extension) and the
+    CSV columns. B-tree indexes are created on the symbol columns and the file path, and an FTS5
+    trigram table over the descriptions. The database is built in a temporary file and moved in place
+    when complete, so searches never see a partial database.
+    """
+
+    INDEXED_COLUMNS = ('namespace', 'containing_type', 'method', 'variable_name', 'type', 'file_path')
+
+    # Number of rows inserted at once
+    BATCH_SIZE = 10000
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.temp_path = path.with_name(path.name + '.tmp')
+        if self.temp_path.exists():
+            self.temp_path.unlink()
+
+        self.connection = sqlite3.connect(str(self.temp_path))
+        self.connection.execute('PRAGMA journal_mode = OFF')
+        self.connection.execute('PRAGMA synchronous = OFF')
+        self.connection.execute(
+            'CREATE TABLE entries ('
+            'category TEXT NOT NULL, namespace TEXT, containing_type TEXT, method TEXT, variable_name TEXT, '
+            'type TEXT, file_path TEXT, start_line INTEGER, end_line INTEGER, description TEXT, signature TEXT)'
+        )
+        self.batch: List[tuple] = []
+
+    def add(self, category: str, row: tuple):
+        """Add a row in IndexEntry field order"""
+        self.batch.append((category,) + tuple(row))
+        if len(self.batch) >= self.BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        """Insert the buffered rows"""
+        self.connection.executemany('INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', self.batch)
+        self.batch = []
+
+    def finish(self):
+        """Create the indexes and move the database in place"""
+        self.flush()
+
+        for column in self.INDEXED_COLUMNS:
+            self.connection.execute(f'CREATE INDEX entries_{column} ON entries ({column})')
+
+        try:
+            # Trigrams match substrings of the descriptions, like the fts: mode of the CSV search does
+            self.connection.execute(
+                "CREATE VIRTUAL TABLE descriptions USING fts5("
+                "description, content='entries', content_rowid='rowid', tokenize='trigram')"
             )
-            result.enum_entries.append(entry)
-            added = True
-
-        if name in self.declared_methods:
-            entry = IndexEntry(
-                namespace=context['namespace'],
-                containing_type=context['containing_type'],
-                method=name,
-                variable_name='',
-                entry_type='usage',
-                file_path=context['file_path'],
-                start_line=node.start_point[0] + 1,
-                end_line=node.end_point[0] + 1,
-                description=''
+            self.connection.execute(
+                "INSERT INTO descriptions (rowid, description) SELECT rowid, description FROM entries WHERE description != ''"
             )
-            result.method_entries.append(entry)
-            added = True
-
-        if not added:
-            entry = IndexEntry(
-                namespace=context['namespace'],
-                containing_type=context['containing_type'],
-                method=context['method'],
-                variable_name=name,
-                entry_type='usage',
-                file_path=context['file_path'],
-                start_line=node.start_point[0] + 1,
-                end_line=node.end_point[0] + 1,
-                description=''
+        except sqlite3.OperationalError as e:
+            print(f"Warning: No full text search on descriptions, FTS5 is not available: {e}", file=sys.stderr)
+
+        # Rowid range of each category, for estimating the number of matches from a partial scan
+        self.connection.execute(
+            'CREATE TABLE categories AS SELECT category, min(rowid) AS first_rowid, max(rowid) AS last_rowid '
+            'FROM entries GROUP BY category'
+        )
+
+        # Statistics for the query planner to pick the most selective index
+        self.connection.execute('ANALYZE')
+        self.connection.commit()
+        self.connection.close()
+        os.replace(self.temp_path, self.path)
+
+    def abort(self):
+        """Discard the partially written database"""
+        self.connection.close()
+        if self.temp_path.exists():
+            self.temp_path.unlink()
+
+
+class CallGraphWriter:
+    """Builds the caller to callee adjacency of the methods into a callgraph.sqlite database
+
+    The nodes are the declared methods, one per (namespace, containing_type, method) with the
+    overloads merged, plus a node with an empty method for the calls outside of any method, like
+    in field initializers and properties. The caller of each method usage is the innermost method
+    declaration around its line in the same file, else the innermost type declaration.
+
+    The callee is the method declared by the type the usage is attributed to, or the only method
+    of that name. Otherwise only the callee name is stored, which search_calls.py matches against
+    every method of that name. Like SqliteIndexWriter, the database is built in a temporary file
+    and moved in place when complete.
+    """
+
+    # Index categories whose declarations can contain method calls
+    TYPE_CATEGORIES = ('interfaces', 'classes', 'structs')
+
+    BATCH_SIZE = 10000
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.temp_path = path.with_name(path.name + '.tmp')
+        if self.temp_path.exists():
+            self.temp_path.unlink()
+
+        self.connection = sqlite3.connect(str(self.temp_path))
+        self.connection.execute('PRAGMA journal_mode = OFF')
+        self.connection.execute('PRAGMA synchronous = OFF')
+        self.connection.executescript('''
+            CREATE TABLE nodes (
+                id INTEGER PRIMARY KEY, namespace TEXT, containing_type TEXT, method TEXT,
+                file_path TEXT, start_line INTEGER, UNIQUE (namespace, containing_type, method));
+            CREATE TABLE calls (
+                caller_id INTEGER, callee_name TEXT, callee_id INTEGER, file_path TEXT, line INTEGER);
+            CREATE TEMP TABLE declarations (
+                node_id INTEGER, file_path TEXT, start_line INTEGER, end_line INTEGER);
+            CREATE TEMP TABLE usages (
+                namespace TEXT, containing_type TEXT, callee_name TEXT, file_path TEXT, line INTEGER);
+            CREATE TEMP TABLE types (
+                namespace TEXT, containing_type TEXT, file_path TEXT, start_line INTEGER, end_line INTEGER);
+        ''')
+        self.declarations: List[tuple] = []
+        self.usages: List[tuple] = []
+        self.types: List[tuple] = []
+
+    def add(self, category: str, row: tuple):
+        """Add a row of the methods index or a type index in IndexEntry field order"""
+        namespace, containing_type, method, _, entry_type, file_path, start_line, end_line, _, _ = row
+        if category != 'methods':
+            if category in self.TYPE_CATEGORIES and entry_type == 'declaration':
+                self.types.append((namespace, containing_type, file_path, start_line, end_line))
+        elif entry_type == 'declaration':
+            self.declarations.append((namespace, containing_type, method, file_path, start_line, end_line))
+            if len(self.declarations) >= self.BATCH_SIZE:
+                self.flush()
+        else:
+            self.usages.append((namespace, containing_type, method, file_path, start_line))
+            if len(self.usages) >= self.BATCH_SIZE:
+                self.flush()
+
+    def flush(self):
+        """Insert the buffered rows"""
+        # The first declaration of the overloads gives the location of the node
+        self.connection.executemany(
+            'INSERT OR IGNORE INTO nodes (namespace, containing_type, method, file_path, start_line) '
+            'VALUES (?, ?, ?, ?, ?)',
+            [(namespace, containing_type, method, file_path, start_line)
+             for namespace, containing_type, method, file_path, start_line, _ in self.declarations]
+        )
+        self.connection.executemany(
+            'INSERT INTO declarations SELECT id, ?, ?, ? FROM nodes '
+            'WHERE namespace = ? AND containing_type = ? AND method = ?',
+            [(file_path, start_line, end_line, namespace, containing_type, method)
+             for namespace, containing_type, method, file_path, start_line, end_line in self.declarations]
+        )
+        self.connection.executemany('INSERT INTO usages VALUES (?, ?, ?, ?, ?)', self.usages)
+        self.connection.executemany('INSERT INTO types VALUES (?, ?, ?, ?, ?)', self.types)
+        self.declarations = []
+        self.usages = []
+        self.types = []
+
+    def finish(self):
+        """Resolve the callers and callees, create the indexes and move the database in place"""
+        self.flush()
+        connection = self.connection
+        connection.execute('CREATE INDEX temp.declarations_file ON declarations (file_path, start_line)')
+        connection.execute('CREATE INDEX temp.types_file ON types (file_path, start_line)')
+
+        connection.execute('''
+            CREATE TEMP TABLE callers AS SELECT
+                u.rowid AS usage_id,
+                (SELECT d.node_id FROM declarations d
+                 WHERE d.file_path = u.file_path AND d.start_line <= u.line AND d.end_line >= u.line
+                 ORDER BY d.start_line DESC LIMIT 1) AS node_id,
+                (SELECT t.rowid FROM types t
+                 WHERE t.file_path = u.file_path AND t.start_line <= u.line AND t.end_line >= u.line
+                 ORDER BY t.start_line DESC LIMIT 1) AS type_id
+            FROM usages u
+        ''')
+
+        # Usages outside of methods are attributed to their type
+        connection.execute('''
+            INSERT OR IGNORE INTO nodes (namespace, containing_type, method, file_path, start_line)
+            SELECT t.namespace, t.containing_type, '', t.file_path, t.start_line
+            FROM callers c JOIN types t ON t.rowid = c.type_id WHERE c.node_id IS NULL
+        ''')
+        connection.execute('''
+            UPDATE callers SET node_id = (
+                SELECT n.id FROM types t JOIN nodes n
+                ON n.namespace = t.namespace AND n.containing_type = t.containing_type AND n.method = ''
+                WHERE t.rowid = callers.type_id)
+            WHERE node_id IS NULL
+        ''')
+        connection.execute(
+            'CREATE TEMP TABLE unique_methods AS SELECT method, min(id) AS node_id FROM nodes '
+            "WHERE method != '' GROUP BY method HAVING count(*) = 1"
+        )
+        connection.execute('CREATE INDEX temp.unique_methods_method ON unique_methods (method)')
+
+        # Needed by the callee lookup by type and method name below, the unique index starts with the namespace
+        connection.execute('CREATE INDEX nodes_type ON nodes (containing_type, method)')
+
+        connection.execute('''
+            INSERT INTO calls (caller_id, callee_name, callee_id, file_path, line)
+            SELECT
+                c.node_id,
+                u.callee_name,
+                coalesce(
+                    (SELECT n.id FROM nodes n
+                     WHERE n.namespace = u.namespace AND n.containing_type = u.containing_type
+                     AND n.method = u.callee_name),
+                    (SELECT min(n.id) FROM nodes n
+                     WHERE n.containing_type = u.containing_type AND n.method = u.callee_name
+                     HAVING count(*) = 1),
+                    (SELECT m.node_id FROM unique_methods m WHERE m.method = u.callee_name)),
+                u.file_path,
+                u.line
+            FROM usages u JOIN callers c ON c.usage_id = u.rowid
+            WHERE c.node_id IS NOT NULL
+        ''')
+
+        connection.executescript('''
+            CREATE INDEX nodes_method ON nodes (method, containing_type);
+            CREATE INDEX calls_caller ON calls (caller_id);
+            CREATE INDEX calls_callee ON calls (callee_id);
+            CREATE INDEX calls_callee_name ON calls (callee_name);
+            ANALYZE;
+        ''')
+        node_count = connection.execute('SELECT count(*) FROM nodes').fetchone()[0]
+        call_count = connection.execute('SELECT count(*) FROM calls').fetchone()[0]
+        connection.commit()
+        connection.close()
+        os.replace(self.temp_path, self.path)
+        print(f"Call graph written to {self.path}: {node_count} methods, {call_count} calls")
+
+    def abort(self):
+        """Discard the partially written database"""
+        self.connection.close()
+        if self.temp_path.exists():
+            self.temp_path.unlink()
+
+
+class TypeHierarchyWriter:
+    """Writes the base types of the type declarations and their transitive closure into hierarchy.sqlite
+
+    The base list only names the base types, so each name is resolved to a declared type: the one
+    matching the written qualifier, else the one in the namespace of the declaration or an enclosing
+    namespace, else the only type of that name. Base types which are not declared in the indexed code
+    (like System.IDisposable) or ambiguous ones are kept as types of an unknown kind under the name
+    as written. The closure maps each type to all of its ancestors, so all subclasses or implementers
+    of a type are found with a single lookup.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.temp_path = path.with_name(path.name + '.tmp')
+
+        # (namespace, name) => [id, kind, file path, start line]
+        self.types: Dict[Tuple[str, str], list] = {}
+
+    def _type_id(self, namespace: str, name: str, kind: str = '', file_path: str = '', start_line: int = 0) -> int:
+        """Return the id of a type, adding it if new and filling in the location of its first declaration"""
+        key = (namespace, name)
+        entry = self.types.get(key)
+        if entry is None:
+            entry = self.types[key] = [len(self.types) + 1, kind, file_path, start_line]
+        elif kind and not entry[1]:
+            entry[1:] = [kind, file_path, start_line]
+        return entry[0]
+
+    @staticmethod
+    def _resolve(namespace: str, qualifier: str, candidates: Set[str]) -> Optional[str]:
+        """Return the namespace of the declared base type a name refers to, None if unknown or ambiguous"""
+        if qualifier:
+            matches = [candidate for candidate in candidates
+                       if candidate == qualifier or candidate.endswith('.' + qualifier)]
+            if len(matches) == 1:
+                return matches[0]
+
+        # Lookup from the innermost namespace outwards, the using directives are not known here
+        scope = namespace
+        while True:
+            if scope in candidates:
+                return scope
+            if not scope:
+                break
+            scope = scope.rpartition('.')[0]
+
+        if len(candidates) == 1:
+            return next(iter(candidates))
+        return None
+
+    def write(self, type_bases: List[tuple], *declared_types: Dict[str, Set[tuple]]):
+        """Resolve the base types, compute the closure and write the database"""
+        declared_namespaces: Dict[str, Set[str]] = {}
+        for table in declared_types:
+            for name, locations in table.items():
+                declared_namespaces.setdefault(name, set()).update(namespace for namespace, _ in locations)
+
+        # Declarations first, so the base types resolved to them do not create them without a location
+        for namespace, name, kind, file_path, start_line, _ in sorted(type_bases):
+            self._type_id(namespace, name, kind, file_path, start_line)
+
+        direct_bases: Dict[int, Set[int]] = {}
+        for namespace, name, _, _, _, bases in type_bases:
+            type_id = self._type_id(namespace, name)
+            for qualifier, base_name in bases:
+                base_namespace = self._resolve(namespace, qualifier, declared_namespaces.get(base_name, set()))
+                if base_namespace is None:
+                    base_id = self._type_id(qualifier, base_name)
+                else:
+                    base_id = self._type_id(base_namespace, base_name)
+                if base_id != type_id:
+                    direct_bases.setdefault(type_id, set()).add(base_id)
+
+        # Breadth first from each type, so each ancestor gets its shortest distance
+        closure = []
+        for type_id, bases in direct_bases.items():
+            depths = {base_id: 1 for base_id in bases}
+            frontier = list(bases)
+            depth = 1
+            while frontier:
+                depth += 1
+                next_frontier = []
+                for ancestor_id in frontier:
+                    for base_id in direct_bases.get(ancestor_id, ()):
+                        if base_id not in depths and base_id != type_id:
+                            depths[base_id] = depth
+                            next_frontier.append(base_id)
+                frontier = next_frontier
+            closure.extend((type_id, ancestor_id, depth) for ancestor_id, depth in depths.items())
+
+        if self.temp_path.exists():
+            self.temp_path.unlink()
+        connection = sqlite3.connect(str(self.temp_path))
+        try:
+            connection.executescript('''
+                CREATE TABLE types (
+                    id INTEGER PRIMARY KEY, namespace TEXT, name TEXT, kind TEXT, file_path TEXT, start_line INTEGER);
+                CREATE TABLE ancestors (type_id INTEGER, ancestor_id INTEGER, depth INTEGER);
+            ''')
+            connection.executemany(
+                'INSERT INTO types VALUES (?, ?, ?, ?, ?, ?)',
+                [(type_id, namespace, name, kind, file_path, start_line)
+                 for (namespace, name), (type_id, kind, file_path, start_line) in self.types.items()]
             )
-            result.variable_entries.append(entry)
+            connection.executemany('INSERT INTO ancestors VALUES (?, ?, ?)', closure)
+            connection.executescript('''
+                CREATE INDEX types_name ON types (name);
+                CREATE INDEX ancestors_type ON ancestors (type_id, depth);
+                CREATE INDEX ancestors_ancestor ON ancestors (ancestor_id, depth);
+                ANALYZE;
+            ''')
+            connection.commit()
+        finally:
+            connection.close()
+        os.replace(self.temp_path, self.path)
+        print(f"Type hierarchy written to {self.path}: {len(self.types)} types, {len(closure)} ancestors")
+
+
+class ObjectBuilderWriter:
+    """Writes the object builder classes and the types linked to them into objectbuilders.sqlite
+
+    The TypeId of a content definition names its object builder class without the MyObjectBuilder_
+    prefix, and its xsi:type or else the element type of its container names the object builder of
+    the definition itself. The runtime classes are linked to these by attributes like
+    [MyCubeBlockType(typeof(MyObjectBuilder_Thrust))] or [MyDefinitionType(typeof(...))].
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.temp_path = path.with_name(path.name + '.tmp')
+
+    def write(self, type_bases: List[tuple], type_attributes: List[tuple], definition_members: List[tuple]):
+        """Write the object builder declarations, the attributed types and the definition containers"""
+        object_builders = sorted(
+            (name[len(OBJECT_BUILDER_PREFIX):], name, namespace, kind, file_path, start_line)
+            for namespace, name, kind, file_path, start_line, _ in type_bases if name.startswith(OBJECT_BUILDER_PREFIX)
+        )
+
+        if self.temp_path.exists():
+            self.temp_path.unlink()
+        connection = sqlite3.connect(str(self.temp_path))
+        try:
+            connection.executescript('''
+                CREATE TABLE object_builders (
+                    type_name TEXT, name TEXT, namespace TEXT, kind TEXT, file_path TEXT, start_line INTEGER);
+                CREATE TABLE attributed_types (
+                    object_builder TEXT, attribute TEXT, namespace TEXT, name TEXT, kind TEXT, file_path TEXT,
+                    start_line INTEGER);
+                CREATE TABLE definition_members (member TEXT, object_builder TEXT);
+            ''')
+            connection.executemany('INSERT INTO object_builders VALUES (?, ?, ?, ?, ?, ?)', object_builders)
+            connection.executemany('INSERT INTO attributed_types VALUES (?, ?, ?, ?, ?, ?, ?)',
+                                   sorted(set(type_attributes)))
+            connection.executemany('INSERT INTO definition_members VALUES (?, ?)', sorted(set(definition_members)))
+            connection.executescript('''
+                CREATE INDEX object_builders_type_name ON object_builders (type_name);
+                CREATE INDEX object_builders_name ON object_builders (name);
+                CREATE INDEX attributed_types_object_builder ON attributed_types (object_builder);
+                CREATE INDEX definition_members_member ON definition_members (member);
+                ANALYZE;
+            ''')
+            connection.commit()
+        finally:
+            connection.close()
+        os.replace(self.temp_path, self.path)
+        print(f"Object builders written to {self.path}: {len(object_builders)} classes, "
+              f"{len(set(type_attributes))} attributed types")
+
+
+class IndexProfile:
+    """Collects where the time of an indexing run goes, written as a JSON report by --profile
+
+    The phase times are always measured. The per-worker, per-file and IPC statistics are only
+    collected by the workers if enabled, since measuring the pickled result sizes costs time.
+    """
+
+    # Number of slowest files listed in the report
+    TOP_FILES = 20
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.start_time = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+        self.passes: Dict[str, Dict] = {}
+        self.ipc_bytes = {'to_workers': 0, 'from_workers': 0}
+        self.worker_peak_rss: Dict[int, Optional[int]] = {}
+        self.slowest_files: List[Tuple[float, str, str, float, float]] = []
+
+    @contextmanager
+    def phase(self, name: str):
+        """Measure the wall time of a phase, added up if the phase is entered again"""
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start_time
+
+    def start_pass(self, name: str, num_workers: int):
+        """Start measuring a pass, added up if the pass runs in several parts"""
+        pass_stats = self.passes.setdefault(
+            name, {'wall_seconds': 0.0, 'num_workers': num_workers, 'batches': 0, 'workers': {}})
+        pass_stats['start'] = time.perf_counter()
+
+    def add_batch(self, pass_name: str, stats: Dict):
+        """Add the statistics of a batch returned by _process_batch_worker"""
+        pass_stats = self.passes[pass_name]
+        pass_stats['batches'] += 1
+
+        worker = pass_stats['workers'].setdefault(stats['pid'], {'busy_seconds': 0.0, 'batches': 0, 'files': 0})
+        worker['busy_seconds'] += stats['busy_seconds']
+        worker['batches'] += 1
+        worker['files'] += len(stats['files'])
+
+        self.ipc_bytes['from_workers'] += stats['result_bytes']
+        self.worker_peak_rss[stats['pid']] = stats['peak_rss_bytes']
+
+        for relative_path, parse_seconds, extract_seconds in stats['files']:
+            item = (parse_seconds + extract_seconds, relative_path, pass_name, parse_seconds, extract_seconds)
+            if len(self.slowest_files) < self.TOP_FILES:
+                heapq.heappush(self.slowest_files, item)
+            else:
+                heapq.heappushpop(self.slowest_files, item)
+
+    def end_pass(self, name: str):
+        pass_stats = self.passes[name]
+        pass_stats['wall_seconds'] += time.perf_counter() - pass_stats.pop('start')
+
+    def write(self, path: Path, settings: Dict):
+        """Write the JSON report"""
+        passes = {}
+        for name, pass_stats in self.passes.items():
+            wall_seconds = pass_stats['wall_seconds']
+            passes[name] = {
+                'wall_seconds': wall_seconds,
+                'batches': pass_stats['batches'],
+                'num_workers': pass_stats['num_workers'],
+                'workers': [
+                    {
+                        'pid': pid,
+                        'busy_seconds': worker['busy_seconds'],
+                        'idle_seconds': max(0.0, wall_seconds - worker['busy_seconds']),
+                        'batches': worker['batches'],
+                        'files': worker['files'],
+                    }
+                    for pid, worker in sorted(pass_stats['workers'].items())
+                ],
+            }
+
+        report = {
+            'settings': settings,
+            'counts': self.counts,
+            'total_seconds': time.perf_counter() - self.start_time,
+            'phases': self.phases,
+            'passes': passes,
+            'peak_rss_bytes': {
+                'parent': _peak_rss_bytes(),
+                'workers': {str(pid): peak for pid, peak in sorted(self.worker_peak_rss.items())},
+            },
+            'ipc_bytes': self.ipc_bytes,
+            'slowest_files': [
+                {
+                    'path': relative_path,
+                    'pass': pass_name,
+                    'total_seconds': total_seconds,
+                    'parse_seconds': parse_seconds,
+                    'extract_seconds': extract_seconds,
+                }
+                for total_seconds, relative_path, pass_name, parse_seconds, extract_seconds
+                in sorted(self.slowest_files, reverse=True)
+            ],
+        }
+
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+
+class CountingWriter:
+    """Text file wrapper for csv.writer, which writes UTF-8 and counts the bytes written"""
+
+    def __init__(self, f):
+        self.file = f
+        self.position = 0
+
+    def write(self, text: str):
+        data = text.encode('utf-8')
+        self.file.write(data)
+        self.position += len(data)
+
+
+class KeyFileWriter:
+    """Writes the key file of an index column, mapping each value to the byte offsets of its rows
+
+    The first line has the column name and the size of the CSV file. It is followed by a line per
+    distinct non-empty value, sorted by value: the value, a tab, then the ascending row offsets
+    separated by spaces.
+
+    A trigram file is written along with it in the same format, mapping each trigram of the
+    lowercase values to the byte offsets of the lines of the key file with those values, which
+    narrows down the values to check for substring and regex searches in the column.
+
+    The files are written to temporary files and moved in place when complete.
+    """
+
+    def __init__(self, path: Path, column: str):
+        self.path = path
+        self.column = column
+        self.offsets: Dict[str, array] = {}
+
+    def add(self, value: str, offset: int):
+        if value:
+            offsets = self.offsets.get(value)
+            if offsets is None:
+                offsets = self.offsets[value] = array('Q')
+            offsets.append(offset)
+
+    def write(self, csv_size: int):
+        trigrams: Dict[str, array] = {}
+
+        header = f'{self.column}\t{csv_size}\n'.encode('utf-8')
+        temp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(temp_path, 'wb') as f:
+            f.write(header)
+            position = len(header)
+            for value in sorted(self.offsets):
+                line = f"{value}\t{' '.join(map(str, self.offsets[value]))}\n".encode('utf-8')
+                f.write(line)
+
+                lowercase = value.lower()
+                for trigram in {lowercase[i:i + 3] for i in range(len(lowercase) - 2)}:
+                    lines = trigrams.get(trigram)
+                    if lines is None:
+                        lines = trigrams[trigram] = array('Q')
+                    lines.append(position)
+
+                position += len(line)
+
+        trigram_path = self.path.with_suffix('.trigrams')
+        temp_trigram_path = trigram_path.with_name(trigram_path.name + '.tmp')
+        with open(temp_trigram_path, 'wb') as f:
+            f.write(header)
+            for trigram in sorted(trigrams):
+                f.write(f"{trigram}\t{' '.join(map(str, trigrams[trigram]))}\n".encode('utf-8'))
+
+        os.replace(temp_path, self.path)
+        os.replace(temp_trigram_path, trigram_path)
 
 
 class CSharpIndexer:
     """Indexes C# source code using Tree-sitter with parallel processing"""
 
-    def __init__(self, root_path: str):
+    # Default byte budget of a batch of files sent to a worker at once
+    DEFAULT_BATCH_BYTES = 512 * 1024
+
+    # The batch budget is also limited to the remaining bytes divided by this many batches per worker,
+    # so the batches get smaller towards the end of a pass and the workers finish at about the same time
+    BATCHES_PER_WORKER = 2
+
+    # Lower limit of the shrinking batch budget, smaller batches would cost more in IPC than they save
+    MIN_BATCH_BYTES = 16 * 1024
+
+    def __init__(self, root_path: str, single_parse: bool = True, memory_budget_mb: int = 512,
+                 num_workers: Optional[int] = None, batch_bytes: int = DEFAULT_BATCH_BYTES,
+                 profile: Optional[IndexProfile] = None):
         self.root_path = Path(root_path).resolve()
 
-        # Separate indices for each category
-        self.namespace_index: List[IndexEntry] = []
-        self.interface_index: List[IndexEntry] = []
-        self.class_index: List[IndexEntry] = []
-        self.struct_index: List[IndexEntry] = []
-        self.enum_index: List[IndexEntry] = []
-        self.method_index: List[IndexEntry] = []
-        self.variable_index: List[IndexEntry] = []
+        # Phase times, and worker statistics if enabled
+        self.profile = profile or IndexProfile()
+
+        # Parse each file only once: pass 1 records the identifier occurrences and
+        # pass 2 resolves them in memory, instead of parsing all files again
+        self.single_parse = single_parse
+
+        # Separate indices for each category, sorted on disk beyond the memory budget
+        self.spill_budget = SpillBudget(memory_budget_mb)
+        self.namespace_index = ExternalSorter(self.spill_budget)
+        self.interface_index = ExternalSorter(self.spill_budget)
+        self.class_index = ExternalSorter(self.spill_budget)
+        self.struct_index = ExternalSorter(self.spill_budget)
+        self.enum_index = ExternalSorter(self.spill_budget)
+        self.method_index = ExternalSorter(self.spill_budget)
+        self.variable_index = ExternalSorter(self.spill_budget)
 
         # Track declared names for each category to detect usages
         self.declared_namespaces: Set[str] = set()
@@ -659,113 +2453,324 @@ class CSharpIndexer:
         self.declared_structs: Dict[str, Set[tuple]] = {}
         self.declared_enums: Dict[str, Set[tuple]] = {}
         self.declared_methods: Dict[str, Set[tuple]] = {}
+        self.declared_variables: Dict[str, Set[tuple]] = {}
+        self.declared_member_types: Dict[tuple, str] = {}
 
-        # Number of parallel workers (2x CPU cores)
-        self.num_workers = cpu_count() * 2
+        # Type declarations with their base lists, for the type hierarchy
+        self.type_bases: List[tuple] = []
 
-    @staticmethod
-    def _create_batches(files: List[Path], batch_size: int) -> List[List[Path]]:
-        """Split files into batches of specified size"""
-        batches = []
-        for i in range(0, len(files), batch_size):
-            batches.append(files[i:i + batch_size])
-        return batches
+        # Types attributed with object builders and the definition containers, for objectbuilders.sqlite
+        self.type_attributes: List[tuple] = []
+        self.definition_members: List[tuple] = []
 
-    def _merge_batch_results(self, batch_results: List[List[FileProcessingResult]]):
-        """Merge results from batched workers into the main indices"""
-        for batch in batch_results:
-            for result in batch:
-                self.namespace_index.extend(result.namespace_entries)
-                self.interface_index.extend(result.interface_entries)
-                self.class_index.extend(result.class_entries)
-                self.struct_index.extend(result.struct_entries)
-                self.enum_index.extend(result.enum_entries)
-                self.method_index.extend(result.method_entries)
-                self.variable_index.extend(result.variable_entries)
-
-    def _merge_batch_declarations(self, batch_results: List[List[FileProcessingResult]]):
-        """Merge declared names from batched pass 1 results"""
-        for batch in batch_results:
-            for result in batch:
-                self.declared_namespaces.update(result.declared_namespaces)
-
-                for name, locations in result.declared_interfaces.items():
-                    if name not in self.declared_interfaces:
-                        self.declared_interfaces[name] = set()
-                    self.declared_interfaces[name].update(locations)
-
-                for name, locations in result.declared_classes.items():
-                    if name not in self.declared_classes:
-                        self.declared_classes[name] = set()
-                    self.declared_classes[name].update(locations)
-
-                for name, locations in result.declared_structs.items():
-                    if name not in self.declared_structs:
-                        self.declared_structs[name] = set()
-                    self.declared_structs[name].update(locations)
-
-                for name, locations in result.declared_enums.items():
-                    if name not in self.declared_enums:
-                        self.declared_enums[name] = set()
-                    self.declared_enums[name].update(locations)
-
-                for name, locations in result.declared_methods.items():
-                    if name not in self.declared_methods:
-                        self.declared_methods[name] = set()
-                    self.declared_methods[name].update(locations)
-
-    def index_directory(self):
-        """Recursively index all C# files in the directory using parallel processing"""
-        cs_files = list(self.root_path.rglob('*.cs'))
-        total_files = len(cs_files)
-
-        print(f"Found {total_files} C# files to index...")
-        print(f"Using {self.num_workers} parallel workers")
+        # Number of parallel workers (2x CPU cores by default)
+        self.num_workers = num_workers or cpu_count() * 2
 
-        # Randomize file order for better load distribution
-        random.shuffle(cs_files)
-
-        # Create batches of 32 files each for more efficient IPC
-        batch_size = 32
-        batches = self._create_batches(cs_files, batch_size)
-        print(f"Processing in {len(batches)} batches of up to {batch_size} files each")
-
-        # First pass: collect all declarations in parallel
-        print("\nPass 1: Collecting declarations...")
-        root_path_str = str(self.root_path)
-        pass1_args = [(batch, root_path_str, False, None) for batch in batches]
-
-        with Pool(processes=self.num_workers) as pool:
-            pass1_results = list(pool.imap_unordered(_process_batch_worker, pass1_args))
-
-        # Merge declaration results
-        self._merge_batch_results(pass1_results)
-        self._merge_batch_declarations(pass1_results)
-        print(f"Completed pass 1: {total_files} files.")
-
-        # Build shared declarations dict for pass 2
-        shared_declarations = {
-            'namespaces': self.declared_namespaces,
-            'interfaces': self.declared_interfaces,
-            'classes': self.declared_classes,
-            'structs': self.declared_structs,
-            'enums': self.declared_enums,
-            'methods': self.declared_methods
-        }
+        # Maximum total size of the files sent to a worker at once for more efficient IPC
+        self.batch_bytes = batch_bytes
+
+        # Worker pool shared by both passes
+        self._pool: Optional[Pool] = None
+
+    def _create_batches(self, files: List[Path]) -> List[List[Path]]:
+        """Split files into batches by size, the largest files first
+
+        Each batch is filled up to the byte budget, which is also limited to a share of the
+        remaining bytes (guided scheduling). The large files are processed early, often in
+        batches of their own, while the batches of small files at the end keep all workers busy.
+        A file larger than the budget makes a batch on its own.
+        """
+        return self._split_batches([(file_path.stat().st_size, file_path) for file_path in files])
+
+    def _split_batches(self, sized_items: List[tuple]) -> List[list]:
+        """Split (size, item) pairs into batches of items like _create_batches, the largest first"""
+        sized_files = sorted(sized_items, reverse=True)
+        remaining_bytes = sum(size for size, _ in sized_files)
+
+        batches = []
+        batch = []
+        batch_bytes = 0
+        budget = 0
+        for size, file_path in sized_files:
+            if batch and batch_bytes + size > budget:
+                batches.append(batch)
+                batch = []
+                batch_bytes = 0
+
+            if not batch:
+                share = remaining_bytes // (self.num_workers * self.BATCHES_PER_WORKER)
+                budget = min(self.batch_bytes, max(share, self.MIN_BATCH_BYTES))
+
+            batch.append(file_path)
+            batch_bytes += size
+            remaining_bytes -= size
+
+        if batch:
+            batches.append(batch)
 
-        # Second pass: collect usages in parallel
-        print("\nPass 2: Collecting usages...")
-        pass2_args = [(batch, root_path_str, True, shared_declarations) for batch in batches]
+        return batches
 
-        with Pool(processes=self.num_workers) as pool:
-            pass2_results = list(pool.imap_unordered(_process_batch_worker, pass2_args))
+    def _merge_entries(self, file_entries: Iterable[List[EntryColumns]]):
+        """Merge per-file entries (in index file order) into the main indices"""
+        indices = [
+            self.namespace_index,
+            self.interface_index,
+            self.class_index,
+            self.struct_index,
+            self.enum_index,
+            self.method_index,
+            self.variable_index
+        ]
+        for entries_by_category in file_entries:
+            for index, entries in zip(indices, entries_by_category):
+                if len(entries):
+                    index.extend(entries)
+
+    def _merge_declarations(self, results: Iterable[FileProcessingResult]):
+        """Merge declared names from per-file pass 1 results"""
+        for result in results:
+            self.declared_namespaces.update(result.declared_namespaces)
+            self.type_bases.extend(result.type_bases)
+            self.type_attributes.extend(result.type_attributes)
+            self.definition_members.extend(result.definition_members)
+
+            for name, locations in result.declared_interfaces.items():
+                if name not in self.declared_interfaces:
+                    self.declared_interfaces[name] = set()
+                self.declared_interfaces[name].update(locations)
+
+            for name, locations in result.declared_classes.items():
+                if name not in self.declared_classes:
+                    self.declared_classes[name] = set()
+                self.declared_classes[name].update(locations)
+
+            for name, locations in result.declared_structs.items():
+                if name not in self.declared_structs:
+                    self.declared_structs[name] = set()
+                self.declared_structs[name].update(locations)
+
+            for name, locations in result.declared_enums.items():
+                if name not in self.declared_enums:
+                    self.declared_enums[name] = set()
+                self.declared_enums[name].update(locations)
+
+            for name, locations in result.declared_methods.items():
+                if name not in self.declared_methods:
+                    self.declared_methods[name] = set()
+                self.declared_methods[name].update(locations)
+
+            for name, locations in result.declared_variables.items():
+                if name not in self.declared_variables:
+                    self.declared_variables[name] = set()
+                self.declared_variables[name].update(locations)
+
+            # Types of the same name in different namespaces may declare the member with different types
+            for key, member_type in result.declared_member_types.items():
+                if self.declared_member_types.get(key, member_type) != member_type:
+                    member_type = ''
+                self.declared_member_types[key] = member_type
+
+    def _base_type_names(self) -> Dict[str, List[str]]:
+        """Return the names of the direct base types by type name, merged over partial and same named types"""
+        bases: Dict[str, List[str]] = {}
+        for _, name, _, _, _, type_bases in sorted(self.type_bases):
+            names = bases.setdefault(name, [])
+            for _, base_name in type_bases:
+                if base_name not in names and base_name != name:
+                    names.append(base_name)
+        return bases
+
+    def _get_pool(self) -> Pool:
+        """Return the worker pool, it is created on first use and reused by both passes"""
+        if self._pool is None:
+            self._pool = Pool(processes=self.num_workers, initializer=_init_worker, initargs=(str(self.root_path),))
+        return self._pool
+
+    def _close_pool(self):
+        """Shut down the worker pool if it has been created"""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def _run_batches(self, files: List[Path], collect_usages: bool, declarations_path: Optional[str], pass_name: str):
+        """Process the files in parallel batches, yields (relative path, result) pairs
+
+        The shared declarations are not sent with the batches. Pass 2 workers load them
+        from the declarations file once, then reuse them for all subsequent batches.
+        """
+        if not files:
+            return
 
-        # Merge usage results
-        self._merge_batch_results(pass2_results)
-        print(f"Completed pass 2: {total_files} files.")
+        # Batches are handed out one at a time to the next idle worker, the largest first
+        batches = self._create_batches(files)
+        record_occurrences = self.single_parse and not collect_usages
+        profile = self.profile.enabled
+        args = [(batch, collect_usages, record_occurrences, declarations_path, profile) for batch in batches]
+
+        if profile:
+            self.profile.start_pass(pass_name, self.num_workers)
+            self.profile.ipc_bytes['to_workers'] += sum(len(pickle.dumps(batch_args, pickle.HIGHEST_PROTOCOL))
+                                                        for batch_args in args)
+        for batch_results, stats in self._get_pool().imap_unordered(_process_batch_worker, args, chunksize=1):
+            if stats is not None:
+                self.profile.add_batch(pass_name, stats)
+            yield from batch_results
+        if profile:
+            self.profile.end_pass(pass_name)
+
+    def _run_resolve_batches(self, manifest: IndexManifest, relative_paths: Set[str], declarations_path: str):
+        """Resolve the occurrences recorded in pass 1 in parallel batches, yields (relative path, result) pairs
+
+        The occurrences are read from the manifest only a few batches ahead of the workers, so those
+        of all files are never in memory at once. The batches are the largest first like in pass 1.
+        """
+        batches = self._split_batches(manifest.occurrence_sizes(relative_paths))
+        if not batches:
+            return
 
-    def write_indices(self, output_dir: Path):
-        """Write all indices to CSV files"""
+        profile = self.profile.enabled
+        if profile:
+            self.profile.start_pass('pass 2', self.num_workers)
+
+        def collect(async_result):
+            batch_results, stats = async_result.get()
+            if stats is not None:
+                self.profile.add_batch('pass 2', stats)
+            return batch_results
+
+        pool = self._get_pool()
+        pending = deque()
+        for batch in batches:
+            args = (list(manifest.iter_occurrences(batch)), declarations_path, profile)
+            if profile:
+                self.profile.ipc_bytes['to_workers'] += len(pickle.dumps(args, pickle.HIGHEST_PROTOCOL))
+            pending.append(pool.apply_async(_resolve_batch_worker, (args,)))
+            if len(pending) >= self.num_workers * self.BATCHES_PER_WORKER:
+                yield from collect(pending.popleft())
+        while pending:
+            yield from collect(pending.popleft())
+
+        if profile:
+            self.profile.end_pass('pass 2')
+
+    def _run_pass1(self, manifest: IndexManifest, files: List[Path], forget_missing: bool) -> List[Path]:
+        """Collect the declarations of the changed files among the given ones, returns the changed files"""
+        with self.profile.phase('change detection'):
+            stale_files = manifest.find_stale_files(files, self.root_path, forget_missing)
+        with self.profile.phase('pass 1'):
+            for relative_path, result in self._run_batches(stale_files, False, None, 'pass 1'):
+                manifest.store_declarations(relative_path, result)
+        return stale_files
+
+    def index_directory(self, manifest_path: Optional[Path] = None, rebuild: bool = False,
+                        ready_directories: Optional[Iterable[Path]] = None):
+        """Recursively index all C# files in the directory using parallel processing
+
+        If a manifest path is given, then the results are persisted there and only the files
+        changed since the previous run are parsed again. Usages are resolved again only in the
+        changed files and the files referencing names whose declarations changed.
+
+        The ready directories are subdirectories of the root yielded as soon as their files are
+        complete, like the assembly folders during decompilation. Pass 1 runs on each of them as
+        it arrives, then on the rest of the tree once the iteration ends. Pass 2 needs all the
+        declarations, so it waits for the end of the iteration.
+        """
+        profile = self.profile
+        print(f"Using {self.num_workers} parallel workers")
+        print(f"Processing in batches of up to {self.batch_bytes // 1024} KB each, the largest files first")
+
+        manifest = IndexManifest(manifest_path, rebuild, {'single_parse': self.single_parse})
+        try:
+            # First pass: collect declarations of the changed files in parallel
+            print("\nPass 1: Collecting declarations...")
+            stale_files = []
+            seen_files: Set[Path] = set()
+            for directory in ready_directories or ():
+                with profile.phase('file discovery'):
+                    files = [path for path in Path(directory).resolve().rglob('*.cs') if path not in seen_files]
+                seen_files.update(files)
+                stale_files.extend(self._run_pass1(manifest, files, False))
+                print(f"Collected declarations in {directory}: {len(files)} files")
+
+            with profile.phase('file discovery'):
+                cs_files = list(self.root_path.rglob('*.cs'))
+            total_files = len(cs_files)
+            print(f"Found {total_files} C# files to index...")
+
+            stale_files.extend(self._run_pass1(manifest, [path for path in cs_files if path not in seen_files],
+                                                not seen_files))
+            if seen_files:
+                with profile.phase('change detection'):
+                    manifest.forget_files_except({str(path.relative_to(self.root_path)) for path in cs_files})
+            print(f"Files changed since the last run: {len(stale_files)}")
+
+            # Merge declaration results
+            with profile.phase('declaration merge'):
+                self._merge_declarations(manifest.iter_declarations())
+            print(f"Completed pass 1: {len(stale_files)} files.")
+
+            # Build shared declarations dict for pass 2
+            shared_declarations = {
+                'namespaces': self.declared_namespaces,
+                'interfaces': self.declared_interfaces,
+                'classes': self.declared_classes,
+                'structs': self.declared_structs,
+                'enums': self.declared_enums,
+                'methods': self.declared_methods,
+                'variables': self.declared_variables,
+                'member_types': self.declared_member_types,
+                'bases': self._base_type_names()
+            }
+
+            # Usages must be resolved again where a referenced name got declared or undeclared
+            with profile.phase('declaration merge'):
+                previous_declarations = manifest.get_meta('declarations')
+                if previous_declarations is None:
+                    pass2_paths = {str(file_path.relative_to(self.root_path)) for file_path in cs_files}
+                else:
+                    changed_names = _changed_declaration_names(previous_declarations, shared_declarations)
+                    print(f"Names with changed declarations: {len(changed_names)}")
+                    pass2_paths = set(manifest.find_files_referencing(changed_names))
+                    pass2_paths.update(str(file_path.relative_to(self.root_path)) for file_path in stale_files)
+
+            with profile.phase('pass 2'):
+                # Serialize the shared declarations once for the workers to load
+                with tempfile.NamedTemporaryFile('wb', suffix='.pickle', delete=False) as f:
+                    pickle.dump(shared_declarations, f, pickle.HIGHEST_PROTOCOL)
+                    declarations_path = f.name
+                try:
+                    if self.single_parse:
+                        # Second pass: resolve the occurrences recorded in pass 1 in parallel without parsing again
+                        print("\nPass 2: Resolving usages...")
+                        results = self._run_resolve_batches(manifest, pass2_paths, declarations_path)
+                    else:
+                        # Second pass: collect usages in parallel
+                        print("\nPass 2: Collecting usages...")
+                        pass2_files = [self.root_path / relative_path for relative_path in sorted(pass2_paths)]
+                        results = self._run_batches(pass2_files, True, declarations_path, 'pass 2')
+                    for relative_path, result in results:
+                        manifest.store_usages(relative_path, result)
+                finally:
+                    os.remove(declarations_path)
+            print(f"Completed pass 2: {len(pass2_paths)} files.")
+
+            # Merge the declarations and usages of all files, including the unchanged ones
+            with profile.phase('result merge'):
+                self._merge_entries(manifest.iter_entry_columns('declarations'))
+                self._merge_entries(manifest.iter_entry_columns('usages'))
+
+            with profile.phase('manifest save'):
+                manifest.set_meta('declarations', shared_declarations)
+                manifest.save()
+
+            profile.counts.update(files=total_files, changed_files=len(stale_files), pass2_files=len(pass2_paths))
+        finally:
+            self._close_pool()
+            manifest.close()
+
+    def write_indices(self, output_dir: Path, write_sqlite: bool = False):
+        """Write all indices to CSV files, optionally also into an index.sqlite database"""
         output_dir.mkdir(parents=True, exist_ok=True)
 
         # Sort and write each index
@@ -779,30 +2784,66 @@ class CSharpIndexer:
             ('variables.csv', self.variable_index)
         ]
 
-        for filename, index_data in indices:
-            # Sort by all columns left to right
-            sorted_data = sorted(
-                index_data,
-                key=lambda e: (
-                    e.namespace,
-                    e.containing_type,
-                    e.method,
-                    e.variable_name,
-                    e.entry_type,
-                    e.file_path,
-                    e.start_line,
-                    e.end_line
-                )
-            )
+        keys_dir = output_dir / 'keys'
+        keys_dir.mkdir(exist_ok=True)
+        header = IndexEntry.csv_header()
 
-            output_path = output_dir / filename
-            print(f"Writing {len(sorted_data)} entries to {output_path}...")
-
-            with open(output_path, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(IndexEntry.csv_header())
-                for entry in sorted_data:
-                    writer.writerow(entry.to_csv_row())
+        database = SqliteIndexWriter(output_dir / 'index.sqlite') if write_sqlite else None
+        call_graph = CallGraphWriter(output_dir / 'callgraph.sqlite')
+        try:
+            for filename, index_data in indices:
+                output_path = output_dir / filename
+                print(f"Writing {len(index_data)} entries to {output_path}...")
+
+                category = output_path.stem
+                key_files = [
+                    (header.index(column), KeyFileWriter(keys_dir / f'{category}.{column}.keys', column))
+                    for column in KEY_COLUMNS[category]
+                ]
+
+                # Rows come sorted by all columns left to right, merged from the sorted runs while writing
+                with self.profile.phase('sort'):
+                    rows = iter(index_data)
+
+                with self.profile.phase('write'), open(output_path, 'wb') as f:
+                    output = CountingWriter(f)
+                    writer = csv.writer(output)
+                    writer.writerow(header)
+                    for row in rows:
+                        for column_index, key_file in key_files:
+                            key_file.add(row[column_index], output.position)
+                        writer.writerow(row)
+                        if database is not None:
+                            database.add(category, row)
+                        call_graph.add(category, row)
+
+                with self.profile.phase('key files'):
+                    for _, key_file in key_files:
+                        key_file.write(output.position)
+
+            if database is not None:
+                print(f"Creating the indexes of {database.path}...")
+                with self.profile.phase('sqlite indexes'):
+                    database.finish()
+                database = None
+
+            with self.profile.phase('call graph'):
+                call_graph.finish()
+            call_graph = None
+
+            with self.profile.phase('type hierarchy'):
+                TypeHierarchyWriter(output_dir / 'hierarchy.sqlite').write(
+                    self.type_bases, self.declared_classes, self.declared_interfaces, self.declared_structs)
+
+            with self.profile.phase('object builders'):
+                ObjectBuilderWriter(output_dir / 'objectbuilders.sqlite').write(
+                    self.type_bases, self.type_attributes, self.definition_members)
+        finally:
+            if database is not None:
+                database.abort()
+            if call_graph is not None:
+                call_graph.abort()
+            self.spill_budget.cleanup()
 
         print(f"\nIndex files written to {output_dir}")
         print(f"  - Namespaces: {len(self.namespace_index)} entries")
@@ -815,27 +2856,62 @@ class CSharpIndexer:
 
 
 def main():
-    if len(sys.argv) != 3:
-        print("Usage: python index_code.py <source_root_path> <output_directory>")
-        sys.exit(1)
-
-    source_root = sys.argv[1]
-    output_dir = sys.argv[2]
+    parser = argparse.ArgumentParser(description='Index C# source files into CSV files')
+    parser.add_argument('source_root', help='Root directory of the C# source tree')
+    parser.add_argument('output_dir', help='Directory to write the index files into')
+    parser.add_argument('--rebuild', action='store_true',
+                        help='Ignore the manifest of the previous run and index every file again')
+    parser.add_argument('--two-pass', action='store_true',
+                        help='Parse the files again in pass 2 instead of keeping the identifier occurrences from pass 1')
+    parser.add_argument('--sqlite', action='store_true',
+                        help='Also write all entries into an index.sqlite database for faster searches')
+    parser.add_argument('--memory-budget', type=int, default=512, metavar='MB',
+                        help='Memory for sorting the entries, beyond that sorted runs are spilled to disk (default: 512)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Number of worker processes (default: 2x the number of CPU cores)')
+    parser.add_argument('--batch-bytes', type=int, default=CSharpIndexer.DEFAULT_BATCH_BYTES,
+                        help='Maximum total size of the files sent to a worker at once '
+                             f'(default: {CSharpIndexer.DEFAULT_BATCH_BYTES})')
+    parser.add_argument('--profile', metavar='REPORT_JSON',
+                        help='Write a JSON report of the phase times, worker utilization, peak memory usage, '
+                             'IPC volume and the slowest files')
+    args = parser.parse_args()
+
+    source_root = args.source_root
+    output_dir = args.output_dir
 
     if not os.path.isdir(source_root):
         print(f"Error: Source path '{source_root}' is not a directory")
         sys.exit(1)
 
-    # Increase recursion limit for deeply nested code (default is 1000)
-    sys.setrecursionlimit(10000)
-
     print(f"Indexing C# codebase at: {source_root}")
     print(f"Output directory: {output_dir}")
     print()
 
-    indexer = CSharpIndexer(source_root)
-    indexer.index_directory()
-    indexer.write_indices(Path(output_dir))
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+
+    if args.workers is not None and args.workers < 1:
+        print("Error: The number of workers must be positive")
+        sys.exit(1)
+
+    profile = IndexProfile(enabled=args.profile is not None)
+    indexer = CSharpIndexer(source_root, single_parse=not args.two_pass, memory_budget_mb=args.memory_budget,
+                            num_workers=args.workers, batch_bytes=args.batch_bytes, profile=profile)
+    indexer.index_directory(Path(output_dir) / 'manifest.sqlite', args.rebuild)
+    indexer.write_indices(Path(output_dir), args.sqlite)
+
+    if args.profile:
+        settings = {
+            'source_root': str(indexer.root_path),
+            'workers': indexer.num_workers,
+            'batch_bytes': indexer.batch_bytes,
+            'single_parse': indexer.single_parse,
+            'memory_budget_mb': args.memory_budget,
+            'rebuild': args.rebuild,
+            'sqlite': args.sqlite,
+        }
+        profile.write(Path(args.profile), settings)
+        print(f"\nProfile report written to {args.profile}")
 
     print("\nIndexing complete!")
 
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Content Definition Indexer
+
+This script indexes the definitions in the .sbc and .sbl files of the copied game Content
+folder. For every definition it records the TypeId and SubtypeId of its Id, its xsi:type,
+its DisplayName, the element names and the line range in its file into a content.sqlite
+database, which search_content.py looks up instead of grepping hundreds of megabytes of XML.
+
+A definition is an element with an Id child under a container element of the root, like
+<Definitions><CubeBlocks><Definition>, or directly under the root, like
+<Definitions><Environment>. The Id is either written as TypeId and SubtypeId child elements
+or as Type/TypeId and Subtype/SubtypeId attributes.
+
+The files are parsed in parallel processes, the largest first, with lxml's pull parser. The
+elements are cleared as soon as they are read, so the memory use does not grow with the
+file size. Unchanged files (same size and modification time) are not parsed again, unless
+--rebuild is given, see incremental_indexer.py.
+
+Usage:
+    python index_content.py [--rebuild] [--workers N] <content_directory> <output_directory>
+"""
+
+import sqlite3
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from lxml import etree
+
+import incremental_indexer
+from incremental_indexer import IncrementalIndexer
+
+DATABASE_NAME = 'content.sqlite'
+
+# Extensions of the XML files holding definitions
+CONTENT_EXTENSIONS = ('.sbc', '.sbl')
+
+# Prefix of the object builder class names, omitted in the TypeId of most definitions
+OBJECT_BUILDER_PREFIX = 'MyObjectBuilder_'
+
+XSI_TYPE = '{http://www.w3.org/2001/XMLSchema-instance}type'
+
+
+def short_type_id(type_id: str) -> str:
+    """Return the TypeId without the MyObjectBuilder_ prefix, e.g. CubeBlock"""
+    return type_id[len(OBJECT_BUILDER_PREFIX):] if type_id.startswith(OBJECT_BUILDER_PREFIX) else type_id
+
+
+def _child_text(element, tag: str) -> str:
+    """Return the stripped text of the first child element with the tag, empty if missing"""
+    child = element.find(tag)
+    return (child.text or '').strip() if child is not None else ''
+
+
+def parse_content_file(path: Path) -> Tuple[List[tuple], Optional[str]]:
+    """Parse a content file, returns (category, tag, type_id, subtype_id, xsi_type, display_name, start_line, end_line)
+    tuples and the parse error, if any, in which case the definitions before the error are returned
+
+    The file is fed line by line to lxml's pull parser, the incremental form of iterparse, so the line of each
+    event is known. The source lines libxml2 records are the ends of the start tags and are off by one beyond
+    line 65535. The definitions and their containers are cleared as soon as they are read.
+    """
+    definitions = []
+    parser = etree.XMLPullParser(events=('start', 'end', 'comment', 'pi'), huge_tree=True)
+    depth = 0
+    start_lines = {}
+    event_line = 1
+    try:
+        with open(path, 'rb') as f:
+            for line_number, line in enumerate(f, 1):
+                parser.feed(line)
+                for event, element in parser.read_events():
+                    if event == 'start':
+                        if depth in (1, 2):
+                            # The start tag follows the previous event and the text after it
+                            sibling = element.getprevious()
+                            text = element.getparent().text if sibling is None else sibling.tail
+                            start_lines[depth] = event_line + (text or '').count('\n')
+                        depth += 1
+                    elif event == 'end':
+                        depth -= 1
+                        if depth in (1, 2):
+                            _read_definition(element, depth, start_lines[depth], line_number, definitions)
+                    event_line = line_number
+        parser.close()
+    except (etree.XMLSyntaxError, OSError) as e:
+        return definitions, str(e)
+
+    return definitions, None
+
+
+def _read_definition(element, depth: int, start_line: int, end_line: int, definitions: List[tuple]):
+    """Record the element at depth 1 or 2 if it is a definition, then free it and the siblings before it"""
+    parent = element.getparent()
+    if depth == 2 and parent.find('Id') is not None:
+        # Part of a definition directly under the root, which is cleared as a whole
+        return
+
+    id_element = element.find('Id')
+    if id_element is not None:
+        definitions.append((
+            parent.tag if depth == 2 else '',
+            element.tag,
+            _child_text(id_element, 'TypeId') or id_element.get('TypeId') or id_element.get('Type') or '',
+            _child_text(id_element, 'SubtypeId') or id_element.get('SubtypeId') or id_element.get('Subtype') or '',
+            element.get(XSI_TYPE, ''),
+            _child_text(element, 'DisplayName'),
+            start_line,
+            end_line,
+        ))
+
+    # The element itself is kept with its tail, the text before the next sibling
+    element.clear(keep_tail=True)
+    while element.getprevious() is not None:
+        del parent[0]
+
+
+def _parse_file_worker(path: str) -> Tuple[str, List[tuple], Optional[str]]:
+    """Pool worker, parses one content file"""
+    return (path,) + parse_content_file(Path(path))
+
+
+class ContentIndexer(IncrementalIndexer):
+    """Indexes the definitions of the content files under a directory into an SQLite database"""
+
+    DATABASE_NAME = DATABASE_NAME
+    FILE_KIND = 'content file'
+    ROW_KIND = 'definition'
+    FILES_TABLE = 'content_files'
+    ROWS_TABLE = 'definitions'
+    SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS definitions (
+            id INTEGER PRIMARY KEY, file_id INTEGER, category TEXT, tag TEXT, type_id TEXT, type_name TEXT,
+            subtype_id TEXT, xsi_type TEXT, display_name TEXT, start_line INTEGER, end_line INTEGER);
+        CREATE INDEX IF NOT EXISTS definitions_type_name ON definitions (type_name, subtype_id);
+        CREATE INDEX IF NOT EXISTS definitions_subtype_id ON definitions (subtype_id);
+        CREATE INDEX IF NOT EXISTS definitions_xsi_type ON definitions (xsi_type);
+        CREATE INDEX IF NOT EXISTS definitions_display_name ON definitions (display_name);
+        CREATE INDEX IF NOT EXISTS definitions_file ON definitions (file_id);
+    '''
+    parse_worker = staticmethod(_parse_file_worker)
+
+    def find_files(self) -> List[Path]:
+        return [path for path in self.root_path.rglob('*')
+                if path.suffix.lower() in CONTENT_EXTENSIONS and path.is_file()]
+
+    def _delete_rows(self, connection: sqlite3.Connection, file_id: int):
+        connection.execute('DELETE FROM definitions WHERE file_id = ?', (file_id,))
+
+    def _insert_rows(self, connection: sqlite3.Connection, file_id: int, definitions: List[tuple]):
+        connection.executemany(
+            'INSERT INTO definitions (file_id, category, tag, type_id, type_name, subtype_id, xsi_type, display_name, '
+            'start_line, end_line) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            [(file_id, category, tag, type_id, short_type_id(type_id), subtype_id, xsi_type, display_name,
+              start_line, end_line)
+             for category, tag, type_id, subtype_id, xsi_type, display_name, start_line, end_line in definitions]
+        )
+
+
+def main():
+    incremental_indexer.main(ContentIndexer, 'Index the definitions of the .sbc and .sbl content files',
+                             'Content directory', 'Content directory copied from the game (Content)')
+
+
+if __name__ == '__main__':
+    main()
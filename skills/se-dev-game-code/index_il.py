@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+IL Method Indexer
+
+This script indexes the IL code files written by ilspycmd --ilcode into the decompiled
+assembly folders. For every method it records the byte range of its IL listing in the
+.il file, its signature, and the members it calls or accesses (call, callvirt, newobj,
+ldftn, ldvirtftn and the field loads and stores), into an il.sqlite database.
+
+search_il.py looks up a method in the database and reads only its byte range from the
+.il file, instead of searching through the multi-megabyte IL files.
+
+The .il files are parsed in parallel processes, the largest first. Unchanged .il files
+(same size and modification time) are not parsed again, unless --rebuild is given, see
+incremental_indexer.py.
+
+Usage:
+    python index_il.py [--rebuild] [--workers N] <decompiled_directory> <output_directory>
+"""
+
+import re
+import sqlite3
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import incremental_indexer
+from incremental_indexer import IncrementalIndexer
+
+DATABASE_NAME = 'il.sqlite'
+
+# Instructions whose operand is a method or field reference
+REFERENCE_OPCODES = {
+    b'call', b'callvirt', b'newobj', b'ldftn', b'ldvirtftn',
+    b'ldfld', b'ldflda', b'stfld', b'ldsfld', b'ldsflda', b'stsfld',
+}
+
+# Keywords between .class and the type name
+CLASS_FLAGS = {
+    'public', 'private', 'nested', 'family', 'assembly', 'famandassem', 'famorassem', 'auto', 'ansi',
+    'sequential', 'explicit', 'sealed', 'abstract', 'interface', 'beforefieldinit', 'specialname',
+    'rtspecialname', 'serializable', 'import', 'unicode', 'autochar', 'windowsruntime',
+}
+
+INSTRUCTION = re.compile(rb'\s*IL_[0-9a-fA-F]+:\s+([a-z0-9.]+)\s+(.*?)\s*$')
+END_OF_METHOD = re.compile(rb'\s*\} // end of method (.*)::(.*?)\s*$')
+END_OF_CLASS = re.compile(rb'\s*\} // end of class ')
+# Innermost generic arguments of a type reference, they follow the number of type parameters
+GENERIC_ARGUMENTS = re.compile(r'(`\d+)<[^<>]*>')
+
+
+def short_type_name(type_name: str) -> str:
+    """Return the type name without the namespace and the enclosing types, e.g. MyCubeBlock"""
+    return type_name.rsplit('/', 1)[-1].rsplit('.', 1)[-1]
+
+
+def parse_member_reference(operand: str) -> Optional[Tuple[str, str]]:
+    """Return the declaring type (without assembly and generic arguments) and the member name of an operand
+
+    For example 'instance void class [VRage]VRage.MyList`1<int32>::Add(!0)' gives ('VRage.MyList`1', 'Add').
+    """
+    separator = operand.find('::')
+    if separator < 0:
+        return None
+
+    # The declaring type ends at the separator and starts after the last space outside of generic arguments
+    depth = 0
+    start = 0
+    for index in range(separator - 1, -1, -1):
+        char = operand[index]
+        if char == '>':
+            depth += 1
+        elif char == '<':
+            depth -= 1
+        elif char == ' ' and depth == 0:
+            start = index + 1
+            break
+    declaring_type = operand[start:separator]
+    if declaring_type.startswith('['):
+        declaring_type = declaring_type[declaring_type.find(']') + 1:]
+    while '<' in declaring_type:
+        stripped = GENERIC_ARGUMENTS.sub(r'\1', declaring_type)
+        if stripped == declaring_type:
+            break
+        declaring_type = stripped
+
+    member = operand[separator + 2:]
+    if member.startswith("'"):
+        return declaring_type, member[:member.find("'", 1) + 1]
+    end = len(member)
+    for char in '(< ':
+        position = member.find(char)
+        if 0 <= position < end:
+            end = position
+    return declaring_type, member[:end]
+
+
+def parse_class_name(header: str) -> str:
+    """Return the type name of a .class header line, without the generic parameters"""
+    words = header.split()[1:]
+    while words and words[0] in CLASS_FLAGS:
+        words.pop(0)
+    name = ' '.join(words)
+    if name.startswith("'"):
+        # Quoted compiler generated name, like '<>c__DisplayClass12_0'
+        return name[:name.find("'", 1) + 1]
+    return name.split('<', 1)[0].strip()
+
+
+def parse_il_file(path: Path) -> List[tuple]:
+    """Parse an .il file, returns (type, method, signature, start_byte, end_byte, start_line, references) tuples
+
+    The references are (opcode, declaring type, member name, operand) tuples. Only the lines
+    starting a class, method or instruction are decoded, the rest is skipped as bytes.
+    """
+    methods = []
+    type_stack: List[str] = []
+
+    # State of the method being read, its header lines are collected up to the opening brace
+    method_start = -1
+    method_line = 0
+    header: List[bytes] = []
+    in_header = False
+    references: List[tuple] = []
+
+    offset = 0
+    with open(path, 'rb') as f:
+        for line_number, line in enumerate(f, 1):
+            line_start = offset
+            offset += len(line)
+            stripped = line.lstrip()
+            first = stripped[:1]
+
+            if in_header:
+                if first == b'{':
+                    in_header = False
+                else:
+                    header.append(stripped.strip())
+                continue
+
+            if first == b'I':
+                match = INSTRUCTION.match(line)
+                if match and match.group(1) in REFERENCE_OPCODES and method_start >= 0:
+                    operand = match.group(2).decode('utf-8', 'replace')
+                    target = parse_member_reference(operand)
+                    if target is not None:
+                        references.append((match.group(1).decode('ascii'), target[0], target[1], operand))
+            elif first == b'.':
+                if stripped.startswith(b'.method '):
+                    method_start = line_start
+                    method_line = line_number
+                    header = [stripped.strip()]
+                    in_header = True
+                    references = []
+                elif stripped.startswith(b'.class '):
+                    type_name = parse_class_name(stripped.decode('utf-8', 'replace'))
+                    type_stack.append(type_name if not type_stack else f'{type_stack[-1]}/{type_name}')
+            elif first == b'}':
+                match = END_OF_METHOD.match(line)
+                if match and method_start >= 0:
+                    signature = ' '.join(b' '.join(header).decode('utf-8', 'replace').split())
+                    methods.append((
+                        type_stack[-1] if type_stack else match.group(1).decode('utf-8', 'replace'),
+                        match.group(2).decode('utf-8', 'replace'),
+                        signature[len('.method '):],
+                        method_start,
+                        offset,
+                        method_line,
+                        references,
+                    ))
+                    method_start = -1
+                elif END_OF_CLASS.match(line) and type_stack:
+                    type_stack.pop()
+
+    return methods
+
+
+def _parse_file_worker(path: str) -> Tuple[str, List[tuple], None]:
+    """Pool worker, parses one .il file"""
+    return path, parse_il_file(Path(path)), None
+
+
+class ILIndexer(IncrementalIndexer):
+    """Indexes the methods of the .il files under a directory into an SQLite database"""
+
+    DATABASE_NAME = DATABASE_NAME
+    FILE_KIND = 'IL file'
+    ROW_KIND = 'method'
+    FILES_TABLE = 'il_files'
+    ROWS_TABLE = 'il_methods'
+    SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS il_methods (
+            id INTEGER PRIMARY KEY, file_id INTEGER, type TEXT, type_name TEXT, method TEXT, signature TEXT,
+            start_byte INTEGER, end_byte INTEGER, start_line INTEGER);
+        CREATE TABLE IF NOT EXISTS il_references (
+            method_id INTEGER, opcode TEXT, target_type TEXT, target_type_name TEXT, target_member TEXT,
+            operand TEXT);
+        CREATE INDEX IF NOT EXISTS il_methods_type_name ON il_methods (type_name, method);
+        CREATE INDEX IF NOT EXISTS il_methods_type ON il_methods (type, method);
+        CREATE INDEX IF NOT EXISTS il_methods_method ON il_methods (method);
+        CREATE INDEX IF NOT EXISTS il_methods_file ON il_methods (file_id);
+        CREATE INDEX IF NOT EXISTS il_references_method ON il_references (method_id);
+        CREATE INDEX IF NOT EXISTS il_references_target ON il_references (target_member, target_type_name);
+    '''
+    PRINT_FILES = True
+    parse_worker = staticmethod(_parse_file_worker)
+
+    def find_files(self) -> List[Path]:
+        return list(self.root_path.rglob('*.il'))
+
+    def _delete_rows(self, connection: sqlite3.Connection, file_id: int):
+        connection.execute('DELETE FROM il_references WHERE method_id IN (SELECT id FROM il_methods WHERE file_id = ?)',
+                           (file_id,))
+        connection.execute('DELETE FROM il_methods WHERE file_id = ?', (file_id,))
+
+    def _insert_rows(self, connection: sqlite3.Connection, file_id: int, methods: List[tuple]):
+        # Insert all rows of the file at once, with the method ids assigned here
+        first_id = connection.execute('SELECT COALESCE(MAX(id), 0) + 1 FROM il_methods').fetchone()[0]
+        method_rows = []
+        reference_rows = []
+        for method_id, (type_name, method, signature, start_byte, end_byte, start_line, references) in enumerate(
+                methods, first_id):
+            method_rows.append((method_id, file_id, type_name, short_type_name(type_name), method, signature,
+                                start_byte, end_byte, start_line))
+            reference_rows.extend((method_id, opcode, target_type, short_type_name(target_type), member, operand)
+                                  for opcode, target_type, member, operand in references)
+        connection.executemany('INSERT INTO il_methods VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', method_rows)
+        connection.executemany('INSERT INTO il_references VALUES (?, ?, ?, ?, ?, ?)', reference_rows)
+
+
+def main():
+    incremental_indexer.main(
+        ILIndexer, 'Index the methods of the IL code written by ilspycmd --ilcode',
+        'Decompiled directory', 'Directory containing the decompiled assemblies with the .il files')
+
+
+if __name__ == '__main__':
+    main()
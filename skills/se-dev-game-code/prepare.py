@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Preparation Pipeline
+
+Decompiles the game assemblies, copies the indexable content and indexes the decompiled
+code like running decompile.py, copy_content.py and index_code.py one after another, but
+overlapping the steps to shorten the preparation:
+
+- The ilspycmd jobs of decompile.py run in a background thread
+- Pass 1 of the indexer collects the declarations of each assembly as soon as its C# project
+  is exported, while the other assemblies are still being decompiled
+- The content files are copied in another thread, if the Content folder does not exist yet,
+  from the game folder given by SPACE_ENGINEERS_ROOT, or else the parent of the --bin-dir folder
+- Only pass 2 of the indexer waits for the last assembly, then the index files are written
+- Finally the methods in the IL code files are indexed into il.sqlite by index_il.py and the
+  definitions in the content files into content.sqlite by index_content.py
+
+Usage:
+    python prepare.py [--bin-dir DIR] [--decompiled-dir DIR] [--index-dir DIR] [--jobs N] [--ilspycmd PATH]
+                      [--workers N] [--sqlite] [--rebuild]
+
+Options:
+    --bin-dir         Game folder containing the assemblies (default: Bin64)
+    --decompiled-dir  Folder to decompile into (default: Decompiled)
+    --index-dir       Folder to write the index files into (default: CodeIndex)
+    --jobs            Number of ilspycmd processes run at the same time (default: number of CPUs)
+    --ilspycmd        The ilspycmd executable to run (default: ilspycmd)
+    --workers         Number of indexer worker processes (default: 2x the number of CPU cores)
+    --sqlite          Also write all entries into an index.sqlite database
+    --rebuild         Decompile and index everything again, even if unchanged
+"""
+
+import argparse
+import os
+import queue
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import copy_content
+from decompile import ASSEMBLIES, Decompiler
+from index_code import CSharpIndexer
+from index_content import DATABASE_NAME as CONTENT_DATABASE_NAME, ContentIndexer
+from index_il import DATABASE_NAME, ILIndexer
+
+
+class DecompileFailed(Exception):
+    """Raised into the indexer to abandon the run if the decompilation failed"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Decompile, copy the content and index the code in a pipeline')
+    parser.add_argument('--bin-dir', default='Bin64', help='Game folder containing the assemblies (default: Bin64)')
+    parser.add_argument('--decompiled-dir', default='Decompiled', help='Folder to decompile into (default: Decompiled)')
+    parser.add_argument('--index-dir', default='CodeIndex', help='Folder to write the index files into (default: CodeIndex)')
+    parser.add_argument('--jobs', type=int, default=None,
+                        help='Number of ilspycmd processes run at the same time (default: number of CPUs)')
+    parser.add_argument('--ilspycmd', default='ilspycmd', help='The ilspycmd executable to run (default: ilspycmd)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Number of indexer worker processes (default: 2x the number of CPU cores)')
+    parser.add_argument('--sqlite', action='store_true',
+                        help='Also write all entries into an index.sqlite database for faster searches')
+    parser.add_argument('--rebuild', action='store_true', help='Decompile and index everything again, even if unchanged')
+    args = parser.parse_args()
+
+    for option, value in (('--jobs', args.jobs), ('--workers', args.workers)):
+        if value is not None and value < 1:
+            print(f"Error: {option} must be at least 1", file=sys.stderr)
+            sys.exit(1)
+
+    bin_dir = Path(args.bin_dir)
+    if not bin_dir.is_dir():
+        print(f"Error: Game folder '{bin_dir}' not found", file=sys.stderr)
+        sys.exit(1)
+
+    # Bin64 is usually a link to the folder of the installed game, resolved to find its Content folder
+    game_root = Path(os.environ.get('SPACE_ENGINEERS_ROOT') or bin_dir.resolve().parent)
+    copy_game_content = not Path('Content').exists()
+    if copy_game_content and not (game_root / 'Content').is_dir():
+        print(f"Warning: Game content folder '{game_root / 'Content'}' not found, the content is not copied. "
+              "Set SPACE_ENGINEERS_ROOT to the game folder to copy it.", file=sys.stderr)
+        copy_game_content = False
+
+    decompiled_dir = Path(args.decompiled_dir)
+    decompiled_dir.mkdir(parents=True, exist_ok=True)
+    index_dir = Path(args.index_dir)
+    index_dir.mkdir(parents=True, exist_ok=True)
+
+    start_time = time.perf_counter()
+    ready_directories = queue.Queue()
+    decompiler = Decompiler(bin_dir, decompiled_dir, args.ilspycmd, args.jobs)
+
+    def decompile() -> bool:
+        try:
+            return decompiler.decompile(ASSEMBLIES, args.rebuild, ready_directories.put)
+        finally:
+            # Ends the iteration of the indexer
+            ready_directories.put(None)
+
+    def iter_ready_directories():
+        while True:
+            directory = ready_directories.get()
+            if directory is None:
+                break
+            yield directory
+        if not decompile_future.result():
+            raise DecompileFailed()
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        print("Decompiling game assemblies...")
+        decompile_future = executor.submit(decompile)
+        if copy_game_content:
+            print("Copying indexable content...")
+            content_future = executor.submit(copy_content.main, game_root)
+
+        print("Indexing decompiled code...")
+        indexer = CSharpIndexer(str(decompiled_dir), num_workers=args.workers)
+        try:
+            indexer.index_directory(index_dir / 'manifest.sqlite', args.rebuild, iter_ready_directories())
+        except DecompileFailed:
+            print("Error: Failed to decompile the game assemblies, the index was not updated", file=sys.stderr)
+            sys.exit(1)
+        indexer.write_indices(index_dir, args.sqlite)
+
+        print("\nIndexing IL code...")
+        ILIndexer(str(decompiled_dir), index_dir / DATABASE_NAME, args.workers).index(args.rebuild)
+
+        if copy_game_content:
+            content_future.result()
+            print("Copied indexable content")
+
+    if Path('Content').is_dir():
+        print("\nIndexing content definitions...")
+        ContentIndexer('Content', index_dir / CONTENT_DATABASE_NAME, args.workers).index(args.rebuild)
+
+    print(f"\nPreparation complete in {time.perf_counter() - start_time:.1f} seconds")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Call Graph Search Tool
+
+This script walks the callgraph.sqlite database written by index_code.py next to the
+index files. It prints the callers or callees of a method a number of levels deep, or
+the call paths from one method to another, without searching the methods index again
+for each step.
+
+The callee of a call is only known by name if several types declare a method with that
+name and the calling type does not. Such calls are marked with '?' and followed to every
+method of that name, so the results may include calls which do not happen.
+
+Usage:
+    python search_calls.py <index_directory> callers <method> [--depth N]
+    python search_calls.py <index_directory> callees <method> [--depth N]
+    python search_calls.py <index_directory> paths <from_method> <to_method> [--max-hops N] [--max-paths N]
+
+Arguments:
+    index_directory  Path to callgraph.sqlite, or the index directory containing it (CodeIndex)
+    method           Type::Method or Method. The type is either the name (MySession) or the
+                     namespace and name (Sandbox.Game.World.MySession). All overloads are merged.
+
+Examples:
+    # Methods calling MyPhysics.LoadData, and their callers
+    python search_calls.py CodeIndex callers MyPhysics::LoadData --depth 2
+
+    # Call paths from MySession.Update to MyPhysics.LoadData of at most 5 calls
+    python search_calls.py CodeIndex paths MySession::Update MyPhysics::LoadData --max-hops 5
+"""
+
+import argparse
+import sqlite3
+import sys
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Set, Tuple
+
+DATABASE_NAME = 'callgraph.sqlite'
+
+
+class CallGraph:
+    """Looks up the nodes and calls stored in a callgraph.sqlite database"""
+
+    def __init__(self, database_path: Path):
+        try:
+            self.connection = sqlite3.connect(f'file:{database_path}?mode=ro', uri=True)
+            self.connection.execute('SELECT count(*) FROM nodes').fetchone()
+        except sqlite3.Error as e:
+            print(f"Error: Cannot open call graph '{database_path}': {e}", file=sys.stderr)
+            sys.exit(1)
+        self.nodes: Dict[int, tuple] = {}
+        self.nodes_by_name: Dict[str, List[int]] = {}
+
+    def node(self, node_id: int) -> tuple:
+        """Return the (namespace, containing_type, method, file_path, start_line) of a node"""
+        if node_id not in self.nodes:
+            self.nodes[node_id] = self.connection.execute(
+                'SELECT namespace, containing_type, method, file_path, start_line FROM nodes WHERE id = ?',
+                (node_id,)
+            ).fetchone()
+        return self.nodes[node_id]
+
+    def name(self, node_id: int) -> str:
+        """Return the Type::Method name of a node, Type:: for code outside of the methods"""
+        namespace, containing_type, method, _, _ = self.node(node_id)
+        return f"{containing_type}::{method}"
+
+    def find_nodes(self, pattern: str) -> List[int]:
+        """Return the ids of the methods matching a Type::Method or Method pattern"""
+        type_name, _, method = pattern.rpartition('::')
+        condition, parameters = 'method = ?', [method]
+        if type_name:
+            namespace, _, type_name = type_name.rpartition('.')
+            condition += ' AND containing_type = ?'
+            parameters.append(type_name)
+            if namespace:
+                condition += ' AND namespace = ?'
+                parameters.append(namespace)
+        rows = self.connection.execute(f'SELECT id FROM nodes WHERE {condition} ORDER BY id', parameters)
+        return [row[0] for row in rows]
+
+    def methods_named(self, method: str) -> List[int]:
+        """Return the ids of all methods with the name, the candidates of an unresolved call"""
+        if method not in self.nodes_by_name:
+            rows = self.connection.execute('SELECT id FROM nodes WHERE method = ?', (method,))
+            self.nodes_by_name[method] = [row[0] for row in rows]
+        return self.nodes_by_name[method]
+
+    def callees(self, node_id: int) -> List[Tuple[int, bool, str, int]]:
+        """Return the (callee id, resolved, file path, line) of the calls made by a method"""
+        result = []
+        rows = self.connection.execute(
+            'SELECT callee_name, callee_id, file_path, min(line) FROM calls WHERE caller_id = ? '
+            'GROUP BY callee_name, callee_id ORDER BY min(line)', (node_id,)
+        ).fetchall()
+        for callee_name, callee_id, file_path, line in rows:
+            if callee_id is not None:
+                result.append((callee_id, True, file_path, line))
+            else:
+                result.extend((candidate, False, file_path, line) for candidate in self.methods_named(callee_name))
+        return result
+
+    def callers(self, node_id: int) -> List[Tuple[int, bool, str, int]]:
+        """Return the (caller id, resolved, file path, line) of the calls to a method"""
+        method = self.node(node_id)[2]
+        rows = self.connection.execute(
+            'SELECT caller_id, callee_id IS NOT NULL, file_path, min(line) FROM calls '
+            'WHERE callee_id = ? OR (callee_id IS NULL AND callee_name = ?) '
+            'GROUP BY caller_id, callee_id IS NOT NULL ORDER BY file_path, min(line)', (node_id, method)
+        ).fetchall()
+        return [(caller_id, bool(resolved), file_path, line) for caller_id, resolved, file_path, line in rows]
+
+    def print_tree(self, node_id: int, direction: str, depth: int):
+        """Print the callers or callees of a method as a tree, each method expanded only once"""
+        neighbours = self.callers if direction == 'callers' else self.callees
+        expanded = {node_id}
+        print(self.name(node_id))
+
+        def visit(current: int, level: int):
+            for neighbour, resolved, file_path, line in neighbours(current):
+                marker = '' if resolved else '? '
+                seen = ' ...' if neighbour in expanded and level < depth else ''
+                print(f"{'  ' * level}{marker}{self.name(neighbour)}  ({file_path}:{line}){seen}")
+                if level < depth and neighbour not in expanded:
+                    expanded.add(neighbour)
+                    visit(neighbour, level + 1)
+
+        visit(node_id, 1)
+
+    def find_paths(self, sources: List[int], targets: List[int], max_hops: int, max_paths: int) -> List[List[tuple]]:
+        """Return up to max_paths call paths of at most max_hops calls, shortest first
+
+        The distances to the targets are computed backwards from them first, so the search
+        forward from the sources only enters methods which can still reach a target in time.
+        """
+        distances: Dict[int, int] = {target: 0 for target in targets}
+        queue = deque(targets)
+        while queue:
+            current = queue.popleft()
+            if distances[current] >= max_hops:
+                continue
+            for caller, _, _, _ in self.callers(current):
+                if caller not in distances:
+                    distances[caller] = distances[current] + 1
+                    queue.append(caller)
+
+        paths: List[List[tuple]] = []
+        target_set = set(targets)
+
+        def visit(path: List[tuple], on_path: Set[int], hops_left: int):
+            current = path[-1][0]
+            if current in target_set and len(path) > 1:
+                paths.append(list(path))
+                return
+            for callee, resolved, file_path, line in self.callees(current):
+                if callee in on_path or distances.get(callee, max_hops + 1) > hops_left - 1:
+                    continue
+                path.append((callee, resolved, file_path, line))
+                on_path.add(callee)
+                visit(path, on_path, hops_left - 1)
+                on_path.discard(callee)
+                path.pop()
+
+        for source in sources:
+            if source in distances:
+                visit([(source, True, None, None)], {source}, max_hops)
+
+        paths.sort(key=len)
+        return paths[:max_paths]
+
+
+def resolve_method(graph: CallGraph, pattern: str) -> List[int]:
+    """Return the nodes of a method pattern, exit if there are none"""
+    node_ids = graph.find_nodes(pattern)
+    if not node_ids:
+        print(f"Error: No method '{pattern}' found in the call graph", file=sys.stderr)
+        sys.exit(1)
+    return node_ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Search the call graph written by index_code.py')
+    parser.add_argument('index_directory', help=f'Path to {DATABASE_NAME}, or the index directory containing it')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    for command, description in (('callers', 'Print the methods calling a method'),
+                                  ('callees', 'Print the methods called by a method')):
+        subparser = subparsers.add_parser(command, help=description)
+        subparser.add_argument('method', help='Type::Method or Method')
+        subparser.add_argument('--depth', type=int, default=1, help='Number of levels to print (default: 1)')
+    paths_parser = subparsers.add_parser('paths', help='Print the call paths from one method to another')
+    paths_parser.add_argument('from_method', help='Type::Method or Method the paths start at')
+    paths_parser.add_argument('to_method', help='Type::Method or Method the paths end at')
+    paths_parser.add_argument('--max-hops', type=int, default=4, help='Maximum number of calls in a path (default: 4)')
+    paths_parser.add_argument('--max-paths', type=int, default=20, help='Maximum number of paths to print (default: 20)')
+    args = parser.parse_args()
+
+    for option in ('depth', 'max_hops', 'max_paths'):
+        if getattr(args, option, 1) < 1:
+            print(f"Error: --{option.replace('_', '-')} must be at least 1", file=sys.stderr)
+            sys.exit(1)
+
+    database_path = Path(args.index_directory)
+    if database_path.is_dir():
+        database_path = database_path / DATABASE_NAME
+    if not database_path.exists():
+        print(f"Error: Call graph '{database_path}' not found, run index_code.py first", file=sys.stderr)
+        sys.exit(1)
+
+    graph = CallGraph(database_path)
+    if args.command == 'paths':
+        sources = resolve_method(graph, args.from_method)
+        targets = resolve_method(graph, args.to_method)
+        paths = graph.find_paths(sources, targets, args.max_hops, args.max_paths)
+        for path in paths:
+            print(graph.name(path[0][0]))
+            for level, (node_id, resolved, file_path, line) in enumerate(path[1:], 1):
+                marker = '' if resolved else '? '
+                print(f"{'  ' * level}{marker}{graph.name(node_id)}  ({file_path}:{line})")
+            print()
+        print(f"Found {len(paths)} call paths from {args.from_method} to {args.to_method}")
+        return
+
+    for node_id in resolve_method(graph, args.method):
+        graph.print_tree(node_id, args.command, args.depth)
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -2,20 +2,55 @@
 """
 C# Code Index Search Tool
 
-This script searches through CSV index files created by index_csharp_codebase.py
+This script searches through CSV index files created by index_code.py
 and displays matching results with pagination support.
 
+If index_code.py was run with --sqlite, then the index.sqlite database next to the
+CSV file is queried instead of scanning the CSV file, unless --csv is given.
+
+If search_server.py is running for the index directory, then the query is sent to it
+instead, which answers from the index files kept in memory, unless --no-server is given.
+
+The search stops as soon as the page is full, then reports an estimated total and a
+cursor. Passing the cursor as the offset resumes the search where the last page ended,
+instead of scanning the index from the top again.
+
+Passing 'all' (or 'CodeIndex/all') as the index file searches every index file in the
+folder in parallel processes, the smallest first, and prints the results of each file
+as soon as it is searched, in a single page with an additional category column.
+
 Usage:
-    python search_code.py <index_file> <max_results> <offset> <search_pattern>
+    python search_code.py [--csv] [--exact-total] [--no-server] <index_file> <max_results> <offset> <search_pattern>
 
 Arguments:
-    index_file      Path to the CSV index file to search
+    index_file      Path to the CSV index file to search, or 'all' for every index file
     max_results     Maximum number of results to display per page
-    offset          Number of results to skip (for pagination, use 0 for first page)
+    offset          Number of results to skip (for pagination, use 0 for first page),
+                    or the cursor printed after the previous page (starts with '@')
     search_pattern  Search pattern to match. Supports:
                     - Simple text: matches any column containing the text (case-insensitive)
                     - Regex: prefix with 're:' for regex pattern (e.g., 're:^MyClass$')
                     - Exact: prefix with 'exact:' for case-sensitive exact match
+                    - Declaration: prefix with 'decl:' for declarations of the symbol with
+                      exactly this name (the symbol column depends on the index file,
+                      for example containing_type in classes.csv, method in methods.csv)
+                    - Name: prefix with 'name:' for declarations and usages of the symbol
+                      with exactly this name
+                    - Description: prefix with 'fts:' for entries whose description contains
+                      all the given words as substrings (case-insensitive, looked up in the
+                      trigram full text index if the database is used)
+                    - Field-scoped: space separated column=value (exact), column~text
+                      (case-insensitive substring) and column~re:pattern (regex) predicates,
+                      all of them must match (e.g., 'containing_type=MyEntity type=declaration'),
+                      values containing spaces in double quotes (description~"world thrust")
+                    - Signature filters in field-scoped patterns: params=Type1,Type2 (parameter
+                      types), returns=Type, arity=N (type parameters) and modifier=name, matching
+                      the signature column of the method declarations
+
+Options:
+    --csv           Scan the CSV file even if the index.sqlite database is available
+    --exact-total   Count all matches instead of estimating the total (scans the whole index)
+    --no-server     Search directly even if search_server.py is running
 
 Examples:
     # Search for all occurrences of "MyClass", show first 20 results
@@ -24,6 +59,9 @@ Examples:
     # Get the next page (results 21-40)
     python search_code.py CodeIndex/classes.csv 20 20 MyClass
 
+    # Get the next page by resuming from the cursor printed after the first page
+    python search_code.py CodeIndex/classes.csv 20 @csv:81234:20 MyClass
+
     # Regex search for classes starting with "Test"
     python search_code.py CodeIndex/classes.csv 50 0 "re:^Test"
 
@@ -32,13 +70,215 @@ Examples:
 
     # Search in specific namespace (searches all columns)
     python search_code.py CodeIndex/methods.csv 30 0 "MyNamespace.MyClass"
+
+    # Anything named MyToolbar in any index file
+    python search_code.py all 20 0 "name:MyToolbar"
+
+    # Declarations of the methods of a class, exact values are looked up in the key files
+    python search_code.py CodeIndex/methods.csv 50 0 "containing_type=MyEntity type=declaration"
+
+    # Classes with names like MyCubeBlock, narrowed down by the trigram files
+    python search_code.py CodeIndex/classes.csv 50 0 "containing_type~re:^My.*Block$ type=declaration"
+
+    # Declaration of a struct, uses the B-tree indexes of the database
+    python search_code.py CodeIndex/structs.csv 10 0 "decl:Vector3D"
+
+    # The overload of a method taking a string and an int
+    python search_code.py CodeIndex/methods.csv 10 0 "method=Init params=string,int"
+
+    # Methods documented as related to both thrust and override
+    python search_code.py CodeIndex/methods.csv 20 0 "fts:thrust override"
 """
 
+import bisect
 import csv
+import functools
+import json
 import re
+import socket
+import sqlite3
 import sys
+from dataclasses import dataclass
+from multiprocessing import Pool, cpu_count
 from pathlib import Path
-from typing import List, Tuple, Optional
+from typing import Callable, List, Optional, Set, Tuple
+
+# The regex parser is used for extracting the literals of regex patterns
+try:
+    import re._parser as sre_parse
+    import re._constants as sre_constants
+except ImportError:
+    import sre_parse
+    import sre_constants
+
+# Folder of the index files searched by the 'all' target if no folder is given
+DEFAULT_INDEX_DIRECTORY = 'CodeIndex'
+
+# Column holding the name of the indexed symbol in each index file
+SYMBOL_COLUMNS = {
+    'namespaces': 'namespace',
+    'interfaces': 'containing_type',
+    'classes': 'containing_type',
+    'structs': 'containing_type',
+    'enums': 'containing_type',
+    'methods': 'method',
+    'variables': 'variable_name',
+}
+
+
+# Columns of the index files, which can be used in field-scoped patterns
+COLUMNS = ['namespace', 'containing_type', 'method', 'variable_name', 'type', 'file_path',
+           'start_line', 'end_line', 'description', 'signature']
+
+# Filters of field-scoped patterns on the parts of the method signatures, see signature_filter_regex()
+SIGNATURE_FILTERS = ['params', 'returns', 'arity', 'modifier']
+
+# Modifiers of method declarations, the values of the modifier filter
+METHOD_MODIFIERS = {'public', 'protected', 'internal', 'private', 'static', 'virtual', 'override', 'abstract',
+                    'sealed', 'extern', 'unsafe', 'async', 'new', 'partial', 'readonly'}
+
+# A predicate of a field-scoped pattern: column=value or column~text
+FIELD_PREDICATE = re.compile(r'^(' + '|'.join(COLUMNS + SIGNATURE_FILTERS) + r')([=~])(.*)$', re.DOTALL)
+
+# A word of a field-scoped pattern, the parts in double quotes may contain spaces
+FIELD_WORD = re.compile(r'(?:[^\s"]+|"[^"]*"?)+')
+
+# Prefixes of the pattern modes other than the simple and field-scoped ones
+MODE_PREFIXES = ('re:', 'exact:', 'decl:', 'name:', 'fts:')
+
+# The parameter list at the end of a signature, the parameter types may be tuples
+PARAMETER_LIST = r'\((?:[^()]|\([^()]*\))*\)$'
+
+# Pattern modes answered by the database indexes, counting all their matches is cheap
+INDEXED_MODES = {'decl', 'name', 'fts'}
+
+
+@dataclass
+class SearchPage:
+    """A page of search results"""
+    header: List[str]
+    results: List[List[str]]
+    first_index: int  # Index of the first result among all matches
+    total_matches: int  # Estimated if not total_exact, but at least the number of matches seen
+    total_exact: bool
+    has_more: bool  # True if there are more results beyond this page
+    next_cursor: Optional[str]  # Resumes the search after this page
+
+
+def format_cursor(backend: str, position: int, match_count: int) -> str:
+    """Build the cursor resuming a search at a position with the number of matches before it"""
+    return f'@{backend}:{position}:{match_count}'
+
+
+def parse_cursor(cursor: str, backend: str) -> Tuple[int, int]:
+    """Parse a cursor created by format_cursor for the backend into (position, match_count)"""
+    try:
+        cursor_backend, position, match_count = cursor[1:].split(':')
+        position = int(position)
+        match_count = int(match_count)
+    except ValueError:
+        print(f"Error: Invalid cursor '{cursor}'", file=sys.stderr)
+        sys.exit(1)
+
+    if cursor_backend != backend:
+        print(f"Error: Cursor '{cursor}' was created by the {cursor_backend} backend, "
+              f"but the {backend} backend is searched now", file=sys.stderr)
+        sys.exit(1)
+
+    return position, match_count
+
+
+def split_types(text: str) -> List[str]:
+    """Split a comma separated list of types at the commas outside of type arguments and tuples"""
+    types = []
+    depth = 0
+    start = 0
+    for i, char in enumerate(text):
+        if char in '<([':
+            depth += 1
+        elif char in '>)]':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            types.append(text[start:i])
+            start = i + 1
+    types.append(text[start:])
+    return types
+
+
+def signature_filter_regex(name: str, operator: str, value: str) -> str:
+    """Return the case-sensitive regex matching the method signatures passing a signature filter
+
+    The signatures are written by index_code.py like 'public static bool MyCubeBlock.TryGet<T>(ref int, out T)'.
+    The types of the filter values are written without spaces, the commas between type arguments are
+    followed by a space in the signatures.
+    """
+    if operator != '=':
+        print(f"Error: The {name} filter only supports {name}=value", file=sys.stderr)
+        sys.exit(1)
+
+    def type_regex(type_text: str) -> str:
+        return re.escape(re.sub(r'\s*,\s*', ', ', type_text.strip()))
+
+    if name == 'params':
+        # The parameter modifiers (ref, out, params, this) are not compared
+        types = split_types(value) if value else []
+        regex = r'\(' + ', '.join(r'(?:[a-z]+ )*' + type_regex(type_text) for type_text in types) + r'\)$'
+    elif name == 'returns':
+        regex = r'^(?:[a-z]+ )*' + type_regex(value) + ' '
+    elif name == 'arity':
+        if not value.isdigit():
+            print(f"Error: Invalid arity '{value}': must be a non-negative integer", file=sys.stderr)
+            sys.exit(1)
+        arity = int(value)
+        regex = (r'<\w+' + r'(?:, \w+)' * (arity - 1) + '>' if arity else r'[\w@]') + PARAMETER_LIST
+    else:
+        if value not in METHOD_MODIFIERS:
+            print(f"Error: Invalid modifier '{value}', must be one of: {', '.join(sorted(METHOD_MODIFIERS))}",
+                  file=sys.stderr)
+            sys.exit(1)
+        regex = r'^(?:[a-z]+ )*' + value + ' '
+    return f'(?-i:{regex})'
+
+
+def extract_trigrams(literals: List[str]) -> List[str]:
+    """Return the distinct lowercase trigrams of the literals"""
+    trigrams = set()
+    for literal in literals:
+        literal = literal.lower()
+        trigrams.update(literal[i:i + 3] for i in range(len(literal) - 2))
+    return sorted(trigrams)
+
+
+def required_literals(pattern: str) -> List[str]:
+    """Return literal strings every match of the regex must contain, empty if none are found
+
+    Only sequences of literals, groups and repetitions of at least once are followed,
+    alternatives and character classes end a literal, so this may miss some literals.
+    """
+    try:
+        parsed = sre_parse.parse(pattern, re.IGNORECASE)
+    except Exception:
+        return []
+
+    literals = []
+
+    def walk(items):
+        current = []
+        for op, argument in items:
+            if op == sre_constants.LITERAL:
+                current.append(chr(argument))
+                continue
+
+            literals.append(''.join(current))
+            current = []
+            if op == sre_constants.SUBPATTERN:
+                walk(argument[-1])
+            elif op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT) and argument[0] >= 1:
+                walk(argument[2])
+        literals.append(''.join(current))
+
+    walk(parsed)
+    return [literal for literal in literals if len(literal) >= 3]
 
 
 class SearchPattern:
@@ -47,8 +287,45 @@ class SearchPattern:
     def __init__(self, pattern_str: str):
         self.original = pattern_str
 
+        # Columns used by the symbol and description modes, set by bind()
+        self.symbol_column = None
+        self.symbol_index = -1
+        self.type_index = -1
+        self.description_index = -1
+
+        # Field-scoped predicates, if every word of the pattern is one
+        words = FIELD_WORD.findall(pattern_str)
+        predicates = [FIELD_PREDICATE.match(word) for word in words]
+        if any(predicates) and not all(predicates) and not pattern_str.startswith(MODE_PREFIXES):
+            word = words[predicates.index(None)]
+            print(f"Error: '{word}' is not a column=value or column~text predicate, put the values containing "
+                  f"spaces in double quotes (params=\"Dictionary<int, string>\")", file=sys.stderr)
+            sys.exit(1)
+
         # Determine pattern type
-        if pattern_str.startswith('re:'):
+        if predicates and all(predicates):
+            # Field-scoped pattern: all of the column=value (exact), column~text (substring)
+            # and column~re:pattern (regex) predicates
+            self.mode = 'fields'
+            self.predicates = []
+            for match in predicates:
+                column, operator, value = match.groups()
+                value = re.sub(r'"([^"]*)"?', r'\1', value)
+                if column in SIGNATURE_FILTERS:
+                    regex = signature_filter_regex(column, operator, value)
+                    self.predicates.append(('signature', 'regex', re.compile(regex, re.IGNORECASE)))
+                elif operator == '=':
+                    self.predicates.append((column, 'exact', value))
+                elif value.startswith('re:'):
+                    try:
+                        self.predicates.append((column, 'regex', re.compile(value[3:], re.IGNORECASE)))
+                    except re.error as e:
+                        print(f"Error: Invalid regex pattern '{value[3:]}': {e}", file=sys.stderr)
+                        sys.exit(1)
+                else:
+                    self.predicates.append((column, 'substring', value.lower()))
+            self.predicate_indices = []
+        elif pattern_str.startswith('re:'):
             # Regex pattern
             self.mode = 'regex'
             pattern = pattern_str[3:]
@@ -61,20 +338,203 @@ class SearchPattern:
             # Exact case-sensitive match
             self.mode = 'exact'
             self.text = pattern_str[6:]
+        elif pattern_str.startswith('decl:'):
+            # Declarations of the symbol with this exact name
+            self.mode = 'decl'
+            self.text = pattern_str[5:]
+        elif pattern_str.startswith('name:'):
+            # Declarations and usages of the symbol with this exact name
+            self.mode = 'name'
+            self.text = pattern_str[5:]
+        elif pattern_str.startswith('fts:'):
+            # All words in the description
+            self.mode = 'fts'
+            self.text = pattern_str[4:]
+            self.words = self.text.lower().split()
         else:
             # Simple case-insensitive text search
             self.mode = 'simple'
             self.text = pattern_str.lower()
 
+    def bind(self, header: List[str], category: str):
+        """Resolve the columns used by the symbol and description modes for an index file"""
+        self.symbol_column = SYMBOL_COLUMNS.get(category, 'containing_type')
+        self.symbol_index = header.index(self.symbol_column)
+        self.type_index = header.index('type')
+        self.description_index = header.index('description')
+        if self.mode == 'fields':
+            self.predicate_indices = [
+                (header.index(column), operator, value) for column, operator, value in self.predicates
+            ]
+
+    def key_values(self) -> List[Tuple[str, str]]:
+        """Return the (column, value) pairs a matching row must have, which can be looked up in key files"""
+        if self.mode in ('decl', 'name'):
+            return [(self.symbol_column, self.text)]
+        elif self.mode == 'fields':
+            return [(column, value) for column, operator, value in self.predicates if operator == 'exact' and value]
+        return []
+
+    def trigram_predicates(self) -> List[Tuple[str, List[str], Callable[[str], bool]]]:
+        """Return (column, trigrams, matches) for the substring and regex predicates having trigrams
+
+        A column value can only match if its lowercase form contains all the trigrams, which
+        can be looked up in trigram files. The matches function checks the value itself.
+        """
+        if self.mode != 'fields':
+            return []
+
+        result = []
+        for column, operator, value in self.predicates:
+            if operator == 'substring':
+                trigrams = extract_trigrams([value])
+                result.append((column, trigrams, lambda cell, text=value: text in cell.lower()))
+            elif operator == 'regex':
+                trigrams = extract_trigrams(required_literals(value.pattern))
+                result.append((column, trigrams, lambda cell, regex=value: regex.search(cell) is not None))
+        return [predicate for predicate in result if predicate[1]]
+
     def matches(self, row: List[str]) -> bool:
         """Check if any column in the row matches the pattern"""
         if self.mode == 'regex':
             return any(self.regex.search(cell) for cell in row)
         elif self.mode == 'exact':
             return any(self.text in cell for cell in row)
+        elif self.mode == 'decl':
+            return row[self.symbol_index] == self.text and row[self.type_index] == 'declaration'
+        elif self.mode == 'name':
+            return row[self.symbol_index] == self.text
+        elif self.mode == 'fts':
+            description = row[self.description_index].lower()
+            return all(word in description for word in self.words)
+        elif self.mode == 'fields':
+            for index, operator, value in self.predicate_indices:
+                if operator == 'exact':
+                    if row[index] != value:
+                        return False
+                elif operator == 'regex':
+                    if not value.search(row[index]):
+                        return False
+                elif value not in row[index].lower():
+                    return False
+            return True
         else:  # simple
             return any(self.text in cell.lower() for cell in row)
 
+    def to_sql(self, columns: List[str], symbol_column: str) -> Tuple[str, list]:
+        """Build the SQL condition equivalent to matches() for the entries table"""
+        if self.mode == 'regex':
+            return ' OR '.join(f'{column} REGEXP ?' for column in columns), [self.regex.pattern] * len(columns)
+        elif self.mode == 'exact':
+            return ' OR '.join(f'instr({column}, ?) > 0' for column in columns), [self.text] * len(columns)
+        elif self.mode == 'decl':
+            return f"{symbol_column} = ? AND type = 'declaration'", [self.text]
+        elif self.mode == 'name':
+            return f'{symbol_column} = ?', [self.text]
+        elif self.mode == 'fts':
+            # The trigram table finds the words as substrings, but not the words shorter than a trigram,
+            # and its case folding may differ from Python's str.lower() outside of ASCII
+            conditions = []
+            params = []
+            indexed_words = [word for word in self.words if len(word) >= 3]
+            if indexed_words:
+                conditions.append('rowid IN (SELECT rowid FROM descriptions WHERE descriptions MATCH ?)')
+                params.append(' '.join('"' + word.replace('"', '""') + '"' for word in indexed_words))
+            for word in self.words:
+                if len(word) < 3 or not word.isascii():
+                    conditions.append(f"instr({'lower' if word.isascii() else 'py_lower'}(description), ?) > 0")
+                    params.append(word)
+            return ' AND '.join(conditions) or '1', params
+        elif self.mode == 'fields':
+            conditions = []
+            params = []
+            for column, operator, value in self.predicates:
+                if operator == 'exact':
+                    conditions.append(f'{column} = ?')
+                    params.append(value)
+                elif operator == 'regex':
+                    conditions.append(f'{column} REGEXP ?')
+                    params.append(value.pattern)
+                else:
+                    lower = 'lower' if value.isascii() else 'py_lower'
+                    conditions.append(f'instr({lower}({column}), ?) > 0')
+                    params.append(value)
+            return ' AND '.join(conditions), params
+        else:  # simple
+            # SQLite lower() folds ASCII only, Python's str.lower() is needed for other patterns
+            lower = 'lower' if self.text.isascii() else 'py_lower'
+            return ' OR '.join(f'instr({lower}({column}), ?) > 0' for column in columns), [self.text] * len(columns)
+
+
+class KeyFile:
+    """Sorted key or trigram file of an index column written by index_code.py, looked up by binary search"""
+
+    def __init__(self, path: Path):
+        self.file = open(path, 'rb')
+        self.size = path.stat().st_size
+        self.column, csv_size = self.file.readline().decode('utf-8').rstrip('\n').split('\t')
+        self.csv_size = int(csv_size)
+        self.data_start = self.file.tell()
+
+    @staticmethod
+    def open(index_file: Path, column: str, csv_size: int, suffix: str = '.keys') -> Optional['KeyFile']:
+        """Open the key (or trigram) file of a column of the index file, None if missing or not matching the CSV file"""
+        path = index_file.parent / 'keys' / f'{index_file.stem}.{column}{suffix}'
+        try:
+            if path.stat().st_mtime < index_file.stat().st_mtime:
+                return None
+            key_file = KeyFile(path)
+        except (OSError, ValueError):
+            return None
+
+        if key_file.column != column or key_file.csv_size != csv_size:
+            key_file.close()
+            return None
+
+        return key_file
+
+    def _first_line_from(self, position: int) -> bytes:
+        """Return the first line starting at or after the position, empty at the end of the file"""
+        self.file.seek(position - 1)
+        self.file.readline()
+        return self.file.readline()
+
+    def lookup(self, value: str) -> List[int]:
+        """Return the ascending row offsets having the value, empty if none"""
+        key = value.encode('utf-8')
+
+        # Find the smallest position whose next line has a key not less than the value
+        low, high = self.data_start, self.size
+        while low < high:
+            middle = (low + high) // 2
+            line = self._first_line_from(middle)
+            if line and line.split(b'\t', 1)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+
+        line = self._first_line_from(low)
+        line_key, _, offsets = line.rstrip(b'\n').partition(b'\t')
+        if not line or line_key != key:
+            return []
+
+        return [int(offset) for offset in offsets.split()]
+
+    def read_line(self, position: int) -> Tuple[str, List[int]]:
+        """Return the value and the offsets on the line starting at the position"""
+        self.file.seek(position)
+        value, _, offsets = self.file.readline().rstrip(b'\n').partition(b'\t')
+        return value.decode('utf-8'), [int(offset) for offset in offsets.split()]
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
 
 class CodeIndexSearcher:
     """Searches through code index CSV files"""
@@ -89,51 +549,406 @@ class CodeIndexSearcher:
         if not self.index_file.suffix == '.csv':
             print(f"Warning: File '{index_file}' does not have .csv extension", file=sys.stderr)
 
+        self.backend = 'csv'
+
     def search(
         self,
         pattern: SearchPattern,
         max_results: int,
-        offset: int
-    ) -> Tuple[List[str], List[List[str]], int, bool]:
+        offset: int,
+        cursor: Optional[str] = None,
+        exact_total: bool = False
+    ) -> SearchPage:
         """
         Search the index file for matching entries
 
-        Returns:
-            header: CSV header row
-            results: List of matching rows (up to max_results)
-            total_matches: Total number of matches found
-            has_more: True if there are more results beyond max_results
+        The scan stops at the first match beyond the page, unless exact_total is set. The total is
+        then estimated from the ratio of the matches to the bytes scanned. The cursor of the next
+        page is the byte offset of the row after the page and the number of matches before it.
         """
         header = None
-        all_matches = []
+        results = []
+        skip = offset
+        base_count = 0
+        next_cursor = None
+        has_more = False
+        matches = 0
 
         try:
-            with open(self.index_file, 'r', encoding='utf-8', newline='') as f:
-                reader = csv.reader(f)
-
+            with open(self.index_file, 'rb') as f:
                 # Read header
-                header = next(reader, None)
+                header = next(csv.reader([f.readline().decode('utf-8')]), None)
                 if not header:
                     print(f"Error: Index file '{self.index_file}' is empty", file=sys.stderr)
                     sys.exit(1)
+                pattern.bind(header, self.index_file.stem)
+
+                file_size = self.index_file.stat().st_size
+                if cursor is not None:
+                    start_position, base_count = parse_cursor(cursor, self.backend)
+                    skip = 0
+
+                    # The cursor must point to the start of a row
+                    f.seek(start_position - 1)
+                    if start_position <= f.tell() or start_position > file_size or f.read(1) != b'\n':
+                        print(f"Error: Cursor '{cursor}' does not match the index file", file=sys.stderr)
+                        sys.exit(1)
+
+                start_position = position = f.tell()
+
+                # Only the rows with the looked up key values can match, if there is a key file
+                candidates = self._lookup_keys(pattern, file_size)
+                if candidates is not None:
+                    candidates = candidates[bisect.bisect_left(candidates, start_position):]
+                examined = 0
+
+                def read_lines():
+                    nonlocal position
+                    for line in f:
+                        position += len(line)
+                        yield line.decode('utf-8')
+
+                def read_candidates():
+                    nonlocal position, examined
+                    for row_offset in candidates:
+                        f.seek(row_offset)
+                        position = row_offset
+                        examined += 1
+                        yield next(csv.reader(read_lines()))
 
                 # Search through rows
-                for row in reader:
-                    if pattern.matches(row):
-                        all_matches.append(row)
+                for row in csv.reader(read_lines()) if candidates is None else read_candidates():
+                    if not pattern.matches(row):
+                        continue
+
+                    matches += 1
+                    if matches <= skip:
+                        continue
+
+                    if len(results) < max_results:
+                        results.append(row)
+                        if len(results) == max_results:
+                            next_cursor = format_cursor(self.backend, position, base_count + matches)
+                        continue
+
+                    has_more = True
+                    if not exact_total:
+                        break
 
         except Exception as e:
             print(f"Error reading index file: {e}", file=sys.stderr)
             sys.exit(1)
 
-        # Apply pagination
-        total_matches = len(all_matches)
-        start_idx = offset
-        end_idx = offset + max_results
-        page_results = all_matches[start_idx:end_idx]
-        has_more = end_idx < total_matches
+        # Stopped at the first match beyond the page, extrapolate the matches to the rest of the file
+        total_exact = exact_total or not has_more
+        total_matches = base_count + matches
+        if not total_exact:
+            if candidates is not None:
+                total_matches = max(total_matches, base_count + round(matches * len(candidates) / examined))
+            elif position > start_position:
+                total_matches = max(total_matches, base_count + round(
+                    matches * (file_size - start_position) / (position - start_position)))
+
+        return SearchPage(
+            header=header,
+            results=results,
+            first_index=base_count + skip,
+            total_matches=total_matches,
+            total_exact=total_exact,
+            has_more=has_more,
+            next_cursor=next_cursor if has_more else None
+        )
+
+    def _lookup_keys(self, pattern: SearchPattern, file_size: int) -> Optional[List[int]]:
+        """Return the offsets of the rows which may match the pattern, None without a usable key file
+
+        Exact values are looked up in the key files. Substring and regex predicates look up their
+        trigrams in the trigram files, then check the values on the key file lines having all of them.
+        """
+        candidates = None
+        for column, value in pattern.key_values():
+            key_file = KeyFile.open(self.index_file, column, file_size)
+            if key_file is None:
+                continue
+            with key_file:
+                offsets = key_file.lookup(value)
+            if candidates is None or len(offsets) < len(candidates):
+                candidates = offsets
+
+        for column, trigrams, value_matches in pattern.trigram_predicates():
+            if candidates is not None and not candidates:
+                break
+
+            trigram_file = KeyFile.open(self.index_file, column, file_size, '.trigrams')
+            if trigram_file is None:
+                continue
+            with trigram_file:
+                lines = None
+                for trigram in trigrams:
+                    trigram_lines = trigram_file.lookup(trigram)
+                    lines = set(trigram_lines) if lines is None else lines.intersection(trigram_lines)
+                    if not lines:
+                        break
+
+            key_file = KeyFile.open(self.index_file, column, file_size)
+            if key_file is None:
+                continue
+            offsets = []
+            with key_file:
+                for line in sorted(lines):
+                    value, row_offsets = key_file.read_line(line)
+                    if value_matches(value):
+                        offsets.extend(row_offsets)
+            if candidates is None or len(offsets) < len(candidates):
+                candidates = sorted(offsets)
+
+        return candidates
+
+
+class SqliteIndexSearcher:
+    """Searches one category of the index.sqlite database written by index_code.py --sqlite"""
+
+    def __init__(self, database_file: Path, category: str):
+        self.database_file = database_file
+        self.category = category
+        self.backend = 'sqlite'
+
+        try:
+            self.connection = sqlite3.connect(f'file:{database_file}?mode=ro', uri=True)
+            self.columns = [info[1] for info in self.connection.execute('PRAGMA table_info(entries)')][1:]
+        except sqlite3.Error as e:
+            print(f"Error: Cannot open index database '{database_file}': {e}", file=sys.stderr)
+            sys.exit(1)
+
+    def search(
+        self,
+        pattern: SearchPattern,
+        max_results: int,
+        offset: int,
+        cursor: Optional[str] = None,
+        exact_total: bool = False
+    ) -> SearchPage:
+        """
+        Search the database for matching entries of the category, same results as CodeIndexSearcher.search
+
+        The cursor position is the rowid of the last entry on the page. The total is estimated
+        from the rowid range of the category, unless the matches are cheap to count.
+        """
+        compile_regex = functools.lru_cache(maxsize=None)(lambda regex: re.compile(regex, re.IGNORECASE))
+        self.connection.create_function(
+            'regexp', 2, lambda regex, value: value is not None and compile_regex(regex).search(str(value)) is not None,
+            deterministic=True
+        )
+        self.connection.create_function(
+            'py_lower', 1, lambda value: None if value is None else str(value).lower(), deterministic=True
+        )
+
+        skip = offset
+        base_count = 0
+        start_rowid = 0
+        if cursor is not None:
+            start_rowid, base_count = parse_cursor(cursor, self.backend)
+            skip = 0
+
+        condition, params = pattern.to_sql(self.columns, SYMBOL_COLUMNS.get(self.category, 'containing_type'))
+        where = f'WHERE category = ? AND ({condition})'
+        params = [self.category] + params
+
+        # The category column has no index, the rowid range keeps the scans of the other modes within the category
+        rowid_range = self._get_rowid_range()
+        if rowid_range is not None:
+            where = f'WHERE category = ? AND rowid BETWEEN ? AND ? AND ({condition})'
+            params = params[:1] + list(rowid_range) + params[1:]
+
+        try:
+            # Fetch one more row than the page to know whether there are more
+            rows = self.connection.execute(
+                f"SELECT rowid, {', '.join(self.columns)} FROM entries {where} AND rowid > ? "
+                f"ORDER BY rowid LIMIT ? OFFSET ?",
+                params + [start_rowid, max_results + 1, skip]
+            ).fetchall()
+
+            has_more = len(rows) > max_results
+            rows = rows[:max_results]
+            matches = skip + len(rows)
+
+            total_exact = exact_total or pattern.mode in INDEXED_MODES or not has_more
+            if exact_total or (has_more and pattern.mode in INDEXED_MODES):
+                total_matches = self.connection.execute(f'SELECT count(*) FROM entries {where}', params).fetchone()[0]
+            else:
+                total_matches = base_count + matches
+                if has_more:
+                    if rowid_range is None:
+                        total_exact = True
+                        total_matches = self.connection.execute(
+                            f'SELECT count(*) FROM entries {where}', params).fetchone()[0]
+                    else:
+                        first_rowid, last_rowid = rowid_range
+                        scan_start = max(start_rowid, first_rowid - 1)
+                        total_matches = max(total_matches + 1, base_count + round(
+                            matches * (last_rowid - scan_start) / max(1, rows[-1][0] - scan_start)))
+        except sqlite3.Error as e:
+            print(f"Error querying index database: {e}", file=sys.stderr)
+            sys.exit(1)
+
+        return SearchPage(
+            header=self.columns,
+            results=[['' if value is None else str(value) for value in row[1:]] for row in rows],
+            first_index=base_count + skip,
+            total_matches=total_matches,
+            total_exact=total_exact,
+            has_more=has_more,
+            next_cursor=format_cursor(self.backend, rows[-1][0], base_count + matches) if has_more else None
+        )
+
+    def _get_rowid_range(self) -> Optional[Tuple[int, int]]:
+        """Return the first and last rowid of the category, None if the database has no category table"""
+        try:
+            return self.connection.execute(
+                'SELECT first_rowid, last_rowid FROM categories WHERE category = ?', (self.category,)).fetchone()
+        except sqlite3.OperationalError:
+            return None
+
+
+def open_searcher(index_file: str, use_sqlite: bool = True):
+    """Return a searcher for the index file, preferring the index.sqlite database next to it if up to date"""
+    index_path = Path(index_file)
+    database_path = index_path.with_name('index.sqlite')
+
+    if use_sqlite and index_path.suffix == '.csv' and database_path.exists():
+        if not index_path.exists() or database_path.stat().st_mtime >= index_path.stat().st_mtime:
+            return SqliteIndexSearcher(database_path, index_path.stem)
+
+    return CodeIndexSearcher(index_file)
+
 
-        return header, page_results, total_matches, has_more
+def query_server(
+    index_file: str,
+    pattern: SearchPattern,
+    max_results: int,
+    offset: int,
+    cursor: Optional[str],
+    exact_total: bool
+) -> Optional[SearchPage]:
+    """Send the search to search_server.py, return None if no server answers it"""
+    index_directory = Path(index_file).resolve().parent
+    try:
+        if hasattr(socket, 'AF_UNIX'):
+            address = str(index_directory / 'search.sock')
+            connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            address = ('127.0.0.1', int((index_directory / 'search.port').read_text()))
+            connection = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+
+        with connection:
+            connection.settimeout(60)
+            connection.connect(address)
+            request = {
+                'index_file': str(Path(index_file).resolve()),
+                'pattern': pattern.original,
+                'max_results': max_results,
+                'offset': offset,
+                'cursor': cursor,
+                'exact_total': exact_total,
+            }
+            connection.sendall(json.dumps(request).encode('utf-8') + b'\n')
+            connection.shutdown(socket.SHUT_WR)
+            with connection.makefile('rb') as f:
+                response = json.loads(f.readline())
+    except (OSError, ValueError):
+        return None
+
+    if 'error' in response:
+        print(f"Warning: Search server error: {response['error']}", file=sys.stderr)
+        return None
+
+    return SearchPage(**response)
+
+
+def _search_index_file(args: Tuple) -> Optional[SearchPage]:
+    """Search an index file in a worker process of search_all, None if the search failed"""
+    index_file, pattern_str, max_results, exact_total, use_server, use_sqlite = args
+    try:
+        pattern = SearchPattern(pattern_str)
+        page = None
+        if use_server:
+            page = query_server(index_file, pattern, max_results, 0, None, exact_total)
+        if page is None:
+            page = open_searcher(index_file, use_sqlite).search(pattern, max_results, 0, None, exact_total)
+        return page
+    except SystemExit:
+        # The error was printed already, exiting would break the pool
+        return None
+
+
+def search_all(index_directory: Path, pattern: SearchPattern, max_results: int, offset: int, options: Set[str]):
+    """
+    Search every index file in the folder and print a single page of the results
+
+    The files are searched in parallel, the smallest first. The results are ordered by file, smallest
+    file first, and printed as soon as all smaller files are searched, with the file name in an additional
+    category column. Each file is searched for offset + max_results matches, then the page is cut from
+    the concatenated results.
+    """
+    index_files = sorted(index_directory.glob('*.csv'), key=lambda path: path.stat().st_size)
+    if not index_files:
+        print(f"Error: No index files found in '{index_directory}'", file=sys.stderr)
+        sys.exit(1)
+
+    exact_total = '--exact-total' in options
+    print(f"Searching {len(index_files)} index files in '{index_directory}' for pattern: {pattern.original}",
+          file=sys.stderr)
+    print(f"Mode: {pattern.mode}, Offset: {offset}, Max results: {max_results}", file=sys.stderr)
+    print("", file=sys.stderr)
+
+    tasks = [
+        (str(path), pattern.original, offset + max_results, exact_total,
+         '--no-server' not in options, '--csv' not in options)
+        for path in index_files
+    ]
+
+    matches = 0
+    total_matches = 0
+    total_exact = True
+    has_more = False
+    header_printed = False
+    failed = False
+    with Pool(min(len(tasks), cpu_count())) as pool:
+        # imap returns the pages in the order of the files, while the later files are still searched
+        for path, page in zip(index_files, pool.imap(_search_index_file, tasks)):
+            if page is None:
+                failed = True
+                continue
+
+            if not header_printed:
+                print(format_csv_row(['category'] + page.header))
+                header_printed = True
+
+            for row in page.results:
+                if offset <= matches < offset + max_results:
+                    print(format_csv_row([path.stem] + row), flush=True)
+                matches += 1
+
+            total_matches += page.total_matches
+            total_exact = total_exact and page.total_exact
+            has_more = has_more or page.has_more
+
+    if failed:
+        sys.exit(1)
+
+    has_more = has_more or matches > offset + max_results
+    showing_end = min(matches, offset + max_results)
+    if has_more:
+        print("...")
+
+    print("", file=sys.stderr)
+    if total_exact:
+        print(f"Found {total_matches} total matches. Showed {offset + 1}-{showing_end}.", file=sys.stderr)
+    else:
+        print(f"Found about {total_matches} matches (estimated, use --exact-total to count them). "
+              f"Showed {offset + 1}-{showing_end}.", file=sys.stderr)
+    if has_more:
+        print(f"More results available. Use offset {offset + max_results} for next page.", file=sys.stderr)
 
 
 def print_help():
@@ -161,62 +976,110 @@ def main():
         print_help()
         sys.exit(0)
 
-    if len(sys.argv) != 5:
+    # Options are the leading arguments starting with '--'
+    options = set()
+    args = sys.argv[1:]
+    while args and args[0].startswith('--'):
+        options.add(args.pop(0))
+
+    unknown_options = options - {'--csv', '--exact-total', '--no-server'}
+    if unknown_options:
+        print(f"Error: Unknown option(s): {', '.join(sorted(unknown_options))}\n", file=sys.stderr)
+        print_help()
+        sys.exit(1)
+
+    if len(args) != 4:
         print("Error: Invalid number of arguments\n", file=sys.stderr)
         print_help()
         sys.exit(1)
 
     # Parse arguments
-    index_file = sys.argv[1]
+    index_file = args[0]
 
     try:
-        max_results = int(sys.argv[2])
+        max_results = int(args[1])
         if max_results <= 0:
             raise ValueError("max_results must be positive")
     except ValueError as e:
-        print(f"Error: Invalid max_results '{sys.argv[2]}': must be a positive integer", file=sys.stderr)
+        print(f"Error: Invalid max_results '{args[1]}': must be a positive integer", file=sys.stderr)
         sys.exit(1)
 
-    try:
-        offset = int(sys.argv[3])
-        if offset < 0:
-            raise ValueError("offset must be non-negative")
-    except ValueError as e:
-        print(f"Error: Invalid offset '{sys.argv[3]}': must be a non-negative integer", file=sys.stderr)
-        sys.exit(1)
+    offset = 0
+    cursor = None
+    if args[2].startswith('@'):
+        cursor = args[2]
+    else:
+        try:
+            offset = int(args[2])
+            if offset < 0:
+                raise ValueError("offset must be non-negative")
+        except ValueError as e:
+            print(f"Error: Invalid offset '{args[2]}': must be a non-negative integer or a cursor", file=sys.stderr)
+            sys.exit(1)
+
+    search_pattern_str = args[3]
 
-    search_pattern_str = sys.argv[4]
+    # Search every index file in the folder
+    if Path(index_file).name == 'all' and not Path(index_file).is_file():
+        if cursor is not None:
+            print("Error: Cursors are not supported when searching all index files, use a numeric offset",
+                  file=sys.stderr)
+            sys.exit(1)
+        index_directory = Path(index_file).parent if index_file != 'all' else Path(DEFAULT_INDEX_DIRECTORY)
+        search_all(index_directory, SearchPattern(search_pattern_str), max_results, offset, options)
+        return
 
-    # Create searcher and pattern
-    searcher = CodeIndexSearcher(index_file)
     pattern = SearchPattern(search_pattern_str)
+    exact_total = '--exact-total' in options
+
+    # Cursors of the server are row indices, only the server can resume from them
+    page = None
+    backend = 'memory'
+    if '--no-server' not in options and (cursor is None or cursor.startswith('@memory:')):
+        page = query_server(index_file, pattern, max_results, offset, cursor, exact_total)
+
+    # Search directly if no server answered
+    searcher = None
+    if page is None:
+        searcher = open_searcher(index_file, use_sqlite='--csv' not in options)
+        backend = searcher.backend
 
-    # Perform search
     print(f"Searching '{index_file}' for pattern: {pattern.original}", file=sys.stderr)
-    print(f"Mode: {pattern.mode}, Offset: {offset}, Max results: {max_results}", file=sys.stderr)
+    print(f"Mode: {pattern.mode}, Backend: {backend}, Offset: {cursor or offset}, Max results: {max_results}",
+          file=sys.stderr)
     print("", file=sys.stderr)
 
-    header, results, total_matches, has_more = searcher.search(pattern, max_results, offset)
+    if searcher is not None:
+        page = searcher.search(pattern, max_results, offset, cursor, exact_total)
 
     # Print summary
-    showing_start = offset + 1
-    showing_end = offset + len(results)
-    print(f"Found {total_matches} total matches. Showing {showing_start}-{showing_end}:", file=sys.stderr)
+    showing_start = page.first_index + 1
+    showing_end = page.first_index + len(page.results)
+    if page.total_exact:
+        print(f"Found {page.total_matches} total matches. Showing {showing_start}-{showing_end}:", file=sys.stderr)
+    else:
+        print(f"Found about {page.total_matches} matches (estimated, use --exact-total to count them). "
+              f"Showing {showing_start}-{showing_end}:", file=sys.stderr)
     print("", file=sys.stderr)
 
     # Print header
-    print(format_csv_row(header))
+    print(format_csv_row(page.header))
 
     # Print results
-    for row in results:
+    for row in page.results:
         print(format_csv_row(row))
 
     # Print continuation indicator if there are more results
-    if has_more:
+    if page.has_more:
         print("...")
-        remaining = total_matches - showing_end
-        next_offset = offset + max_results
-        print(f"\n{remaining} more results available. Use offset {next_offset} for next page.", file=sys.stderr)
+        next_offset = page.first_index + max_results
+        if page.total_exact:
+            remaining = page.total_matches - showing_end
+            print(f"\n{remaining} more results available. "
+                  f"Use offset {page.next_cursor} (or {next_offset}) for next page.", file=sys.stderr)
+        else:
+            print(f"\nMore results available. Use offset {page.next_cursor} (or {next_offset}) for next page.",
+                  file=sys.stderr)
 
 
 if __name__ == '__main__':
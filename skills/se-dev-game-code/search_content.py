@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Content Definition Lookup Tool
+
+This script looks up definitions in the content.sqlite database created by index_content.py
+and prints their locations, or their XML read from only their line range of the content file,
+instead of grepping the .sbc files.
+
+With --xref it also prints the C# classes behind the definitions from the objectbuilders.sqlite
+database written by index_code.py: the object builder class named by the TypeId, the object
+builder of the definition named by its xsi:type or container, and the runtime classes linked to
+them by attributes like [MyCubeBlockType] and [MyDefinitionType].
+
+Usage:
+    python search_content.py [--xml] [--xref] [--xsi-type TYPE] [--display-name NAME] <content_database> [definition_id]
+
+Arguments:
+    content_database  Path to content.sqlite, or the index directory containing it (CodeIndex)
+    definition_id     TypeId/SubtypeId, TypeId/ or SubtypeId. The TypeId is written with or
+                      without the MyObjectBuilder_ prefix (Thrust or MyObjectBuilder_Thrust).
+
+Options:
+    --xml             Print the XML of the matching definitions instead of their locations
+    --xref            Also print the object builder classes and the runtime classes of the definitions
+    --xsi-type        Only the definitions with this xsi:type (MyObjectBuilder_ThrustDefinition)
+    --display-name    Only the definitions with this DisplayName (DisplayName_Block_LargeThrust)
+
+Examples:
+    # XML of the large grid large atmospheric thruster
+    python search_content.py --xml CodeIndex Thrust/LargeBlockLargeAtmosphericThrust
+
+    # All thruster definitions
+    python search_content.py CodeIndex Thrust/
+
+    # Everything about the thrusters: the object builders, the block and definition classes and the files
+    python search_content.py --xref CodeIndex Thrust/
+
+    # Every definition with this SubtypeId, like the component, its blueprint and its physical item
+    python search_content.py CodeIndex SteelPlate
+"""
+
+import argparse
+import sqlite3
+import sys
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from index_content import DATABASE_NAME, OBJECT_BUILDER_PREFIX, short_type_id
+
+# Written by index_code.py next to the content database
+XREF_DATABASE_NAME = 'objectbuilders.sqlite'
+
+
+class ContentIndex:
+    """Looks up the definitions stored in a content.sqlite database"""
+
+    def __init__(self, database_path: Path):
+        try:
+            self.connection = sqlite3.connect(f'file:{database_path}?mode=ro', uri=True)
+            root = self.connection.execute("SELECT value FROM meta WHERE key = 'root'").fetchone()[0]
+        except (sqlite3.Error, TypeError) as e:
+            print(f"Error: Cannot open content index '{database_path}': {e}", file=sys.stderr)
+            sys.exit(1)
+        self.root_path = database_path.resolve().parent / root
+
+    @staticmethod
+    def _conditions(definition_id: Optional[str], xsi_type: Optional[str],
+                    display_name: Optional[str]) -> Tuple[str, List[str]]:
+        """Return the WHERE clause on the definitions and its parameters"""
+        conditions = []
+        parameters = []
+        if definition_id:
+            type_id, separator, subtype_id = definition_id.rpartition('/')
+            if separator:
+                conditions.append('d.type_name = ?')
+                parameters.append(short_type_id(type_id))
+            if subtype_id:
+                conditions.append('d.subtype_id = ?')
+                parameters.append(subtype_id)
+        if xsi_type:
+            conditions.append('d.xsi_type = ?')
+            parameters.append(xsi_type)
+        if display_name:
+            conditions.append('d.display_name = ?')
+            parameters.append(display_name)
+        return ' AND '.join(conditions), parameters
+
+    def find_definitions(self, definition_id: Optional[str], xsi_type: Optional[str],
+                         display_name: Optional[str]) -> List[tuple]:
+        """Return (type id, subtype id, xsi type, display name, file path, start line, end line) of the matches"""
+        where, parameters = self._conditions(definition_id, xsi_type, display_name)
+        return self.connection.execute(
+            'SELECT d.type_id, d.subtype_id, d.xsi_type, d.display_name, f.path, d.start_line, d.end_line '
+            'FROM definitions d JOIN content_files f ON f.id = d.file_id '
+            f'WHERE {where} ORDER BY f.path, d.start_line', parameters
+        ).fetchall()
+
+    def find_object_builders(self, xref_path: Path, definition_id: Optional[str], xsi_type: Optional[str],
+                             display_name: Optional[str]) -> List[Tuple[str, List[tuple], List[tuple]]]:
+        """Return the (object builder, declarations, attributed types) of the TypeIds and definitions of the matches
+
+        The declarations are (namespace, kind, file path, start line), the attributed types
+        (attribute, namespace, name, kind, file path, start line) tuples.
+        """
+        try:
+            self.connection.execute('ATTACH DATABASE ? AS xref', (f'file:{xref_path}?mode=ro',))
+        except sqlite3.Error as e:
+            print(f"Error: Cannot open object builder index '{xref_path}': {e}", file=sys.stderr)
+            sys.exit(1)
+
+        # The definitions without xsi:type are of the element type of their container
+        where, parameters = self._conditions(definition_id, xsi_type, display_name)
+        rows = self.connection.execute(
+            "SELECT DISTINCT d.type_name, coalesce(nullif(d.xsi_type, ''), m.object_builder) FROM definitions d "
+            "LEFT JOIN xref.definition_members m "
+            "ON m.member = (CASE d.category WHEN '' THEN d.tag ELSE d.category END) "
+            f'WHERE {where} ORDER BY d.type_name', parameters
+        ).fetchall()
+        object_builders = []
+        for type_name, definition_object_builder in rows:
+            for name in (OBJECT_BUILDER_PREFIX + type_name, definition_object_builder):
+                if name and name not in object_builders:
+                    object_builders.append(name)
+
+        return [(
+            name,
+            self.connection.execute(
+                'SELECT namespace, kind, file_path, start_line FROM xref.object_builders WHERE name = ? '
+                'ORDER BY namespace', (name,)
+            ).fetchall(),
+            self.connection.execute(
+                'SELECT attribute, namespace, name, kind, file_path, start_line FROM xref.attributed_types '
+                'WHERE object_builder = ? ORDER BY attribute, namespace, name', (name,)
+            ).fetchall()
+        ) for name in object_builders]
+
+    def read_xml(self, path: str, start_line: int, end_line: int) -> str:
+        """Read the lines of a definition from its content file"""
+        lines = []
+        with open(self.root_path / path, encoding='utf-8-sig', errors='replace') as f:
+            for line_number, line in enumerate(f, 1):
+                if line_number >= start_line:
+                    lines.append(line)
+                if line_number >= end_line:
+                    break
+        return ''.join(lines).rstrip('\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Look up the content definitions indexed by index_content.py')
+    parser.add_argument('content_database', help=f'Path to {DATABASE_NAME}, or the index directory containing it')
+    parser.add_argument('definition_id', nargs='?', help='TypeId/SubtypeId, TypeId/ or SubtypeId')
+    parser.add_argument('--xml', action='store_true', help='Print the XML of the definitions instead of their locations')
+    parser.add_argument('--xref', action='store_true',
+                        help='Also print the object builder classes and the runtime classes of the definitions')
+    parser.add_argument('--xsi-type', help='Only the definitions with this xsi:type')
+    parser.add_argument('--display-name', help='Only the definitions with this DisplayName')
+    args = parser.parse_args()
+
+    if not (args.definition_id and args.definition_id != '/') and not args.xsi_type and not args.display_name:
+        print("Error: Give a definition id, --xsi-type or --display-name", file=sys.stderr)
+        sys.exit(1)
+
+    database_path = Path(args.content_database)
+    if database_path.is_dir():
+        database_path = database_path / DATABASE_NAME
+    if not database_path.exists():
+        print(f"Error: Content index '{database_path}' not found, run index_content.py first", file=sys.stderr)
+        sys.exit(1)
+
+    xref_path = database_path.with_name(XREF_DATABASE_NAME)
+    if args.xref and not xref_path.exists():
+        print(f"Error: Object builder index '{xref_path}' not found, run index_code.py first", file=sys.stderr)
+        sys.exit(1)
+
+    index = ContentIndex(database_path)
+    if args.xref:
+        for name, declarations, attributed_types in index.find_object_builders(
+                xref_path, args.definition_id, args.xsi_type, args.display_name):
+            if not declarations:
+                print(f"{name}  (not declared in the decompiled code)")
+            for namespace, kind, file_path, start_line in declarations:
+                print(f"{kind} {namespace}.{name}  ({file_path}:{start_line})")
+            for attribute, namespace, type_name, kind, file_path, start_line in attributed_types:
+                print(f"  [{attribute}] {kind} {namespace}.{type_name}  ({file_path}:{start_line})")
+        print()
+
+    definitions = index.find_definitions(args.definition_id, args.xsi_type, args.display_name)
+    for type_id, subtype_id, xsi_type, display_name, path, start_line, end_line in definitions:
+        if args.xml:
+            print(f"<!-- {path}:{start_line}-{end_line} -->")
+            print(index.read_xml(path, start_line, end_line))
+            print()
+        else:
+            details = '  '.join(value for value in (xsi_type, display_name) if value)
+            print(f"{type_id}/{subtype_id}  {details}  ({path}:{start_line}-{end_line})")
+
+    print(f"Found {len(definitions)} definitions")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Type Hierarchy Search Tool
+
+This script looks up the hierarchy.sqlite database written by index_code.py next to the
+index files. It lists all subtypes of a type (the classes deriving from a class, the types
+implementing an interface) or all of its base types and interfaces, with the number of
+inheritance levels between them.
+
+Base types not declared in the decompiled code, like System.IDisposable, have no kind or
+location. A base type name declared in several namespaces cannot be resolved without the
+using directives, it is listed under the name as written and matched by name only.
+
+Usage:
+    python search_hierarchy.py [--direct] <index_directory> subtypes|supertypes <type>
+
+Arguments:
+    index_directory  Path to hierarchy.sqlite, or the index directory containing it (CodeIndex)
+    type             The type name (MyCubeBlock) or the namespace and name
+                     (Sandbox.Game.Entities.MyCubeBlock), without generic arguments
+
+Options:
+    --direct         Only list the direct subtypes or base types
+
+Examples:
+    # All classes deriving from MyCubeBlock, directly or not
+    python search_hierarchy.py CodeIndex subtypes MyCubeBlock
+
+    # All types implementing IMyTerminalBlock
+    python search_hierarchy.py CodeIndex subtypes Sandbox.ModAPI.IMyTerminalBlock
+
+    # Base classes and interfaces of MyThrust
+    python search_hierarchy.py CodeIndex supertypes MyThrust
+"""
+
+import argparse
+import sqlite3
+import sys
+from pathlib import Path
+from typing import List
+
+DATABASE_NAME = 'hierarchy.sqlite'
+
+
+class TypeHierarchy:
+    """Looks up the types and their ancestors stored in a hierarchy.sqlite database"""
+
+    def __init__(self, database_path: Path):
+        try:
+            self.connection = sqlite3.connect(f'file:{database_path}?mode=ro', uri=True)
+            self.connection.execute('SELECT count(*) FROM types').fetchone()
+        except sqlite3.Error as e:
+            print(f"Error: Cannot open type hierarchy '{database_path}': {e}", file=sys.stderr)
+            sys.exit(1)
+
+    def find_types(self, type_name: str) -> List[int]:
+        """Return the ids of the types matching a name, with or without namespace"""
+        namespace, _, name = type_name.rpartition('.')
+        if namespace:
+            rows = self.connection.execute('SELECT id FROM types WHERE name = ? AND namespace = ?', (name, namespace))
+        else:
+            rows = self.connection.execute('SELECT id FROM types WHERE name = ?', (name,))
+        return [row[0] for row in rows]
+
+    def find_related(self, type_ids: List[int], direction: str, direct: bool) -> List[tuple]:
+        """Return (depth, namespace, name, kind, file path, start line) of the subtypes or supertypes"""
+        if direction == 'subtypes':
+            match_column, result_column = 'ancestor_id', 'type_id'
+        else:
+            match_column, result_column = 'type_id', 'ancestor_id'
+        placeholders = ', '.join('?' * len(type_ids))
+        depth_condition = ' AND a.depth = 1' if direct else ''
+        return self.connection.execute(
+            f'SELECT min(a.depth), t.namespace, t.name, t.kind, t.file_path, t.start_line '
+            f'FROM ancestors a JOIN types t ON t.id = a.{result_column} '
+            f'WHERE a.{match_column} IN ({placeholders}){depth_condition} '
+            f'GROUP BY t.id ORDER BY min(a.depth), t.name, t.namespace', type_ids
+        ).fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Search the type hierarchy written by index_code.py')
+    parser.add_argument('index_directory', help=f'Path to {DATABASE_NAME}, or the index directory containing it')
+    parser.add_argument('direction', choices=('subtypes', 'supertypes'),
+                        help='List the types deriving from the type, or the types it derives from')
+    parser.add_argument('type', help='Type name with or without namespace')
+    parser.add_argument('--direct', action='store_true', help='Only list the direct subtypes or base types')
+    args = parser.parse_args()
+
+    database_path = Path(args.index_directory)
+    if database_path.is_dir():
+        database_path = database_path / DATABASE_NAME
+    if not database_path.exists():
+        print(f"Error: Type hierarchy '{database_path}' not found, run index_code.py first", file=sys.stderr)
+        sys.exit(1)
+
+    hierarchy = TypeHierarchy(database_path)
+    type_ids = hierarchy.find_types(args.type)
+    if not type_ids:
+        print(f"Error: No type '{args.type}' found in the type hierarchy", file=sys.stderr)
+        sys.exit(1)
+
+    related = hierarchy.find_related(type_ids, args.direction, args.direct)
+    for depth, namespace, name, kind, file_path, start_line in related:
+        full_name = f"{namespace}.{name}" if namespace else name
+        location = f"  ({file_path}:{start_line})" if file_path else ''
+        print(f"{depth:>2}  {kind or '?':<9} {full_name}{location}")
+    print(f"\nFound {len(related)} {args.direction} of {args.type}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+IL Method Lookup Tool
+
+This script looks up methods in the il.sqlite database created by index_il.py and prints
+their IL code, reading only the byte range of each method from the .il file. It is meant for
+writing transpiler patches, which need the exact IL of the patched method.
+
+Usage:
+    python search_il.py [--list] [--callers] [--callees] <il_database> <method_pattern>
+
+Arguments:
+    il_database     Path to il.sqlite, or the index directory containing it (CodeIndex)
+    method_pattern  Type::Method, Type::, or Method. The type is either the full name
+                    (Sandbox.Game.Entities.MyCubeBlock, nested types as Outer/Inner) or
+                    the name without namespace (MyCubeBlock). All overloads are listed.
+
+Options:
+    --list          Print the signature and location of the matching methods instead of their IL
+    --callers       Print the methods calling or accessing the matching methods or fields
+    --callees       Print the methods and fields called or accessed by the matching methods
+
+Examples:
+    # IL code of all overloads of MyPhysics.LoadData
+    python search_il.py CodeIndex MyPhysics::LoadData
+
+    # All methods of a class with their signatures
+    python search_il.py --list CodeIndex Sandbox.Game.Entities.MyCubeBlock::
+
+    # Methods calling MyEntity.GetPosition or writing the MyCubeBlock.m_grid field
+    python search_il.py --callers CodeIndex MyEntity::GetPosition
+    python search_il.py --callers CodeIndex MyCubeBlock::m_grid
+"""
+
+import argparse
+import sqlite3
+import sys
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+DATABASE_NAME = 'il.sqlite'
+
+
+def parse_method_pattern(pattern: str) -> Tuple[Optional[str], Optional[str]]:
+    """Split a Type::Method pattern, either part may be missing"""
+    if '::' not in pattern:
+        return None, pattern
+    type_name, method = pattern.split('::', 1)
+    return type_name or None, method or None
+
+
+def type_condition(type_name: Optional[str], full_column: str, short_column: str) -> Tuple[str, list]:
+    """Return the SQL condition matching a full or short type name"""
+    if type_name is None:
+        return '1', []
+    if '.' in type_name:
+        return f'{full_column} = ?', [type_name]
+    if '/' in type_name:
+        # Nested type without namespace, like MyCubeBlock/Sync
+        suffix = '.' + type_name
+        return (f'{short_column} = ? AND substr({full_column}, -?) = ?',
+                [type_name.rsplit('/', 1)[-1], len(suffix), suffix])
+    return f'{short_column} = ?', [type_name]
+
+
+class ILMethodIndex:
+    """Looks up the methods and references stored in an il.sqlite database"""
+
+    def __init__(self, database_path: Path):
+        self.database_path = database_path
+        try:
+            self.connection = sqlite3.connect(f'file:{database_path}?mode=ro', uri=True)
+            root = self.connection.execute("SELECT value FROM meta WHERE key = 'root'").fetchone()[0]
+        except (sqlite3.Error, TypeError) as e:
+            print(f"Error: Cannot open IL index '{database_path}': {e}", file=sys.stderr)
+            sys.exit(1)
+        self.root_path = database_path.resolve().parent / root
+
+    def find_methods(self, type_name: Optional[str], method: Optional[str]) -> List[tuple]:
+        """Return (id, type, method, signature, file path, start byte, end byte, start line) of the matching methods"""
+        condition, parameters = type_condition(type_name, 'm.type', 'm.type_name')
+        if method is not None:
+            condition += ' AND m.method = ?'
+            parameters.append(method)
+        return self.connection.execute(
+            'SELECT m.id, m.type, m.method, m.signature, f.path, m.start_byte, m.end_byte, m.start_line '
+            f'FROM il_methods m JOIN il_files f ON f.id = m.file_id WHERE {condition} '
+            'ORDER BY f.path, m.start_byte', parameters
+        ).fetchall()
+
+    def find_callers(self, type_name: Optional[str], member: Optional[str]) -> List[tuple]:
+        """Return (opcode, type, method, file path, start line) of the methods referencing the member"""
+        condition, parameters = type_condition(type_name, 'r.target_type', 'r.target_type_name')
+        if member is not None:
+            condition += ' AND r.target_member = ?'
+            parameters.append(member)
+        return self.connection.execute(
+            'SELECT DISTINCT r.opcode, m.type, m.method, f.path, m.start_line '
+            'FROM il_references r JOIN il_methods m ON m.id = r.method_id JOIN il_files f ON f.id = m.file_id '
+            f'WHERE {condition} ORDER BY m.type, m.method, r.opcode', parameters
+        ).fetchall()
+
+    def find_callees(self, method_id: int) -> List[tuple]:
+        """Return the (opcode, operand) references of a method in IL order"""
+        return self.connection.execute(
+            'SELECT opcode, operand FROM il_references WHERE method_id = ? ORDER BY rowid', (method_id,)
+        ).fetchall()
+
+    def read_il(self, path: str, start_byte: int, end_byte: int) -> str:
+        """Read the IL code of a method from its .il file"""
+        with open(self.root_path / path, 'rb') as f:
+            f.seek(start_byte)
+            return f.read(end_byte - start_byte).decode('utf-8', 'replace')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Print the IL code of methods indexed by index_il.py')
+    parser.add_argument('il_database', help=f'Path to {DATABASE_NAME}, or the index directory containing it')
+    parser.add_argument('method_pattern', help='Type::Method, Type:: or Method')
+    parser.add_argument('--list', action='store_true', help='Print the signatures instead of the IL code')
+    parser.add_argument('--callers', action='store_true', help='Print the methods referencing the matching members')
+    parser.add_argument('--callees', action='store_true', help='Print the members referenced by the matching methods')
+    args = parser.parse_args()
+
+    database_path = Path(args.il_database)
+    if database_path.is_dir():
+        database_path = database_path / DATABASE_NAME
+    if not database_path.exists():
+        print(f"Error: IL index '{database_path}' not found, run index_il.py first", file=sys.stderr)
+        sys.exit(1)
+
+    index = ILMethodIndex(database_path)
+    type_name, method = parse_method_pattern(args.method_pattern)
+    if type_name is None and method is None:
+        print("Error: The method pattern is empty", file=sys.stderr)
+        sys.exit(1)
+
+    if args.callers:
+        callers = index.find_callers(type_name, method)
+        for opcode, caller_type, caller_method, path, start_line in callers:
+            print(f"{opcode:<10} {caller_type}::{caller_method}  ({path}:{start_line})")
+        print(f"\nFound {len(callers)} references to {args.method_pattern}")
+        return
+
+    methods = index.find_methods(type_name, method)
+    for method_id, method_type, method_name, signature, path, start_byte, end_byte, start_line in methods:
+        if args.list:
+            print(f"{method_type}::{method_name}  {signature}  ({path}:{start_line})")
+        elif args.callees:
+            print(f"// {method_type}::{method_name}  ({path}:{start_line})")
+            for opcode, operand in index.find_callees(method_id):
+                print(f"{opcode:<10} {operand}")
+            print()
+        else:
+            print(f"// {path}:{start_line}")
+            print(index.read_il(path, start_byte, end_byte))
+
+    print(f"Found {len(methods)} methods matching {args.method_pattern}")
+
+
+if __name__ == '__main__':
+    main()
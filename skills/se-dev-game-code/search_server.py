@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+C# Code Index Search Server
+
+Keeps the CSV index files created by index_code.py in memory and answers the
+queries of search_code.py, which saves starting Python and parsing the CSV file
+on every search. Each index file is loaded on its first query and reloaded when
+the file changes on disk.
+
+search_code.py finds the server through the address file in the index directory
+(search.sock for a Unix domain socket, search.port for a loopback TCP port on
+platforms without Unix domain sockets) and falls back to searching directly if
+no server answers.
+
+Protocol: one JSON object per line in both directions. The request has the keys
+index_file, pattern, max_results, offset, cursor and exact_total. The response
+has the fields of SearchPage, or an error key.
+
+Usage:
+    python search_server.py [--idle-timeout SECONDS] <index_directory>
+
+Arguments:
+    index_directory  Directory containing the CSV index files (CodeIndex)
+
+Options:
+    --idle-timeout   Stop the server after this many seconds without queries (default: 3600, 0: never)
+"""
+
+import argparse
+import bisect
+import csv
+import json
+import os
+import socket
+import socketserver
+import sys
+from dataclasses import asdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from search_code import SearchPage, SearchPattern, format_cursor, parse_cursor
+
+SOCKET_FILE_NAME = 'search.sock'
+PORT_FILE_NAME = 'search.port'
+
+
+def server_address_path(index_directory: Path) -> Path:
+    """Return the file the server publishes its address in"""
+    return index_directory / (SOCKET_FILE_NAME if hasattr(socket, 'AF_UNIX') else PORT_FILE_NAME)
+
+
+class MemoryIndexSearcher:
+    """Searches an index CSV file loaded into memory, same results as CodeIndexSearcher"""
+
+    def __init__(self, index_file: Path):
+        self.index_file = index_file
+        self.backend = 'memory'
+        self.mtime_ns = index_file.stat().st_mtime_ns
+
+        with open(index_file, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.reader(f)
+            self.header = next(reader, None)
+            if not self.header:
+                raise ValueError(f"Index file '{index_file}' is empty")
+            self.rows = list(reader)
+
+        # Built on the first query needing them
+        self._lowercase_lines: Optional[List[str]] = None
+        self._key_rows: Dict[str, Dict[str, List[int]]] = {}
+
+    def is_stale(self) -> bool:
+        """Check whether the index file changed since it was loaded"""
+        try:
+            return self.index_file.stat().st_mtime_ns != self.mtime_ns
+        except FileNotFoundError:
+            return True
+
+    def _get_key_rows(self, column: str) -> Dict[str, List[int]]:
+        """Return the indices of the rows by their value in the column"""
+        key_rows = self._key_rows.get(column)
+        if key_rows is None:
+            key_rows = self._key_rows[column] = {}
+            column_index = self.header.index(column)
+            for index, row in enumerate(self.rows):
+                key_rows.setdefault(row[column_index], []).append(index)
+        return key_rows
+
+    def _candidate_rows(self, pattern: SearchPattern, start: int) -> range | List[int]:
+        """Return the indices of the rows which may match the pattern, starting from row start"""
+        key_values = pattern.key_values()
+        if key_values:
+            # Only the rows with the key values can match, take the shortest list of rows
+            candidates = None
+            for column, value in key_values:
+                rows = self._get_key_rows(column).get(value, [])
+                if candidates is None or len(rows) < len(candidates):
+                    candidates = rows
+            return candidates[bisect.bisect_left(candidates, start):]
+
+        if pattern.mode == 'simple':
+            # Substring search in the lowercase row, the separator cannot occur in a pattern
+            if self._lowercase_lines is None:
+                self._lowercase_lines = ['\0'.join(row).lower() for row in self.rows]
+            text = pattern.text
+            lines = self._lowercase_lines
+            return [index for index in range(start, len(lines)) if text in lines[index]]
+
+        return range(start, len(self.rows))
+
+    def search(
+        self,
+        pattern: SearchPattern,
+        max_results: int,
+        offset: int,
+        cursor: Optional[str] = None,
+        exact_total: bool = False
+    ) -> SearchPage:
+        """
+        Search the loaded rows for matching entries
+
+        The cursor position is the index of the row after the page. All matches are counted,
+        because scanning the rows in memory is cheap compared to printing them.
+        """
+        pattern.bind(self.header, self.index_file.stem)
+
+        skip = offset
+        base_count = 0
+        start = 0
+        if cursor is not None:
+            start, base_count = parse_cursor(cursor, self.backend)
+            skip = 0
+
+        results = []
+        matches = 0
+        next_position = start
+        for index in self._candidate_rows(pattern, start):
+            row = self.rows[index]
+            if not pattern.matches(row):
+                continue
+
+            matches += 1
+            if skip < matches <= skip + max_results:
+                results.append(row)
+                next_position = index + 1
+
+        has_more = matches > skip + max_results
+        return SearchPage(
+            header=self.header,
+            results=results,
+            first_index=base_count + skip,
+            total_matches=base_count + matches,
+            total_exact=True,
+            has_more=has_more,
+            next_cursor=format_cursor(self.backend, next_position, base_count + skip + len(results))
+            if has_more else None
+        )
+
+
+class SearchServer:
+    """Loads the index files on demand and answers search requests"""
+
+    def __init__(self, index_directory: Path):
+        self.index_directory = index_directory.resolve()
+        self.searchers: Dict[Path, MemoryIndexSearcher] = {}
+
+    def get_searcher(self, index_file: str) -> MemoryIndexSearcher:
+        """Return the searcher of an index file in the index directory, loading it if needed"""
+        path = Path(index_file).resolve()
+        if path.parent != self.index_directory or path.suffix != '.csv':
+            raise ValueError(f"'{index_file}' is not an index file of '{self.index_directory}'")
+
+        searcher = self.searchers.get(path)
+        if searcher is None or searcher.is_stale():
+            searcher = MemoryIndexSearcher(path)
+            self.searchers[path] = searcher
+            print(f"Loaded {len(searcher.rows)} rows from {path.name}", file=sys.stderr)
+
+        return searcher
+
+    def handle_request(self, request: dict) -> dict:
+        """Answer a decoded request, the response has the fields of SearchPage or an error"""
+        try:
+            searcher = self.get_searcher(request['index_file'])
+            pattern = SearchPattern(request['pattern'])
+            page = searcher.search(
+                pattern,
+                int(request['max_results']),
+                int(request.get('offset', 0)),
+                request.get('cursor'),
+                bool(request.get('exact_total', False))
+            )
+            return asdict(page)
+        except SystemExit:
+            # The search functions report invalid input on stderr and exit
+            return {'error': 'invalid search request'}
+        except (KeyError, TypeError, ValueError, OSError) as e:
+            return {'error': str(e)}
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    """Answers the requests of one connection, one JSON line each"""
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+            except ValueError as e:
+                response = {'error': f'invalid JSON: {e}'}
+            else:
+                response = self.server.search_server.handle_request(request)
+            self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+            self.wfile.flush()
+
+
+def create_server(search_server: SearchServer, address_path: Path) -> socketserver.BaseServer:
+    """Bind the server socket and publish its address in the address file"""
+    if hasattr(socket, 'AF_UNIX'):
+        if address_path.exists():
+            # Refuse to replace the socket of a running server, remove a stale one
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(str(address_path))
+            except OSError:
+                address_path.unlink()
+            else:
+                raise RuntimeError(f"A search server is already listening on '{address_path}'")
+            finally:
+                probe.close()
+        server = socketserver.UnixStreamServer(str(address_path), RequestHandler)
+    else:
+        server = socketserver.TCPServer(('127.0.0.1', 0), RequestHandler)
+        address_path.write_text(str(server.server_address[1]))
+
+    server.search_server = search_server
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Keep the C# code index in memory and answer search_code.py queries')
+    parser.add_argument('index_directory', help='Directory containing the CSV index files (CodeIndex)')
+    parser.add_argument('--idle-timeout', type=float, default=3600,
+                        help='Stop the server after this many seconds without queries (default: 3600, 0: never)')
+    args = parser.parse_args()
+
+    index_directory = Path(args.index_directory)
+    if not index_directory.is_dir():
+        print(f"Error: Index directory '{index_directory}' not found", file=sys.stderr)
+        sys.exit(1)
+
+    address_path = server_address_path(index_directory)
+    try:
+        server = create_server(SearchServer(index_directory), address_path)
+    except (RuntimeError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    # handle_request() returns without a request after the timeout
+    idle = []
+    server.timeout = args.idle_timeout or None
+    server.handle_timeout = lambda: idle.append(True)
+
+    print(f"Serving {index_directory} on {address_path.read_text() if address_path.suffix == '.port' else address_path}",
+          file=sys.stderr)
+    try:
+        while not idle:
+            server.handle_request()
+        print(f"No queries for {args.idle_timeout} seconds, stopping", file=sys.stderr)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        try:
+            os.remove(address_path)
+        except FileNotFoundError:
+            pass
+
+
+if __name__ == '__main__':
+    main()